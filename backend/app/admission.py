@@ -0,0 +1,192 @@
+"""
+Admission control and per-client rate limits in front of the database.
+
+The connection pool caps how many connections this process opens, but a
+request that finds it empty waits up to the pool timeout, and a burst
+piles up behind it until every request is slow and many time out anyway.
+AdmissionControl decides before that: at most `limit` requests hold a
+database connection at once, up to `queue_size` more wait for one of
+them to finish, for at most `timeout` seconds, and everything beyond
+that is turned away at once with a hint of when to come back. Waiters
+are admitted in arrival order.
+
+RateLimiter keeps a token bucket per client and kind of request (reads
+and writes have separate budgets), so one client refreshing in a loop
+uses up its own budget rather than everyone's capacity. The caller picks
+the client key; it must be one the client cannot choose freely, such as
+its address, or a fresh key per request would buy a fresh bucket.
+
+Both are per process, like the pool: with several workers the server
+sees up to workers x `limit` connections doing work.
+"""
+import asyncio
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+
+
+class Overloaded(Exception):
+    """Raised when a request is turned away; `retry_after` is in seconds."""
+
+    def __init__(self, reason, retry_after):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionControl:
+    """
+    Bounded concurrency with a bounded FIFO wait queue. `limit` <= 0
+    admits everything. Rejections (queue_full, queue_timeout) are counted
+    in `metrics.requests_rejected` when `metrics` is given.
+    """
+
+    def __init__(self, limit, queue_size=0, timeout=1.0, retry_after=1, metrics=None):
+        self.limit = limit
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._metrics = metrics
+        self._in_flight = 0
+        self._waiters = deque()  # futures resolved when a slot is handed over
+        self._admitted = 0
+        self._queued = 0
+        self._max_queue_depth = 0
+        self._rejected = {"queue_full": 0, "queue_timeout": 0}
+
+    def _reject(self, reason):
+        self._rejected[reason] += 1
+        if self._metrics is not None:
+            self._metrics.requests_rejected.inc((reason,))
+        return Overloaded(reason, self.retry_after)
+
+    async def acquire(self):
+        """Takes a slot, waiting in the queue if need be. Raises Overloaded."""
+        if self.limit <= 0:
+            return
+        if self._in_flight < self.limit and not self._waiters:
+            self._in_flight += 1
+            self._admitted += 1
+            return
+        if len(self._waiters) >= self.queue_size:
+            raise self._reject("queue_full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._queued += 1
+        self._max_queue_depth = max(self._max_queue_depth, len(self._waiters))
+        try:
+            await asyncio.wait_for(waiter, self.timeout)
+        except asyncio.TimeoutError:
+            # Handed a slot just as the timeout fired (wait_for raises then
+            # on 3.12+): give it back, or it stays counted in flight for good
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise self._reject("queue_timeout")
+        except BaseException:
+            # Cancelled (client gone) just as a slot was handed over: pass it on
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+        self._admitted += 1
+
+    def release(self):
+        """Hands the slot to the longest waiter, or frees it."""
+        if self.limit <= 0:
+            return
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)  # the slot stays in flight for the waiter
+                return
+        self._in_flight -= 1
+
+    @asynccontextmanager
+    async def slot(self):
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self):
+        return {
+            "limit": self.limit,
+            "in_flight": self._in_flight,
+            "queue_depth": len(self._waiters),
+            "queue_size": self.queue_size,
+            "max_queue_depth": self._max_queue_depth,
+            "admitted": self._admitted,
+            "queued": self._queued,
+            "rejected": dict(self._rejected),
+        }
+
+
+class TokenBucket:
+    """`rate` tokens per second, holding at most `burst`; starts full."""
+
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate, burst, now):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = now
+
+    def take(self, now):
+        """0 if a token was taken, else seconds until one is available."""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """
+    Per-client token buckets with separate "read" and "write" budgets of
+    (requests per second, burst); a rate <= 0 leaves that kind unlimited.
+    Buckets of the least recently seen clients are dropped beyond
+    `max_clients`, which only ever gives a client a fresh, full bucket.
+    """
+
+    def __init__(self, read_rate=0.0, read_burst=1, write_rate=0.0, write_burst=1, max_clients=10000,
+                 metrics=None):
+        self.budgets = {"read": (read_rate, read_burst), "write": (write_rate, write_burst)}
+        self.max_clients = max_clients
+        self._metrics = metrics
+        self._buckets = OrderedDict()  # (client, kind) -> TokenBucket, least recently used first
+        self._limited = {"read": 0, "write": 0}
+
+    def check(self, client, kind):
+        """Takes a token from `client`'s `kind` budget. Raises Overloaded when it is empty."""
+        rate, burst = self.budgets[kind]
+        if rate <= 0:
+            return
+        now = time.monotonic()
+        key = (client, kind)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(rate, max(1, burst), now)
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        wait = bucket.take(now)
+        if wait:
+            self._limited[kind] += 1
+            if self._metrics is not None:
+                self._metrics.requests_rejected.inc((f"{kind}_rate_limit",))
+            raise Overloaded(f"{kind}_rate_limit", wait)
+
+    def stats(self):
+        return {
+            "read": {"rate": self.budgets["read"][0], "burst": self.budgets["read"][1]},
+            "write": {"rate": self.budgets["write"][0], "burst": self.budgets["write"][1]},
+            "clients": len({client for client, _ in self._buckets}),
+            "limited": dict(self._limited),
+        }
@@ -0,0 +1,192 @@
+"""
+Archival of settled history.
+
+Payments, finished bookings and resolved maintenance requests only grow,
+while the list endpoints and the foreign-key checks are about recent
+rows. archive() moves rows older than a horizon into archive tables with
+the same columns and indexes but no foreign keys (migration 8):
+
+  Payments             payment_date before the cutoff
+  Bookings             Completed or Cancelled, ended (check-out, else
+                       check-in) before the cutoff, with no payments left
+                       in Payments
+  MaintenanceRequests  Resolved before the cutoff (resolved_date, else
+                       reported_date)
+
+Payments go first so that the bookings they belong to can follow in the
+same run. Every batch of rows is copied and deleted in its own short
+transaction, and rows a live transaction has locked are skipped (SKIP
+LOCKED) and left for the next run, so archiving never waits on the API.
+
+A table's cutoff is recorded in ArchiveState before any row moves. Each
+archived row is dated before it (payment_date, check_in_date,
+reported_date), so a list or export whose date range starts on or after
+the cutoff only reads the live table, and one reaching further back reads
+both. Archiving a booking drops its BookingLedger row, so it leaves the
+dues endpoints; the report rollups are not affected, and both rebuild
+commands read the archive tables too.
+
+    python -m app.archive run               # horizon ARCHIVE_AFTER_DAYS
+    python -m app.archive run --days 365
+    python -m app.archive status
+"""
+import argparse
+import asyncio
+import sys
+from datetime import date, datetime, timedelta, timezone
+
+from app.retry import run_transaction
+
+
+class Archive:
+    """
+    Where rows of `table` go and which ones qualify: `condition` is SQL
+    with one %s per use of the cutoff date. It must imply that the date
+    the list endpoints filter on is before the cutoff.
+    """
+
+    def __init__(self, table, archive, key, condition):
+        self.table = table
+        self.archive = archive
+        self.key = key
+        self.condition = condition
+
+    def params(self, cutoff):
+        return [cutoff] * self.condition.count("%s")
+
+
+ARCHIVES = [
+    Archive("Payments", "PaymentsArchive", "payment_id", "payment_date < %s"),
+    Archive("Bookings", "BookingsArchive", "booking_id",
+            "booking_status IN ('Completed', 'Cancelled') AND check_in_date < %s "
+            "AND COALESCE(check_out_date, check_in_date) < %s "
+            "AND NOT EXISTS (SELECT 1 FROM Payments p WHERE p.booking_id = Bookings.booking_id)"),
+    Archive("MaintenanceRequests", "MaintenanceRequestsArchive", "request_id",
+            "status = 'Resolved' AND reported_date < %s AND COALESCE(resolved_date, reported_date) < %s"),
+]
+ARCHIVE_TABLES = {a.table: a.archive for a in ARCHIVES}
+
+STATE_UPSERT = """
+    INSERT INTO ArchiveState (table_name, archived_before, rows_archived, last_run_at)
+    VALUES (%s, %s, 0, %s)
+    ON DUPLICATE KEY UPDATE archived_before = GREATEST(archived_before, VALUES(archived_before)),
+                            last_run_at = VALUES(last_run_at)
+"""
+
+
+def with_archive(table, columns):
+    """Derived table of `columns` over the live and archived rows of `table`."""
+    select = f"SELECT {', '.join(columns)} FROM "
+    return f"({select}{table} UNION ALL {select}{ARCHIVE_TABLES[table]})"
+
+
+async def archived_before(cursor, table):
+    """The cutoff `table` has been archived up to, or None if it never was."""
+    await cursor.execute("SELECT archived_before FROM ArchiveState WHERE table_name = %s", (table,))
+    row = await cursor.fetchone()
+    if row is None:
+        return None
+    return row['archived_before'] if isinstance(row, dict) else row[0]
+
+
+async def reaches_archive(cursor, table, date_from, date_to):
+    """
+    The archive table to read along with `table` for a list filtered on
+    [date_from, date_to], or None. Only a date range that starts before
+    the cutoff (or is open at the start) needs it; no range at all means
+    the live rows.
+    """
+    if date_from is None and date_to is None:
+        return None
+    cutoff = await archived_before(cursor, table)
+    if cutoff is None or (date_from is not None and date_from >= cutoff):
+        return None
+    return ARCHIVE_TABLES[table]
+
+
+async def _move_batch(conn, cursor, spec, cutoff, batch):
+    await cursor.execute(
+        f"SELECT {spec.key} FROM {spec.table} WHERE {spec.condition} LIMIT %s FOR UPDATE SKIP LOCKED",
+        spec.params(cutoff) + [batch],
+    )
+    keys = [row[0] for row in await cursor.fetchall()]
+    if keys:
+        marks = ", ".join(["%s"] * len(keys))
+        await cursor.execute(f"INSERT INTO {spec.archive} SELECT * FROM {spec.table} "
+                             f"WHERE {spec.key} IN ({marks})", keys)
+        await cursor.execute(f"DELETE FROM {spec.table} WHERE {spec.key} IN ({marks})", keys)
+        await cursor.execute("UPDATE ArchiveState SET rows_archived = rows_archived + %s WHERE table_name = %s",
+                             (len(keys), spec.table))
+    await conn.commit()
+    return len(keys)
+
+
+async def archive(conn, cutoff, batch=500, pause=0.05, tables=None):
+    """
+    Moves the rows that qualify before `cutoff` into the archive tables,
+    `batch` rows per transaction with `pause` seconds between batches.
+    Returns {table: rows moved}.
+    """
+    moved = {}
+    cursor = await conn.cursor()
+    try:
+        for spec in ARCHIVES:
+            if tables is not None and spec.table not in tables:
+                continue
+            # Readers must look in the archive before the first row lands there
+            now = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)  # sessions run in UTC
+            await cursor.execute(STATE_UPSERT, (spec.table, cutoff, now))
+            await conn.commit()
+            moved[spec.table] = 0
+            while True:
+                n = await run_transaction(conn, lambda: _move_batch(conn, cursor, spec, cutoff, batch))
+                moved[spec.table] += n
+                if n < batch:
+                    break
+                await asyncio.sleep(pause)
+    finally:
+        await cursor.close()
+    return moved
+
+
+async def status(cursor):
+    """ArchiveState rows: per table, the cutoff, rows moved so far and the last run."""
+    await cursor.execute("SELECT table_name, archived_before, rows_archived, last_run_at "
+                         "FROM ArchiveState ORDER BY table_name")
+    return await cursor.fetchall()
+
+
+async def _run(argv):
+    import mysql.connector.aio
+    from app.main import ARCHIVE_CONFIG, DB_CONFIG
+
+    parser = argparse.ArgumentParser(prog="python -m app.archive", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["run", "status"])
+    parser.add_argument("--days", type=int, default=ARCHIVE_CONFIG['after_days'],
+                        help="archive rows older than this many days")
+    parser.add_argument("--batch", type=int, default=ARCHIVE_CONFIG['batch'], help="rows per transaction")
+    parser.add_argument("--pause", type=float, default=ARCHIVE_CONFIG['pause'], help="seconds between batches")
+    parser.add_argument("--table", dest="tables", action="append", choices=list(ARCHIVE_TABLES),
+                        help="archive only this table (repeatable)")
+    args = parser.parse_args(argv)
+
+    conn = await mysql.connector.aio.connect(**DB_CONFIG)
+    try:
+        if args.command == "status":
+            cursor = await conn.cursor()
+            for table, cutoff, rows, last_run in await status(cursor):
+                print(f"{table:22} archived before {cutoff}  {rows} row(s)  last run {last_run}")
+            await cursor.close()
+            return 0
+        cutoff = date.today() - timedelta(days=args.days)
+        moved = await archive(conn, cutoff, args.batch, args.pause, args.tables)
+        for table, n in moved.items():
+            print(f"Archived {n} {table} row(s) from before {cutoff}")
+        return 0
+    finally:
+        await conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(_run(sys.argv[1:])))
@@ -0,0 +1,73 @@
+"""
+Date-range room availability.
+
+Stays are half-open intervals [check_in_date, check_out_date): a guest can
+check in on the day another checks out. A NULL check_out_date means the
+stay is open-ended. Only Active bookings hold a room. The overlap tests
+are served by idx_bookings_room_dates (room_id, check_in_date,
+check_out_date) and idx_bookings_guest_dates (guest_id, ...).
+"""
+from app.statements import statement_cursor
+
+
+def overlap_condition(alias, check_in, check_out):
+    """
+    SQL fragment (and params) matching bookings of `alias` that overlap
+    [check_in, check_out). `check_out` may be None for an open-ended stay.
+    """
+    sql = (f"{alias}.booking_status = 'Active'"
+           f" AND ({alias}.check_out_date IS NULL OR {alias}.check_out_date > %s)")
+    params = [check_in]
+    if check_out is not None:
+        sql += f" AND {alias}.check_in_date < %s"
+        params.append(check_out)
+    return sql, params
+
+
+async def find_available_rooms(conn, check_in, check_out=None, room_type=None):
+    """Rooms with no overlapping Active booking that are not under maintenance."""
+    overlap_sql, overlap_params = overlap_condition("b", check_in, check_out)
+    sql = "SELECT r.* FROM Rooms r WHERE r.occupancy_status <> 'Maintenance'"
+    params = []
+    if room_type:
+        sql += " AND r.room_type = %s"
+        params.append(room_type)
+    sql += (" AND NOT EXISTS (SELECT 1 FROM Bookings b WHERE b.room_id = r.room_id AND "
+            + overlap_sql + ") ORDER BY r.room_id")
+    params += overlap_params
+
+    cursor = await statement_cursor(conn, dictionary=True)
+    try:
+        await cursor.execute(sql, params)
+        return await cursor.fetchall()
+    finally:
+        await cursor.close()
+
+
+async def _overlapping(conn, column, value, check_in, check_out):
+    overlap_sql, overlap_params = overlap_condition("b", check_in, check_out)
+    cursor = await statement_cursor(conn, dictionary=True)
+    try:
+        await cursor.execute(
+            "SELECT b.booking_id, b.room_id, b.check_in_date, b.check_out_date FROM Bookings b "
+            f"WHERE b.{column} = %s AND " + overlap_sql,
+            [value] + overlap_params,
+        )
+        return await cursor.fetchall()
+    finally:
+        await cursor.close()
+
+
+async def find_conflicts(conn, room_id, check_in, check_out=None):
+    """Active bookings of `room_id` overlapping [check_in, check_out)."""
+    return await _overlapping(conn, "room_id", room_id, check_in, check_out)
+
+
+async def find_guest_conflicts(conn, guest_id, check_in, check_out=None):
+    """Active bookings of `guest_id`, in any room, overlapping [check_in, check_out)."""
+    return await _overlapping(conn, "guest_id", guest_id, check_in, check_out)
+
+
+def covers(check_in, check_out, day):
+    """True if the stay [check_in, check_out) includes `day`."""
+    return check_in <= day and (check_out is None or check_out > day)
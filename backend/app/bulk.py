@@ -0,0 +1,157 @@
+"""Streaming record parsers and chunked inserts for the bulk import endpoints."""
+import csv
+import json
+from enum import Enum
+
+import mysql.connector
+from pydantic import ValidationError
+
+# Errors MySQL reports without the IntegrityError/DataError SQLSTATE even
+# though one row's values cause them: data truncated, incorrect value for
+# the column's type, check constraint violated
+ROW_ERRNOS = {1265, 1366, 3819}
+
+
+def is_row_error(e):
+    """True if `e` was caused by the values of the row being inserted."""
+    return (isinstance(e, (mysql.connector.IntegrityError, mysql.connector.DataError))
+            or getattr(e, 'errno', None) in ROW_ERRNOS)
+
+
+def detect_format(content_type, explicit=None):
+    """Picks json / ndjson / csv from ?format= or the request Content-Type."""
+    if explicit:
+        return explicit
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if content_type in ("application/x-ndjson", "application/ndjson", "application/jsonl"):
+        return "ndjson"
+    if content_type in ("text/csv", "application/csv"):
+        return "csv"
+    return "json"
+
+
+async def _lines(stream):
+    """Yields decoded text lines from an async byte stream as they arrive."""
+    buffer = b""
+    async for chunk in stream:
+        buffer += chunk
+        *complete, buffer = buffer.split(b"\n")
+        for line in complete:
+            yield line.decode("utf-8-sig")
+    if buffer:
+        yield buffer.decode("utf-8-sig")
+
+
+async def iter_records(request, fmt):
+    """
+    Yields (row_number, dict_or_error) pairs from the request body.
+
+    JSON arrays are read whole; NDJSON and CSV are parsed line by line from
+    the stream so large uploads never sit in memory. Unparseable rows are
+    yielded as a ValueError instead of aborting the import.
+    """
+    if fmt == "json":
+        try:
+            records = json.loads(await request.body() or b"[]")
+        except ValueError as e:
+            raise ValueError(f"Body is not valid JSON: {e}")
+        if not isinstance(records, list):
+            raise ValueError("JSON body must be an array of objects")
+        for row, record in enumerate(records, start=1):
+            yield row, record
+        return
+
+    row = 0
+    if fmt == "ndjson":
+        async for line in _lines(request.stream()):
+            if not line.strip():
+                continue
+            row += 1
+            try:
+                yield row, json.loads(line)
+            except ValueError as e:
+                yield row, ValueError(f"Invalid JSON: {e}")
+        return
+
+    header = None
+    pending = ""
+    async for line in _lines(request.stream()):
+        pending += line if not pending else "\n" + line
+        if pending.count('"') % 2:
+            continue  # quoted field continues on the next line
+        text, pending = pending, ""
+        if not text.strip():
+            continue
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [h.strip() for h in values]
+            continue
+        row += 1
+        if len(values) != len(header):
+            yield row, ValueError(f"Expected {len(header)} columns, got {len(values)}")
+            continue
+        # Empty cells are left out so column defaults (or NULL) apply
+        yield row, {k: v for k, v in zip(header, values) if v != ""}
+
+
+def validate(model, record):
+    """Returns (model instance, None) or (None, error message)."""
+    if isinstance(record, Exception):
+        return None, str(record)
+    if not isinstance(record, dict):
+        return None, "Row must be an object"
+    try:
+        return model(**record), None
+    except ValidationError as e:
+        return None, "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+
+
+def row_params(obj, columns):
+    """Column values for an INSERT, with enums replaced by their values."""
+    values = []
+    for column in columns:
+        value = getattr(obj, column)
+        values.append(value.value if isinstance(value, Enum) else value)
+    return tuple(values)
+
+
+async def insert_chunk(conn, sql, rows, on_insert=None):
+    """
+    Inserts [(row_number, params), ...] and commits once.
+
+    The whole chunk is sent as one multi-row INSERT. If any row violates a
+    constraint or has a value its column cannot hold (too long, out of
+    range), the chunk is rolled back and replayed row by row inside one
+    transaction, so only the offending rows fail. `on_insert(cursor, params)`
+    is awaited with the params of the rows that went in, before the commit.
+    Returns {row_number: error}.
+    """
+    cursor = await conn.cursor()
+    try:
+        try:
+            await cursor.executemany(sql, [params for _, params in rows])
+            if on_insert:
+                await on_insert(cursor, [params for _, params in rows])
+            await conn.commit()
+            return {}
+        except mysql.connector.Error as e:
+            if not is_row_error(e):
+                raise
+            await conn.rollback()
+
+        failures = {}
+        inserted = []
+        for row, params in rows:
+            try:
+                await cursor.execute(sql, params)
+                inserted.append(params)
+            except mysql.connector.Error as e:
+                if not is_row_error(e):
+                    raise
+                failures[row] = str(e)
+        if on_insert and inserted:
+            await on_insert(cursor, inserted)
+        await conn.commit()
+        return failures
+    finally:
+        await cursor.close()
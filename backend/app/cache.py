@@ -0,0 +1,94 @@
+"""In-process TTL + LRU cache for hot read endpoints."""
+import hashlib
+import time
+from collections import OrderedDict, namedtuple
+
+CachedResponse = namedtuple("CachedResponse", ["body", "etag", "headers"])
+
+
+def make_etag(body):
+    """Strong ETag derived from the response body."""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match, etag):
+    """True if an If-None-Match header value covers `etag`."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return etag in candidates or f"W/{etag}" in candidates
+
+
+class ResponseCache:
+    """
+    Entries are keyed by (namespace, key) and expire after `ttl` seconds;
+    once `maxsize` entries exist the least recently used one is evicted.
+
+    Writers call invalidate(namespace). Every namespace carries a
+    generation number, and readers pass the generation they saw before
+    querying to set(), so a read that raced with a write can never put
+    pre-write data back into the cache.
+    """
+
+    def __init__(self, maxsize=256, ttl=30.0, enabled=True):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.enabled = enabled
+        self._entries = OrderedDict()  # (namespace, key) -> (expires_at, value)
+        self._generations = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def generation(self, namespace):
+        return self._generations.get(namespace, 0)
+
+    def get(self, namespace, key):
+        if not self.enabled:
+            return None
+        full_key = (namespace, key)
+        entry = self._entries.get(full_key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[full_key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(full_key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, namespace, key, value, generation):
+        if not self.enabled or generation != self.generation(namespace):
+            return
+        full_key = (namespace, key)
+        self._entries[full_key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(full_key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, *namespaces):
+        """Drops every entry in the given namespaces."""
+        for namespace in namespaces:
+            self._generations[namespace] = self.generation(namespace) + 1
+            stale = [k for k in self._entries if k[0] == namespace]
+            for k in stale:
+                del self._entries[k]
+            self.invalidations += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl_s": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
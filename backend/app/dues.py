@@ -0,0 +1,163 @@
+"""
+Outstanding rent per booking.
+
+Rent is charged per started month of the stay: a booking that checked in
+on the 15th owes one month's rent from the 15th, a second from the 15th of
+the next month, and so on up to its check-out date (exclusive) or, while
+it runs, the as-of date. Cancelled bookings owe nothing. The balance is
+that rent minus everything paid against the booking.
+
+Payments are not summed per request. BookingLedger keeps, per booking,
+the running total paid (plus count and latest payment date) and the
+room's monthly rent when it was booked, so a later rent change does not
+re-price existing stays. Both are written in the transaction of the
+booking or payment that changes them, like the report rollups; bookings
+without a ledger row (created before it existed) use the room's current
+rent. The rent owed depends on the date and is computed in the same SQL
+pass that reads the ledger, so the overdue list walks Active bookings in
+booking_id order (idx_bookings_status) without touching Payments.
+
+    python -m app.dues rebuild      # recompute the paid totals from Payments (and its archive)
+"""
+import argparse
+import asyncio
+import sys
+from datetime import timedelta
+from decimal import Decimal
+
+from app.archive import with_archive
+from app.rollups import BATCH_ROWS
+
+LEDGER_PAYMENTS_UPSERT = """
+    INSERT INTO BookingLedger (booking_id, amount_paid, payment_count, last_payment_date)
+    VALUES (%s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE amount_paid = amount_paid + VALUES(amount_paid),
+                            payment_count = payment_count + VALUES(payment_count),
+                            last_payment_date = GREATEST(COALESCE(last_payment_date, VALUES(last_payment_date)),
+                                                         VALUES(last_payment_date))
+"""
+
+# Months charged as of the day before `period_end` (check-out, or the day
+# after the as-of date): one per started month of the stay
+_PERIOD_END = "LEAST(COALESCE(b.check_out_date, %s), %s)"
+MONTHS_CHARGED = (
+    "CASE WHEN b.booking_status = 'Cancelled' THEN 0 ELSE GREATEST(0, "
+    f"12 * (YEAR({_PERIOD_END}) - YEAR(b.check_in_date)) "
+    f"+ MONTH({_PERIOD_END}) - MONTH(b.check_in_date) "
+    f"+ (DAY({_PERIOD_END}) > DAY(b.check_in_date))) END"
+)
+MONTHLY_RENT = "COALESCE(l.monthly_rent, r.monthly_rent)"
+AMOUNT_PAID = "COALESCE(l.amount_paid, 0)"
+
+BALANCE_SELECT = (
+    "SELECT b.booking_id, b.guest_id, b.room_id, b.check_in_date, b.check_out_date, b.booking_status, "
+    f"{MONTHLY_RENT} AS monthly_rent, {MONTHS_CHARGED} AS months_charged, "
+    f"{AMOUNT_PAID} AS amount_paid, COALESCE(l.payment_count, 0) AS payment_count, l.last_payment_date "
+    "FROM Bookings b JOIN Rooms r ON r.room_id = b.room_id "
+    "LEFT JOIN BookingLedger l ON l.booking_id = b.booking_id"
+)
+
+
+def _months_params(as_of):
+    period_end = as_of + timedelta(days=1)
+    return [period_end, period_end] * 3
+
+
+def with_balance(row):
+    """Adds rent_due and balance (rent_due - amount_paid) to a BALANCE_SELECT row."""
+    rent_due = (Decimal(row['monthly_rent']) * row['months_charged']).quantize(Decimal('0.01'))
+    return {**row, 'rent_due': rent_due, 'balance': rent_due - Decimal(row['amount_paid'])}
+
+
+async def open_ledger(cursor, booking_id, monthly_rent):
+    """Starts the ledger of a new booking at the room's current rent."""
+    await cursor.execute("INSERT INTO BookingLedger (booking_id, monthly_rent) VALUES (%s, %s)",
+                         (booking_id, monthly_rent))
+
+
+async def add_booking_payments(cursor, payments):
+    """Adds [(booking_id, payment_date, amount_paid), ...] to the bookings' paid totals."""
+    totals = {}
+    for booking_id, payment_date, amount in payments:
+        total, count, last = totals.get(booking_id, (Decimal("0"), 0, payment_date))
+        totals[booking_id] = (total + amount, count + 1, max(last, payment_date))
+    rows = [(booking_id,) + value for booking_id, value in totals.items()]
+    for i in range(0, len(rows), BATCH_ROWS):
+        await cursor.executemany(LEDGER_PAYMENTS_UPSERT, rows[i:i + BATCH_ROWS])
+
+
+async def booking_balance(cursor, booking_id, as_of):
+    """The balance of one booking as of `as_of`, or None if it does not exist."""
+    await cursor.execute(BALANCE_SELECT + " WHERE b.booking_id = %s",
+                         _months_params(as_of) + [booking_id])
+    row = await cursor.fetchone()
+    return with_balance(row) if row else None
+
+
+async def overdue_page(cursor, as_of, after, limit):
+    """
+    Active bookings that owe rent as of `as_of`, in booking_id order after
+    booking `after` (None for the first page). Returns up to limit + 1
+    rows so the caller can tell whether another page follows.
+    """
+    sql = (BALANCE_SELECT + " WHERE b.booking_status = 'Active'"
+           f" AND {MONTHS_CHARGED} * {MONTHLY_RENT} > {AMOUNT_PAID}")
+    params = _months_params(as_of) + _months_params(as_of)
+    if after is not None:
+        sql += " AND b.booking_id > %s"
+        params.append(after)
+    sql += " ORDER BY b.booking_id LIMIT %s"
+    params.append(limit + 1)
+    await cursor.execute(sql, params)
+    return [with_balance(row) for row in await cursor.fetchall()]
+
+
+async def rebuild(cursor, archived=False):
+    """
+    Recomputes every booking's paid total, count and latest payment date
+    from Payments, keeping the rents captured at booking time. With
+    `archived` archived payments (migration 8) count too; those of
+    archived bookings are skipped, as the bookings have no ledger. The
+    caller commits; returns the number of bookings with payments.
+    """
+    payments = (with_archive("Payments", ["booking_id", "amount_paid", "payment_date"]) if archived
+                else "Payments")
+    await cursor.execute("UPDATE BookingLedger SET amount_paid = 0, payment_count = 0, last_payment_date = NULL")
+    await cursor.execute("SELECT p.booking_id, SUM(p.amount_paid), COUNT(*), MAX(p.payment_date) "
+                         f"FROM {payments} p JOIN Bookings b ON b.booking_id = p.booking_id "
+                         "GROUP BY p.booking_id")
+    totals = await cursor.fetchall()
+    for i in range(0, len(totals), BATCH_ROWS):
+        await cursor.executemany(
+            "INSERT INTO BookingLedger (booking_id, amount_paid, payment_count, last_payment_date) "
+            "VALUES (%s, %s, %s, %s) "
+            "ON DUPLICATE KEY UPDATE amount_paid = VALUES(amount_paid), payment_count = VALUES(payment_count), "
+            "last_payment_date = VALUES(last_payment_date)",
+            [tuple(row) for row in totals[i:i + BATCH_ROWS]],
+        )
+    return len(totals)
+
+
+async def _run(argv):
+    import mysql.connector.aio
+    from app.main import DB_CONFIG
+
+    parser = argparse.ArgumentParser(prog="python -m app.dues", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["rebuild"])
+    parser.parse_args(argv)
+
+    conn = await mysql.connector.aio.connect(**DB_CONFIG)
+    try:
+        cursor = await conn.cursor()
+        bookings = await rebuild(cursor, archived=True)
+        await cursor.close()
+        await conn.commit()
+        print(f"Rebuilt the paid totals of {bookings} booking(s)")
+        return 0
+    finally:
+        await conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(_run(sys.argv[1:])))
@@ -0,0 +1,124 @@
+"""
+In-process pub/sub hub behind the /api/events server-sent events feed.
+
+Writers publish small deltas (the row they wrote) under a topic such as
+"rooms" or "bookings". Each event is encoded once, kept in a bounded
+history for clients that reconnect with Last-Event-ID, and handed to every
+matching subscriber's bounded queue. A subscriber whose queue is full is
+dropped instead of making the writer wait or buffer without limit; its
+stream ends, the browser's EventSource reconnects, and the client either
+replays the events it missed from the history or, if they have already
+left it, receives a "reset" event telling it to reload its tables.
+
+The hub lives in one process: with several workers each one only sees
+its own writes, so run the feed behind a single worker.
+"""
+import asyncio
+from collections import deque
+
+from app.serialize import dumps
+
+TOPICS = ("guests", "rooms", "bookings", "payments", "maintenance")
+
+
+def encode_event(event_id, topic, data):
+    """One SSE frame: `event` is the topic, `data` the JSON payload."""
+    return b"id: %d\nevent: %s\ndata: %s\n\n" % (event_id, topic.encode(), dumps(data))
+
+
+def reset_event(event_id):
+    """Tells a client it missed events that can no longer be replayed."""
+    return encode_event(event_id, "reset", {"op": "reset"})
+
+
+class Subscription:
+    def __init__(self, topics, maxsize):
+        self.topics = topics
+        self.queue = asyncio.Queue(maxsize)
+        self.dropped = False
+
+    async def get(self, timeout):
+        """Next encoded event, or None after `timeout` seconds or once dropped."""
+        if self.dropped and self.queue.empty():
+            return None
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class EventHub:
+    """
+    Fan-out of published events to subscribers with bounded queues.
+
+    publish() never blocks: it runs in the request that made the write, and
+    one stalled browser tab must not slow down bookings.
+    """
+
+    def __init__(self, queue_size=256, history=1024):
+        self.queue_size = queue_size
+        self._history = deque(maxlen=history)  # (event_id, topic, frame)
+        self._subscribers = set()
+        self._last_id = 0
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+
+    @property
+    def last_id(self):
+        return self._last_id
+
+    def publish(self, topic, op, row=None):
+        """Sends `{"op": op, "row": row}` to every subscriber of `topic`."""
+        self._last_id += 1
+        data = {"op": op}
+        if row is not None:
+            data["row"] = row
+        frame = encode_event(self._last_id, topic, data)
+        self._history.append((self._last_id, topic, frame))
+        self.published += 1
+        for sub in list(self._subscribers):
+            if topic not in sub.topics:
+                continue
+            try:
+                sub.queue.put_nowait(frame)
+                self.delivered += 1
+            except asyncio.QueueFull:
+                self._drop(sub)
+
+    def subscribe(self, topics, last_event_id=None):
+        """
+        Registers a subscriber to `topics`. With `last_event_id` the events
+        it missed are queued first, or a reset event if the history no
+        longer reaches back that far.
+        """
+        sub = Subscription(frozenset(topics), self.queue_size)
+        if last_event_id is not None and last_event_id < self._last_id:
+            oldest = self._history[0][0] if self._history else self._last_id + 1
+            missed = [frame for event_id, topic, frame in self._history
+                      if event_id > last_event_id and topic in sub.topics]
+            if last_event_id + 1 < oldest or len(missed) > self.queue_size:
+                missed = [reset_event(self._last_id)]
+            for frame in missed:
+                sub.queue.put_nowait(frame)
+        self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        self._subscribers.discard(sub)
+
+    def _drop(self, sub):
+        sub.dropped = True
+        self._subscribers.discard(sub)
+        self.dropped += 1
+
+    def stats(self):
+        return {
+            "subscribers": len(self._subscribers),
+            "queue_size": self.queue_size,
+            "history": len(self._history),
+            "last_event_id": self._last_id,
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped_subscribers": self.dropped,
+        }
@@ -0,0 +1,73 @@
+"""Chunked CSV / NDJSON encoders for the streaming export endpoints."""
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+
+from pydantic.json import decimal_encoder
+
+MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return decimal_encoder(value)  # a JSON number, as the list endpoints write it
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def encode_rows(rows, columns, fmt):
+    """Encodes a batch of tuple rows as CSV or NDJSON text."""
+    if fmt == "csv":
+        out = io.StringIO()
+        writer = csv.writer(out)
+        writer.writerows(
+            [v.isoformat() if isinstance(v, (date, datetime)) else v for v in row] for row in rows
+        )
+        return out.getvalue()
+    return "".join(
+        json.dumps(dict(zip(columns, row)), default=_json_default, separators=(",", ":")) + "\n"
+        for row in rows
+    )
+
+
+def csv_header(columns):
+    out = io.StringIO()
+    csv.writer(out).writerow(columns)
+    return out.getvalue()
+
+
+async def stream_export(conn, sql, params, columns, fmt, gzip=False, chunk_rows=1000):
+    """
+    Yields the encoded export in chunks of `chunk_rows` rows.
+
+    The query runs on an unbuffered cursor, so rows are pulled from the
+    server as they are encoded and memory stays flat regardless of table
+    size. `conn` stays the caller's: it is in use until the generator
+    finishes or is closed, and the caller returns it after that.
+    """
+    compressor = zlib.compressobj(wbits=31) if gzip else None  # 31 = gzip container
+
+    def emit(text):
+        data = text.encode()
+        return compressor.compress(data) if compressor else data
+
+    cursor = await conn.cursor()
+    try:
+        await cursor.execute(sql, params)
+        if fmt == "csv":
+            yield emit(csv_header(columns))
+        while True:
+            rows = await cursor.fetchmany(chunk_rows)
+            if not rows:
+                break
+            chunk = emit(encode_rows(rows, columns, fmt))
+            if chunk:
+                yield chunk
+    finally:
+        await cursor.close()
+    if compressor:
+        yield compressor.flush()
@@ -6,7 +6,10 @@ CREATE TABLE IF NOT EXISTS Guests (
     id_proof_type VARCHAR(50),
     id_proof_number VARCHAR(50) UNIQUE,
     address TEXT,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    -- phone_number without punctuation, for guest search (migration 9)
+    phone_digits VARCHAR(15) AS (REGEXP_REPLACE(phone_number, '[^0-9]', '')) STORED,
+    version INT NOT NULL DEFAULT 0           -- bumped by every booking (migration 10)
 );
 
 
@@ -16,7 +19,8 @@ CREATE TABLE IF NOT EXISTS Rooms (
     room_type VARCHAR(50) NOT NULL,         -- e.g. Single, Double, AC, Non-AC
     monthly_rent DECIMAL(10,2) NOT NULL,
     occupancy_status ENUM('Available', 'Occupied', 'Maintenance') DEFAULT 'Available',
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    version INT NOT NULL DEFAULT 0           -- bumped by every booking (migration 6)
 );
 
 CREATE TABLE IF NOT EXISTS Bookings (
@@ -64,4 +68,58 @@ CREATE TABLE IF NOT EXISTS MaintenanceRequests (
     
     FOREIGN KEY (room_id) REFERENCES Rooms(room_id) ON DELETE CASCADE,
     FOREIGN KEY (guest_id) REFERENCES Guests(guest_id) ON DELETE SET NULL
-);
\ No newline at end of file
+);
+
+-- Secondary indexes (migrations 2, 3, 5 and 6 in app/migrations.py; the app skips
+-- indexes that already exist)
+CREATE INDEX idx_payments_date ON Payments (payment_date, payment_id);
+CREATE INDEX idx_maintenance_reported ON MaintenanceRequests (reported_date, request_id);
+CREATE INDEX idx_maintenance_status ON MaintenanceRequests (status, reported_date, request_id);
+CREATE INDEX idx_bookings_status ON Bookings (booking_status, booking_id);
+CREATE INDEX idx_rooms_status ON Rooms (occupancy_status, room_id);
+CREATE INDEX idx_bookings_room_dates ON Bookings (room_id, check_in_date, check_out_date);
+CREATE INDEX idx_bookings_guest_dates ON Bookings (guest_id, check_in_date, check_out_date);
+CREATE INDEX idx_guests_name ON Guests (full_name);
+CREATE FULLTEXT INDEX ft_guests_name ON Guests (full_name);
+CREATE INDEX idx_guests_phone_digits ON Guests (phone_digits);
+
+-- Report rollups (migration 4; kept current by the API, rebuilt with
+-- `python -m app.rollups rebuild`)
+CREATE TABLE IF NOT EXISTS RevenueMonthly (
+    month_start DATE NOT NULL,
+    payment_method ENUM('Cash', 'UPI', 'Card', 'Bank Transfer') NOT NULL,
+    payment_count INT NOT NULL DEFAULT 0,
+    total_amount DECIMAL(14,2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (month_start, payment_method)
+);
+CREATE TABLE IF NOT EXISTS RoomNightsDaily (
+    stay_date DATE NOT NULL,
+    room_type VARCHAR(50) NOT NULL,
+    room_nights INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (stay_date, room_type)
+);
+
+-- Per-booking ledger behind the balance endpoints (migration 7; kept current
+-- by the API, paid totals rebuilt with `python -m app.dues rebuild`)
+CREATE TABLE IF NOT EXISTS BookingLedger (
+    booking_id INT PRIMARY KEY,
+    monthly_rent DECIMAL(10,2),              -- rent when booked; NULL uses the room's
+    amount_paid DECIMAL(14,2) NOT NULL DEFAULT 0,
+    payment_count INT NOT NULL DEFAULT 0,
+    last_payment_date DATE,
+    FOREIGN KEY (booking_id) REFERENCES Bookings(booking_id) ON DELETE CASCADE
+);
+
+-- Archive tables (migration 8): same columns and indexes as the live tables,
+-- no foreign keys. Filled by `python -m app.archive run`.
+CREATE TABLE IF NOT EXISTS PaymentsArchive LIKE Payments;
+CREATE TABLE IF NOT EXISTS BookingsArchive LIKE Bookings;
+CREATE TABLE IF NOT EXISTS MaintenanceRequestsArchive LIKE MaintenanceRequests;
+
+-- Per archived table, the cutoff rows were moved before (set before any row moves)
+CREATE TABLE IF NOT EXISTS ArchiveState (
+    table_name VARCHAR(64) PRIMARY KEY,
+    archived_before DATE NOT NULL,
+    rows_archived BIGINT NOT NULL DEFAULT 0,
+    last_run_at TIMESTAMP NULL
+);
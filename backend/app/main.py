@@ -1,139 +1,337 @@
+import math
 import os
-from fastapi import FastAPI, HTTPException, Depends
+import re
+import time
+from contextlib import AsyncExitStack, asynccontextmanager
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel, Field
+from starlette.background import BackgroundTask
 import mysql.connector
-from mysql.connector import Error
+import mysql.connector.aio
+from mysql.connector import Error, errorcode
 from dotenv import load_dotenv
-from typing import List, Optional
-from datetime import date, datetime
-from decimal import Decimal
+from typing import Dict, List, Optional
+from datetime import date, datetime, timedelta, timezone
+from decimal import ROUND_HALF_UP, Decimal
 from enum import Enum
 
+from app.admission import AdmissionControl, Overloaded, RateLimiter
+from app.archive import reaches_archive, status as archive_status
+from app.availability import covers, find_available_rooms, find_conflicts, find_guest_conflicts
+from app.bulk import detect_format, insert_chunk, iter_records, row_params, validate
+from app.cache import CachedResponse, ResponseCache, etag_matches, make_etag
+from app.dues import add_booking_payments, booking_balance, open_ledger, overdue_page
+from app.events import TOPICS, EventHub
+from app.export import MEDIA_TYPES, stream_export
+from app.metrics import Metrics, MetricsMiddleware, instrument_connection
+from app.migrations import ensure_schema
+from app.pagination import build_page_query, build_union_page_query, decode_cursor, encode_cursor, parse_fields
+from app.pool import AsyncConnectionPool, PoolTimeout
+from app.replicas import ReplicaRouter
+from app.retry import StaleWrite, retry_reason, run_transaction
+from app.rollups import add_payments, add_stay, month_start
+from app.search import GuestSearch
+from app.serialize import encode_rows
+from app.statements import cache_statements, statement_cursor
+
 # Load environment variables from .env file
 load_dotenv()
 
 # --- Database Configuration ---
+# Sessions run in UTC: created_at is stamped by the app (see row_timestamp)
+# and TIMESTAMP columns are read back in the session time zone
 DB_CONFIG = {
     'host': os.getenv('DB_HOST', 'localhost'),
     'port': int(os.getenv('DB_PORT', 3306)),
     'user': os.getenv('DB_USER', 'root'),
     'password': os.getenv('DB_PASSWORD', ''),
-    'database': os.getenv('DB_NAME', 'hostel_management_db')
+    'database': os.getenv('DB_NAME', 'hostel_management_db'),
+    'time_zone': '+00:00',
+}
+
+# Read replicas as "host[:port],host[:port]"; they share the primary's user,
+# password and database. GET requests read from them (see app/replicas.py).
+DB_REPLICA_CONFIGS = [
+    {**DB_CONFIG, 'host': host, 'port': int(port or DB_CONFIG['port'])}
+    for host, _, port in (item.strip().partition(':') for item in os.getenv('DB_REPLICAS', '').split(','))
+    if host
+]
+# Seconds a client's reads stay on the primary after it writes, and that a
+# replica whose checkout failed is left out of rotation
+DB_REPLICA_STICKY_SECONDS = float(os.getenv('DB_REPLICA_STICKY_SECONDS', 5))
+DB_REPLICA_RETRY_SECONDS = float(os.getenv('DB_REPLICA_RETRY_SECONDS', 30))
+
+# Connection pool sizing; overflow connections are closed when returned
+DB_POOL_CONFIG = {
+    'pool_size': int(os.getenv('DB_POOL_SIZE', 5)),
+    'max_overflow': int(os.getenv('DB_POOL_MAX_OVERFLOW', 10)),
+    'timeout': float(os.getenv('DB_POOL_TIMEOUT', 30)),
+    'recycle': int(os.getenv('DB_POOL_RECYCLE', 3600)),
+    'pre_ping': os.getenv('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes'),
+}
+
+# Admission control: at most `limit` requests use a database connection at once
+# (default the pool size + overflow, so a burst queues here rather than on the
+# pool; 0 disables), up to `queue_size` more wait `timeout` seconds for a turn,
+# the rest get 503 with Retry-After: `retry_after`
+ADMISSION_CONFIG = {
+    'limit': int(os.getenv('DB_MAX_CONCURRENCY', DB_POOL_CONFIG['pool_size'] + DB_POOL_CONFIG['max_overflow'])),
+    'queue_size': int(os.getenv('DB_QUEUE_SIZE', 50)),
+    'timeout': float(os.getenv('DB_QUEUE_TIMEOUT', 2)),
+    'retry_after': int(os.getenv('DB_RETRY_AFTER', 1)),
+}
+
+# Per-client-address token buckets (requests/second and burst) for GET and for
+# other requests; a rate of 0 leaves that kind unlimited. Over budget is 429.
+RATE_LIMIT_CONFIG = {
+    'read_rate': float(os.getenv('RATE_LIMIT_READ_RPS', 0)),
+    'read_burst': int(os.getenv('RATE_LIMIT_READ_BURST', 100)),
+    'write_rate': float(os.getenv('RATE_LIMIT_WRITE_RPS', 0)),
+    'write_burst': int(os.getenv('RATE_LIMIT_WRITE_BURST', 20)),
+}
+
+# Server-side prepared statements kept per pooled connection, least recently
+# used closed first (0 sends every statement as text; see app/statements.py)
+DB_STATEMENT_CACHE_SIZE = int(os.getenv('DB_STATEMENT_CACHE_SIZE', 0))
+
+# List endpoint page sizes (a cursor without a limit uses the default)
+DEFAULT_PAGE_SIZE = int(os.getenv('API_PAGE_SIZE', 100))
+MAX_PAGE_SIZE = int(os.getenv('API_MAX_PAGE_SIZE', 1000))
+
+# Rows per INSERT/commit in the bulk import endpoints
+BULK_CHUNK_SIZE = int(os.getenv('BULK_CHUNK_SIZE', 500))
+
+# Seconds before the in-process guest search index (used without FULLTEXT) is rebuilt
+SEARCH_INDEX_TTL = float(os.getenv('SEARCH_INDEX_TTL', 600))
+
+# Longest date range one occupancy report may cover
+MAX_REPORT_DAYS = int(os.getenv('MAX_REPORT_DAYS', 732))
+
+# Booking concurrency: "optimistic" checks the room and guest versions on write,
+# "pessimistic" locks both rows (SELECT ... FOR UPDATE) for the transaction.
+# Either way a deadlocked or stale booking is re-run up to BOOKING_ATTEMPTS times.
+BOOKING_LOCKING = os.getenv('BOOKING_LOCKING', 'optimistic').lower()
+BOOKING_ATTEMPTS = int(os.getenv('BOOKING_ATTEMPTS', 4))
+
+# Most maintenance requests one batch PATCH may move
+MAINTENANCE_BATCH_MAX = int(os.getenv('MAINTENANCE_BATCH_MAX', 500))
+
+# List endpoints encode tuple rows straight to JSON with orjson instead of
+# validating each row against the response model (opt-in)
+LIST_FAST_PATH = os.getenv('LIST_FAST_PATH', 'false').lower() in ('1', 'true', 'yes')
+
+# Rows fetched and encoded per chunk by the export endpoints
+EXPORT_CHUNK_ROWS = int(os.getenv('EXPORT_CHUNK_ROWS', 1000))
+
+# Read-through cache for the room and guest lists
+CACHE_CONFIG = {
+    'maxsize': int(os.getenv('CACHE_MAX_ENTRIES', 256)),
+    'ttl': float(os.getenv('CACHE_TTL', 30)),
+    'enabled': os.getenv('CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes'),
+}
+
+# Archival (python -m app.archive run): rows older than `after_days` move to the
+# archive tables, `batch` rows per transaction with `pause` seconds between batches
+ARCHIVE_CONFIG = {
+    'after_days': int(os.getenv('ARCHIVE_AFTER_DAYS', 730)),
+    'batch': int(os.getenv('ARCHIVE_BATCH_ROWS', 500)),
+    'pause': float(os.getenv('ARCHIVE_BATCH_PAUSE', 0.05)),
 }
 
+# Seconds a starting worker waits for another one to finish the schema migrations
+MIGRATION_LOCK_TIMEOUT = int(os.getenv('MIGRATION_LOCK_TIMEOUT', 60))
+
+# Change feed: per-subscriber queue bound, replayable history and keep-alive interval
+EVENTS_CONFIG = {
+    'queue_size': int(os.getenv('EVENTS_QUEUE_SIZE', 256)),
+    'history': int(os.getenv('EVENTS_HISTORY', 1024)),
+}
+EVENTS_HEARTBEAT = float(os.getenv('EVENTS_HEARTBEAT', 15))
+
+# Statements slower than this are logged to "app.slow_query" (0 disables the log)
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 0))
+
 # --- Database Connection ---
-def get_db_connection():
-    """Establishes and returns a database connection."""
+metrics = Metrics(slow_query_ms=SLOW_QUERY_MS)
+
+def connection_creator(config):
+    """Opens instrumented connections to `config`, with a statement cache if enabled."""
+    creator = instrument_connection(lambda: mysql.connector.aio.connect(**config), metrics)
+    if DB_STATEMENT_CACHE_SIZE > 0:
+        creator = cache_statements(creator, DB_STATEMENT_CACHE_SIZE, metrics)
+    return creator
+
+db_pool = AsyncConnectionPool(connection_creator(DB_CONFIG), **DB_POOL_CONFIG)
+
+replica_router = ReplicaRouter(
+    [(f"{config['host']}:{config['port']}", AsyncConnectionPool(connection_creator(config), **DB_POOL_CONFIG))
+     for config in DB_REPLICA_CONFIGS],
+    sticky_seconds=DB_REPLICA_STICKY_SECONDS,
+    retry_seconds=DB_REPLICA_RETRY_SECONDS,
+)
+
+admission = AdmissionControl(**ADMISSION_CONFIG, metrics=metrics)
+rate_limiter = RateLimiter(**RATE_LIMIT_CONFIG, metrics=metrics)
+
+async def acquire_primary():
     try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        return conn
+        return await db_pool.acquire()
+    except PoolTimeout as e:
+        metrics.db_errors.inc(("pool_timeout",))
+        print(f"Connection pool exhausted: {e}")
+        raise HTTPException(status_code=503, detail="Database connection pool exhausted",
+                            headers={"Retry-After": str(admission.retry_after)})
     except Error as e:
+        metrics.db_errors.inc(("connect",))
         print(f"Error connecting to MySQL: {e}")
-        # In a real app, you might want to handle this more gracefully
         raise HTTPException(status_code=500, detail="Database connection failed")
 
+@asynccontextmanager
+async def borrow_connection(read=False, client=None, shared=False):
+    """
+    Borrows a pooled connection and always returns it. With `read` it comes
+    from a replica when the router has a healthy one for `client` (see
+    ReplicaRouter.pick); a replica that cannot hand out a connection is
+    failed over to the primary. The borrow holds an admission slot; a
+    request that cannot get one is answered 503.
+    """
+    try:
+        await admission.acquire()
+    except Overloaded as e:
+        raise HTTPException(status_code=503, detail="Server busy, retry later",
+                            headers={"Retry-After": str(e.retry_after)})
+    try:
+        replica = replica_router.pick(client, shared) if read else None
+        conn = None
+        if replica is not None:
+            try:
+                conn = await replica.pool.acquire()
+            except (PoolTimeout, Error) as e:
+                metrics.db_errors.inc(("replica",))
+                print(f"Read replica {replica.name} unavailable, reading from the primary: {e}")
+                replica_router.failed(replica, e)
+        if conn is None:
+            conn = await acquire_primary()
+        try:
+            yield conn
+        finally:
+            await conn.close()
+    finally:
+        admission.release()
+
+def client_key(request):
+    """Identifies a client for read-your-writes: X-Client-Id, else its address."""
+    return request.headers.get("x-client-id") or peer_address(request)
+
+def peer_address(request):
+    """
+    The address the request came from, which the client cannot choose
+    (behind a reverse proxy, run uvicorn with --proxy-headers and
+    --forwarded-allow-ips so this is the original client's).
+    """
+    return request.client.host if request.client else ""
+
+def check_rate_limit(request):
+    """
+    Spends a token of the peer address's read (GET/HEAD) or write budget;
+    429 when it is empty. Not keyed on X-Client-Id, which a client could
+    vary to get a fresh bucket per request.
+    """
+    try:
+        rate_limiter.check(peer_address(request), "read" if request.method in ("GET", "HEAD") else "write")
+    except Overloaded as e:
+        raise HTTPException(status_code=429, detail="Rate limit exceeded, retry later",
+                            headers={"Retry-After": str(math.ceil(e.retry_after))})
+
+async def get_db_connection(request: Request):
+    """
+    Request dependency: a pooled connection for the lifetime of the request.
+    GET requests may read from a replica; other methods use the primary and
+    keep the client's reads on the primary until shortly after they finish.
+    The client's rate limit is checked first.
+    """
+    check_rate_limit(request)
+    client = client_key(request)
+    read = request.method in ("GET", "HEAD")
+    if not read:
+        replica_router.note_write(client)
+    try:
+        async with borrow_connection(read, client) as conn:
+            yield conn
+    finally:
+        if not read:
+            replica_router.note_write(client)
+
+response_cache = ResponseCache(**CACHE_CONFIG)
+guest_search = GuestSearch(ttl=SEARCH_INDEX_TTL)
+event_hub = EventHub(**EVENTS_CONFIG)
+# Filled in by on_startup and reported on /metrics
+startup_stats = {'startup_seconds': None, 'schema_version': None, 'migrations_applied': 0}
+
+# --- Write Helpers ---
+# Create/update handlers build their response from the validated input,
+# lastrowid and the values below instead of re-reading the row.
+
+def row_timestamp():
+    """
+    created_at for a new row, sent explicitly so the response needs no
+    re-SELECT. It is the app host's clock in UTC, matching the UTC session
+    time zone in DB_CONFIG, so hosts in any time zone agree; it assumes the
+    app hosts' clocks are kept in sync (NTP), as MySQL's own would be.
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)  # TIMESTAMP keeps whole seconds
+
+def money(value):
+    """Rounds to the DECIMAL(10,2) value MySQL will store."""
+    return value.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+_FK_COLUMN = re.compile(r"FOREIGN KEY \(`(\w+)`\)")
+
+def missing_reference(e):
+    """
+    For a foreign-key violation (errno 1452) returns the offending column,
+    or '' when the server message does not name it; None for other errors.
+    """
+    if e.errno != errorcode.ER_NO_REFERENCED_ROW_2:
+        return None
+    match = _FK_COLUMN.search(e.msg or "")
+    return match.group(1) if match else ""
+
 # --- Database Setup ---
-def setup_database():
-    """Ensures the database and all necessary tables are created."""
-    db_name = DB_CONFIG['database']
-    # Temporary config without a specific database to create it
+async def create_database():
+    """Creates the database on a connection that does not select it."""
     temp_config = DB_CONFIG.copy()
     temp_config.pop('database', None)
-
+    conn = await mysql.connector.aio.connect(**temp_config)
     try:
-        # Connect to MySQL server to create the database
-        conn = mysql.connector.connect(**temp_config)
-        cursor = conn.cursor()
-        cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{db_name}`")
-        cursor.close()
-        conn.close()
-
-        # Connect to the specific database to create tables
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        # SQL statements to create tables
-        table_creation_queries = [
-            """
-            CREATE TABLE IF NOT EXISTS Guests (
-                guest_id INT AUTO_INCREMENT PRIMARY KEY,
-                full_name VARCHAR(100) NOT NULL,
-                phone_number VARCHAR(15) UNIQUE NOT NULL,
-                email VARCHAR(100) UNIQUE,
-                id_proof_type VARCHAR(50),
-                id_proof_number VARCHAR(50) UNIQUE,
-                address TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            );
-            """,
-            """
-            CREATE TABLE IF NOT EXISTS Rooms (
-                room_id INT AUTO_INCREMENT PRIMARY KEY,
-                room_number VARCHAR(10) UNIQUE NOT NULL,
-                room_type VARCHAR(50) NOT NULL,
-                monthly_rent DECIMAL(10,2) NOT NULL,
-                occupancy_status ENUM('Available', 'Occupied', 'Maintenance') DEFAULT 'Available',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            );
-            """,
-            """
-            CREATE TABLE IF NOT EXISTS Bookings (
-                booking_id INT AUTO_INCREMENT PRIMARY KEY,
-                guest_id INT NOT NULL,
-                room_id INT NOT NULL,
-                check_in_date DATE NOT NULL,
-                check_out_date DATE,
-                booking_status ENUM('Active', 'Completed', 'Cancelled') DEFAULT 'Active',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (guest_id) REFERENCES Guests(guest_id) ON DELETE CASCADE,
-                FOREIGN KEY (room_id) REFERENCES Rooms(room_id) ON DELETE CASCADE
-            );
-            """,
-            """
-            CREATE TABLE IF NOT EXISTS Payments (
-                payment_id INT AUTO_INCREMENT PRIMARY KEY,
-                booking_id INT NOT NULL,
-                amount_paid DECIMAL(10,2) NOT NULL,
-                payment_date DATE NOT NULL,
-                payment_method ENUM('Cash', 'UPI', 'Card', 'Bank Transfer') NOT NULL,
-                remarks VARCHAR(255),
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (booking_id) REFERENCES Bookings(booking_id) ON DELETE CASCADE
-            );
-            """,
-            """
-            CREATE TABLE IF NOT EXISTS Users (
-                user_id INT AUTO_INCREMENT PRIMARY KEY,
-                username VARCHAR(50) UNIQUE NOT NULL,
-                password_hash VARCHAR(255) NOT NULL,
-                role ENUM('Admin', 'Staff') DEFAULT 'Staff',
-                last_login TIMESTAMP NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            );
-            """,
-            """
-            CREATE TABLE IF NOT EXISTS MaintenanceRequests (
-                request_id INT AUTO_INCREMENT PRIMARY KEY,
-                room_id INT NOT NULL,
-                guest_id INT,
-                issue_description TEXT NOT NULL,
-                reported_date DATE NOT NULL DEFAULT (CURRENT_DATE),
-                status ENUM('Pending', 'In Progress', 'Resolved') DEFAULT 'Pending',
-                resolved_date DATE,
-                FOREIGN KEY (room_id) REFERENCES Rooms(room_id) ON DELETE CASCADE,
-                FOREIGN KEY (guest_id) REFERENCES Guests(guest_id) ON DELETE SET NULL
-            );
-            """
-        ]
-
-        for query in table_creation_queries:
-            cursor.execute(query)
-
-        conn.commit()
-        cursor.close()
-        conn.close()
-        print("Database and tables are set up successfully.")
+        cursor = await conn.cursor()
+        await cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{DB_CONFIG['database']}`")
+        await cursor.close()
+    finally:
+        await conn.close()
+
+async def setup_database():
+    """
+    Ensures the database exists and all migrations have been applied.
+    When it already is up to date this costs one pooled connection and one
+    query; the database is only created when connecting to it fails.
+    Returns (schema version, versions applied).
+    """
+    try:
+        try:
+            conn = await db_pool.acquire()
+        except Error as e:
+            if e.errno != errorcode.ER_BAD_DB_ERROR:
+                raise
+            await create_database()
+            conn = await db_pool.acquire()
+        try:
+            return await ensure_schema(conn, MIGRATION_LOCK_TIMEOUT)
+        finally:
+            await conn.close()
 
     except Error as e:
         print(f"Failed to set up database: {e}")
@@ -149,8 +347,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Retry-After"],
 )
 
+# Per-route latency, status codes and in-flight requests for /metrics
+app.add_middleware(MetricsMiddleware, metrics=metrics)
+
 
 # --- Pydantic Models (Data Schemas) ---
 
@@ -266,278 +468,1194 @@ class MaintenanceRequest(MaintenanceRequestBase):
     class Config:
         from_attributes = True
 
+class MaintenanceBatchUpdate(BaseModel):
+    request_ids: List[int] = Field(..., min_items=1, max_items=MAINTENANCE_BATCH_MAX)
+    status: MaintenanceStatus
+    resolved_date: Optional[date] = None
+
+# Dashboard Summary Models
+class MonthlyPaymentTotal(BaseModel):
+    month: str  # YYYY-MM
+    payment_count: int
+    total_amount: Decimal
+
+class MethodPaymentTotal(BaseModel):
+    payment_method: PaymentMethod
+    payment_count: int
+    total_amount: Decimal
+
+# Bulk Import Models
+class BulkRowStatus(str, Enum):
+    INSERTED = 'inserted'
+    INVALID = 'invalid'    # failed validation, never sent to the database
+    REJECTED = 'rejected'  # violated a database constraint
+
+class BulkRowResult(BaseModel):
+    row: int
+    status: BulkRowStatus
+    error: Optional[str] = None
+
+class BulkImportResult(BaseModel):
+    inserted: int
+    failed: int
+    results: List[BulkRowResult]
+
+class DashboardSummary(BaseModel):
+    total_guests: int
+    total_rooms: int
+    rooms_by_status: Dict[RoomStatus, int]
+    total_bookings: int
+    active_bookings: int
+    bookings_by_status: Dict[BookingStatus, int]
+    maintenance_by_status: Dict[MaintenanceStatus, int]
+    total_payments: int
+    total_payment_amount: Decimal
+    payments_by_month: List[MonthlyPaymentTotal]
+    payments_by_method: List[MethodPaymentTotal]
+
+# Report Models
+class RevenueMonth(BaseModel):
+    month: str  # YYYY-MM
+    payment_method: PaymentMethod
+    payment_count: int
+    total_amount: Decimal
+
+class RevenueReport(BaseModel):
+    payment_count: int  # all time
+    total_amount: Decimal  # all time
+    months: List[RevenueMonth]
+
+class OccupancyPoint(BaseModel):
+    period: str  # YYYY-MM-DD, or YYYY-MM with interval=month
+    room_type: str
+    room_nights: int
+    rooms: int
+    occupancy_rate: float
+
+# Dues Models
+class BookingBalance(BaseModel):
+    booking_id: int
+    guest_id: int
+    room_id: int
+    check_in_date: date
+    check_out_date: Optional[date] = None
+    booking_status: BookingStatus
+    monthly_rent: Decimal  # when booked
+    months_charged: int  # started months of the stay up to as_of
+    rent_due: Decimal
+    amount_paid: Decimal  # all payments recorded for the booking
+    payment_count: int
+    last_payment_date: Optional[date] = None
+    balance: Decimal  # rent_due - amount_paid; negative when paid ahead
+
+
+# --- List Helpers ---
+
+async def archive_for(conn, table, date_from, date_to):
+    """The archive table a list of `table` filtered on [date_from, date_to] must read too, or None."""
+    cursor = await statement_cursor(conn)
+    try:
+        return await reaches_archive(cursor, table, date_from, date_to)
+    finally:
+        await cursor.close()
+
+async def query_list_page(conn, table, model, order, filters, limit, cursor, fields, archive=None):
+    """
+    Runs a keyset-paginated, filtered and optionally projected list query.
+
+    Without `limit` or `cursor` the whole (filtered) table is returned, as
+    before. Otherwise at most `limit` rows come back along with the token
+    for the next page (None on the last page). With `archive` the rows of
+    that archive table are merged in.
+    """
+    key_columns = [column for column, _ in order]
+    try:
+        after = decode_cursor(cursor, len(key_columns)) if cursor else None
+        columns = parse_fields(fields, model.__fields__, key_columns) if fields else list(model.__fields__)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if cursor and limit is None:
+        limit = DEFAULT_PAGE_SIZE
+
+    if archive:
+        sql, params = build_union_page_query([table, archive], columns, order, filters, after, limit)
+    else:
+        sql, params = build_page_query(table, columns, order, filters, after, limit)
+    # The fast path keeps rows as tuples in `columns` order
+    db_cursor = await statement_cursor(conn, dictionary=not LIST_FAST_PATH)
+    await db_cursor.execute(sql, params)
+    rows = await db_cursor.fetchall()
+    await db_cursor.close()
+
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        last = dict(zip(columns, rows[-1])) if LIST_FAST_PATH else rows[-1]
+        next_cursor = encode_cursor([last[c] for c in key_columns])
+    return columns, rows, next_cursor
+
+def encode_list_body(columns, rows):
+    """
+    JSON body of a list page. The rows come straight from the model's
+    columns, so the fast path skips validation and encodes the tuples
+    directly; either way the bytes match a response_model round trip.
+    """
+    if LIST_FAST_PATH:
+        return encode_rows(columns, rows)
+    return JSONResponse(content=jsonable_encoder(rows)).body
+
+async def fetch_list_page(conn, response, table, model, order, filters, limit, cursor, fields, archive=None):
+    """query_list_page for handlers that return rows; sets X-Next-Cursor."""
+    columns, rows, next_cursor = await query_list_page(conn, table, model, order, filters, limit, cursor, fields,
+                                                       archive)
+    if LIST_FAST_PATH:
+        response = Response(content=encode_list_body(columns, rows), media_type="application/json")
+    elif fields:
+        # Partial rows cannot be validated against the full response model
+        response = JSONResponse(content=jsonable_encoder(rows))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return response if fields or LIST_FAST_PATH else rows
+
+async def cached_list_page(request, namespace, table, model, order, filters, limit, cursor, fields):
+    """
+    Read-through cached variant of fetch_list_page keyed on the query string.
+
+    The serialized body is cached together with its ETag, so a hit costs
+    neither a pooled connection nor serialization, and a client presenting
+    a matching If-None-Match gets 304 Not Modified.
+    """
+    check_rate_limit(request)
+    key = tuple(sorted(request.query_params.multi_items()))
+    entry = response_cache.get(namespace, key)
+    if entry is None:
+        generation = response_cache.generation(namespace)
+        # Cached pages are served to every client, so refills after a write read the primary
+        async with borrow_connection(read=True, client=client_key(request), shared=True) as conn:
+            columns, rows, next_cursor = await query_list_page(conn, table, model, order, filters, limit,
+                                                               cursor, fields)
+        body = encode_list_body(columns, rows)
+        headers = {"ETag": make_etag(body), "Cache-Control": "no-cache"}
+        if next_cursor:
+            headers["X-Next-Cursor"] = next_cursor
+        entry = CachedResponse(body, headers["ETag"], headers)
+        response_cache.set(namespace, key, entry, generation)
+
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers=entry.headers)
+    return Response(content=entry.body, media_type="application/json", headers=entry.headers)
+
 
 # --- API Endpoints ---
 
 @app.get("/")
-def read_root():
+async def read_root():
     return {"message": "Welcome to the Hostel Management API"}
 
+@app.get("/api/pool/stats")
+async def get_pool_stats():
+    """Connection pool usage: in-use, idle, wait times and checkout failures."""
+    return db_pool.stats()
+
+@app.get("/api/replicas/stats")
+async def get_replica_stats():
+    """Read routing: replica health and pools, and reads kept on the primary by reason."""
+    return replica_router.stats()
+
+@app.get("/api/admission/stats")
+async def get_admission_stats():
+    """Admission control (in flight, queue depth, rejections) and rate limit counters."""
+    return {'admission': admission.stats(), 'rate_limits': rate_limiter.stats()}
+
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    """Read-through cache hit/miss counters."""
+    return response_cache.stats()
+
+@app.get("/api/archive/stats")
+async def get_archive_stats(conn=Depends(get_db_connection)):
+    """Per archived table: the cutoff rows were moved before, rows moved so far and the last run."""
+    cursor = await conn.cursor(dictionary=True)
+    try:
+        return await archive_status(cursor)
+    finally:
+        await cursor.close()
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Request, SQL, pool and cache metrics in the Prometheus text format."""
+    pool = db_pool.stats()
+    cache = response_cache.stats()
+    events = event_hub.stats()
+    routing = replica_router.stats()
+    admitted = admission.stats()
+    extra = {
+        'db_pool_connections_in_use': ('gauge', "Connections checked out of the pool.", pool['in_use']),
+        'db_pool_connections_idle': ('gauge', "Idle pooled connections.", pool['idle']),
+        'db_pool_checkout_failures_total': ('counter', "Checkouts that timed out or failed to connect.",
+                                            pool['checkout_failures']),
+        'db_pool_wait_seconds_max': ('gauge', "Longest wait for a pooled connection.",
+                                     pool['wait_time_max_ms'] / 1000),
+        'db_replicas_healthy': ('gauge', "Read replicas in rotation.",
+                                sum(r['healthy'] for r in routing['replicas'])),
+        'db_replica_reads_total': ('counter', "Reads served by a replica.",
+                                   sum(r['reads'] for r in routing['replicas'])),
+        'db_primary_fallback_reads_total': ('counter', "Reads sent to the primary while replicas are configured.",
+                                            sum(routing['primary_reads'].values())),
+        'db_admission_in_flight': ('gauge', "Requests holding an admission slot.", admitted['in_flight']),
+        'db_admission_queue_depth': ('gauge', "Requests waiting for an admission slot.", admitted['queue_depth']),
+        'db_admission_queue_depth_max': ('gauge', "Deepest the admission queue has been.",
+                                         admitted['max_queue_depth']),
+        'response_cache_entries': ('gauge', "Entries in the response cache.", cache['entries']),
+        'response_cache_hits_total': ('counter', "Response cache hits.", cache['hits']),
+        'response_cache_misses_total': ('counter', "Response cache misses.", cache['misses']),
+        'app_startup_seconds': ('gauge', "Time the startup hook took, schema check included.",
+                                startup_stats['startup_seconds'] or 0),
+        'schema_version': ('gauge', "Schema migration version found or applied at startup.",
+                           startup_stats['schema_version'] or 0),
+        'events_subscribers': ('gauge', "Open /api/events streams.", events['subscribers']),
+        'events_published_total': ('counter', "Change events published.", events['published']),
+        'events_dropped_subscribers_total': ('counter', "Event streams closed because their queue was full.",
+                                             events['dropped_subscribers']),
+    }
+    return Response(content=metrics.render(extra), media_type="text/plain; version=0.0.4")
+
+@app.get("/api/events/stats")
+async def get_event_stats():
+    """Change feed subscribers, published events and dropped slow consumers."""
+    return event_hub.stats()
+
+@app.get("/api/events")
+async def stream_events(
+    request: Request,
+    topics: Optional[str] = Query(None, description="Comma separated; all topics if omitted"),
+    last_event_id: Optional[int] = Query(None, description="Resume after this event id"),
+):
+    """
+    Server-sent events feed of writes. Each event is named after its topic
+    and carries `{"op": "created" | "updated", "row": {...}}`, or
+    `{"op": "reload"}` after a bulk import; a `reset` event means events
+    were missed and the client should reload everything.
+    """
+    wanted = [t.strip() for t in topics.split(",") if t.strip()] if topics else list(TOPICS)
+    unknown = sorted(set(wanted) - set(TOPICS))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown topics: {', '.join(unknown)}")
+    # EventSource sends the id of the last event it saw when it reconnects
+    header_id = request.headers.get("last-event-id")
+    if header_id and header_id.isdigit():
+        last_event_id = int(header_id)
+    # A new subscriber is told the current id, so that a reconnect resumes from it
+    opening = "retry: 2000\n" + (f"id: {event_hub.last_id}\n" if last_event_id is None else "") + "\n"
+    subscription = event_hub.subscribe(wanted, last_event_id)
+
+    async def frames():
+        try:
+            yield opening.encode()
+            while True:
+                frame = await subscription.get(EVENTS_HEARTBEAT)
+                if frame is not None:
+                    yield frame
+                elif subscription.dropped:
+                    break  # too slow: the client reconnects and replays from the history
+                else:
+                    yield b": keep-alive\n\n"
+        finally:
+            event_hub.unsubscribe(subscription)
+
+    return StreamingResponse(frames(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 # --- Guest Endpoints ---
 
 @app.get("/api/guests", response_model=List[Guest])
-def get_all_guests(conn=Depends(get_db_connection)):
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT * FROM Guests")
-    guests = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    return guests
+async def get_all_guests(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    return await cached_list_page(request, "guests", "Guests", Guest, [("guest_id", "ASC")],
+                                  [], limit, cursor, fields)
+
+@app.get("/api/guests/search", response_model=List[Guest])
+async def search_guests(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(20, ge=1, le=100),
+    conn=Depends(get_db_connection)
+):
+    """Guests matching a name, phone number or email prefix, best matches first."""
+    return await guest_search.search(conn, q.strip(), limit)
 
 @app.post("/api/guests", response_model=Guest, status_code=201)
-def create_guest(guest: GuestCreate, conn=Depends(get_db_connection)):
-    cursor = conn.cursor(dictionary=True)
+async def create_guest(guest: GuestCreate, conn=Depends(get_db_connection)):
+    cursor = await statement_cursor(conn, dictionary=True)
     try:
+        created_at = row_timestamp()
         sql = """
-        INSERT INTO Guests (full_name, phone_number, email, id_proof_type, id_proof_number, address)
-        VALUES (%s, %s, %s, %s, %s, %s)
+        INSERT INTO Guests (full_name, phone_number, email, id_proof_type, id_proof_number, address, created_at)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
         """
-        cursor.execute(sql, (
+        await cursor.execute(sql, (
             guest.full_name, guest.phone_number, guest.email,
-            guest.id_proof_type, guest.id_proof_number, guest.address
+            guest.id_proof_type, guest.id_proof_number, guest.address, created_at
         ))
-        conn.commit()
         guest_id = cursor.lastrowid
-        cursor.execute("SELECT * FROM Guests WHERE guest_id = %s", (guest_id,))
-        new_guest = cursor.fetchone()
-        return new_guest
+        await conn.commit()
+        response_cache.invalidate("guests")
+        created = {**guest.dict(), 'guest_id': guest_id, 'created_at': created_at}
+        event_hub.publish("guests", "created", created)
+        return created
     except mysql.connector.IntegrityError as e:
-        conn.rollback()
+        await conn.rollback()
         raise HTTPException(status_code=400, detail=f"Failed to create guest. Check unique constraints: {e}")
     finally:
-        cursor.close()
-        conn.close()
+        await cursor.close()
 
 # --- Room Endpoints ---
 
 @app.get("/api/rooms", response_model=List[Room])
-def get_all_rooms(conn=Depends(get_db_connection)):
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT * FROM Rooms")
-    rooms = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    return rooms
+async def get_all_rooms(
+    request: Request,
+    occupancy_status: Optional[RoomStatus] = None,
+    room_type: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    filters = []
+    if occupancy_status:
+        filters.append(("occupancy_status = %s", occupancy_status.value))
+    if room_type:
+        filters.append(("room_type = %s", room_type))
+    return await cached_list_page(request, "rooms", "Rooms", Room, [("room_id", "ASC")],
+                                  filters, limit, cursor, fields)
+
+@app.get("/api/rooms/availability", response_model=List[Room])
+async def get_available_rooms(
+    check_in: date,
+    check_out: Optional[date] = None,
+    room_type: Optional[str] = None,
+    conn=Depends(get_db_connection)
+):
+    """Rooms free for the whole stay [check_in, check_out); omit check_out for an open-ended stay."""
+    if check_out is not None and check_out <= check_in:
+        raise HTTPException(status_code=400, detail="check_out must be after check_in.")
+    return await find_available_rooms(conn, check_in, check_out, room_type)
 
 @app.post("/api/rooms", response_model=Room, status_code=201)
-def create_room(room: RoomCreate, conn=Depends(get_db_connection)):
-    cursor = conn.cursor(dictionary=True)
+async def create_room(room: RoomCreate, conn=Depends(get_db_connection)):
+    cursor = await statement_cursor(conn, dictionary=True)
     try:
+        created_at = row_timestamp()
+        monthly_rent = money(room.monthly_rent)
         sql = """
-        INSERT INTO Rooms (room_number, room_type, monthly_rent, occupancy_status)
-        VALUES (%s, %s, %s, %s)
+        INSERT INTO Rooms (room_number, room_type, monthly_rent, occupancy_status, created_at)
+        VALUES (%s, %s, %s, %s, %s)
         """
-        cursor.execute(sql, (
-            room.room_number, room.room_type, room.monthly_rent, room.occupancy_status.value
+        await cursor.execute(sql, (
+            room.room_number, room.room_type, monthly_rent, room.occupancy_status.value, created_at
         ))
-        conn.commit()
         room_id = cursor.lastrowid
-        cursor.execute("SELECT * FROM Rooms WHERE room_id = %s", (room_id,))
-        new_room = cursor.fetchone()
-        return new_room
+        await conn.commit()
+        response_cache.invalidate("rooms")
+        created = {**room.dict(), 'monthly_rent': monthly_rent, 'room_id': room_id, 'created_at': created_at}
+        event_hub.publish("rooms", "created", created)
+        return created
     except mysql.connector.IntegrityError as e:
-        conn.rollback()
+        await conn.rollback()
         raise HTTPException(status_code=400, detail=f"Failed to create room. Room number may already exist: {e}")
     finally:
-        cursor.close()
-        conn.close()
+        await cursor.close()
 
 # --- Booking Endpoints ---
 
 @app.get("/api/bookings", response_model=List[Booking])
-def get_all_bookings(conn=Depends(get_db_connection)):
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT * FROM Bookings")
-    bookings = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    return bookings
-
-@app.post("/api/bookings", response_model=Booking, status_code=201)
-def create_booking(booking: BookingCreate, conn=Depends(get_db_connection)):
-    cursor = conn.cursor(dictionary=True)
+async def get_all_bookings(
+    response: Response,
+    booking_status: Optional[BookingStatus] = None,
+    guest_id: Optional[int] = None,
+    room_id: Optional[int] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    conn=Depends(get_db_connection)
+):
+    """Bookings by booking_id; a check-in date range reaching past the archive cutoff adds archived ones."""
+    filters = []
+    if date_from:
+        filters.append(("check_in_date >= %s", date_from))
+    if date_to:
+        filters.append(("check_in_date <= %s", date_to))
+    if booking_status:
+        filters.append(("booking_status = %s", booking_status.value))
+    if guest_id is not None:
+        filters.append(("guest_id = %s", guest_id))
+    if room_id is not None:
+        filters.append(("room_id = %s", room_id))
+    archive = await archive_for(conn, "Bookings", date_from, date_to)
+    return await fetch_list_page(conn, response, "Bookings", Booking, [("booking_id", "ASC")],
+                                 filters, limit, cursor, fields, archive)
+
+def occupies_today(booking):
+    """True if `booking` holds its room today, so the room is flagged Occupied."""
+    return (booking.booking_status == BookingStatus.ACTIVE
+            and covers(booking.check_in_date, booking.check_out_date, date.today()))
+
+async def insert_booking(conn, booking):
+    """
+    One booking transaction. Runs again from the start on a deadlock, lock
+    wait timeout or StaleWrite (see create_booking), so it must not keep
+    state between runs.
+    """
+    cursor = await statement_cursor(conn, dictionary=True)
     try:
-        # Check if room is available
-        cursor.execute("SELECT occupancy_status FROM Rooms WHERE room_id = %s FOR UPDATE", (booking.room_id,))
-        room = cursor.fetchone()
+        # The room and the guest are both checked for overlapping stays, so
+        # both rows guard the booking. Pessimistic mode locks them for the
+        # whole transaction; the optimistic one reads them unlocked and
+        # checks their versions on write.
+        lock = " FOR UPDATE" if BOOKING_LOCKING == "pessimistic" else ""
+        await cursor.execute(f"SELECT r.occupancy_status, r.room_type, r.monthly_rent, r.version, "
+                             f"g.version AS guest_version FROM Rooms r "
+                             f"LEFT JOIN Guests g ON g.guest_id = %s WHERE r.room_id = %s{lock}",
+                             (booking.guest_id, booking.room_id))
+        room = await cursor.fetchone()
         if not room:
             raise HTTPException(status_code=404, detail=f"Room with id {booking.room_id} not found.")
-        if room['occupancy_status'] != 'Available':
-            raise HTTPException(status_code=409, detail=f"Room {booking.room_id} is not available.")
-            
+        if room['guest_version'] is None:
+            raise HTTPException(status_code=404, detail=f"Guest with id {booking.guest_id} not found.")
+
+        active = booking.booking_status == BookingStatus.ACTIVE
+        if active:
+            if room['occupancy_status'] == RoomStatus.MAINTENANCE.value:
+                raise HTTPException(status_code=409, detail=f"Room {booking.room_id} is under maintenance.")
+            conflicts = await find_conflicts(conn, booking.room_id, booking.check_in_date, booking.check_out_date)
+            if conflicts:
+                raise HTTPException(
+                    status_code=409,
+                    detail=f"Room {booking.room_id} is already booked for these dates "
+                           f"(booking {conflicts[0]['booking_id']}).",
+                )
+            stays = await find_guest_conflicts(conn, booking.guest_id, booking.check_in_date,
+                                               booking.check_out_date)
+            if stays:
+                raise HTTPException(
+                    status_code=409,
+                    detail=f"Guest {booking.guest_id} already has a booking for these dates "
+                           f"(booking {stays[0]['booking_id']}, room {stays[0]['room_id']}).",
+                )
+
+            # Every Active booking bumps the room and guest versions, so a
+            # concurrent booking of the same room, or for the same guest, that
+            # passed the checks above on the same version loses here. The
+            # status flag reflects today's occupancy; future stays leave it alone.
+            sql = "UPDATE Rooms SET version = version + 1"
+            params = []
+            if occupies_today(booking):
+                sql += ", occupancy_status = 'Occupied'"
+            sql += " WHERE room_id = %s"
+            params.append(booking.room_id)
+            if BOOKING_LOCKING != "pessimistic":
+                sql += " AND version = %s"
+                params.append(room['version'])
+            await cursor.execute(sql, params)
+            if cursor.rowcount != 1:
+                raise StaleWrite(f"Room {booking.room_id} is being booked concurrently; try again.")
+
+            sql = "UPDATE Guests SET version = version + 1 WHERE guest_id = %s"
+            params = [booking.guest_id]
+            if BOOKING_LOCKING != "pessimistic":
+                sql += " AND version = %s"
+                params.append(room['guest_version'])
+            await cursor.execute(sql, params)
+            if cursor.rowcount != 1:
+                raise StaleWrite(f"Guest {booking.guest_id} is being booked concurrently; try again.")
+
         # Create booking
+        created_at = row_timestamp()
         sql = """
-        INSERT INTO Bookings (guest_id, room_id, check_in_date, check_out_date, booking_status)
-        VALUES (%s, %s, %s, %s, %s)
+        INSERT INTO Bookings (guest_id, room_id, check_in_date, check_out_date, booking_status, created_at)
+        VALUES (%s, %s, %s, %s, %s, %s)
         """
-        cursor.execute(sql, (
+        await cursor.execute(sql, (
             booking.guest_id, booking.room_id, booking.check_in_date,
-            booking.check_out_date, booking.booking_status.value
+            booking.check_out_date, booking.booking_status.value, created_at
         ))
-        
-        # Update room status to Occupied
-        cursor.execute("UPDATE Rooms SET occupancy_status = 'Occupied' WHERE room_id = %s", (booking.room_id,))
-
-        conn.commit()
         booking_id = cursor.lastrowid
-        
-        cursor.execute("SELECT * FROM Bookings WHERE booking_id = %s", (booking_id,))
-        new_booking = cursor.fetchone()
-        return new_booking
+        await open_ledger(cursor, booking_id, room['monthly_rent'])
+        # Last before the commit: every booking of the room type locks these day rows
+        await add_stay(cursor, room['room_type'], booking.check_in_date, booking.check_out_date,
+                       booking.booking_status.value)
+
+        await conn.commit()
+        return {**booking.dict(), 'booking_id': booking_id, 'created_at': created_at}
+    finally:
+        await cursor.close()
 
+@app.post("/api/bookings", response_model=Booking, status_code=201)
+async def create_booking(booking: BookingCreate, conn=Depends(get_db_connection)):
+    if booking.check_out_date is not None and booking.check_out_date <= booking.check_in_date:
+        raise HTTPException(status_code=400, detail="check_out_date must be after check_in_date.")
+    try:
+        created = await run_transaction(
+            conn, lambda: insert_booking(conn, booking), attempts=BOOKING_ATTEMPTS,
+            on_retry=lambda reason: metrics.transaction_retries.inc(("booking", reason)),
+        )
+    except StaleWrite as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except mysql.connector.IntegrityError as e:
+        await conn.rollback()
+        column = missing_reference(e)
+        if column == 'room_id':
+            raise HTTPException(status_code=404, detail=f"Room with id {booking.room_id} not found.")
+        if column is not None:
+            # The room was just read, so an unknown guest is the likely culprit
+            raise HTTPException(status_code=404, detail=f"Guest with id {booking.guest_id} not found.")
+        raise HTTPException(status_code=400, detail=f"Database error: {e}")
     except mysql.connector.Error as e:
-        conn.rollback()
+        await conn.rollback()
+        if retry_reason(e):
+            raise HTTPException(status_code=503, detail="Booking contention; try again.",
+                                headers={"Retry-After": "1"})
         raise HTTPException(status_code=400, detail=f"Database error: {e}")
-    finally:
-        cursor.close()
-        conn.close()
+    response_cache.invalidate("rooms")
+    event_hub.publish("bookings", "created", created)
+    if occupies_today(booking):
+        event_hub.publish("rooms", "updated", {'room_id': booking.room_id, 'occupancy_status': 'Occupied'})
+    return created
 
 
 # --- Payment Endpoints ---
 
 @app.get("/api/payments", response_model=List[Payment])
-def get_all_payments(conn=Depends(get_db_connection)):
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT * FROM Payments ORDER BY payment_date DESC")
-    payments = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    return payments
+async def get_all_payments(
+    response: Response,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    payment_method: Optional[PaymentMethod] = None,
+    booking_id: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    conn=Depends(get_db_connection)
+):
+    """Payments, newest first; a date range reaching past the archive cutoff adds archived ones."""
+    filters = []
+    if date_from:
+        filters.append(("payment_date >= %s", date_from))
+    if date_to:
+        filters.append(("payment_date <= %s", date_to))
+    if payment_method:
+        filters.append(("payment_method = %s", payment_method.value))
+    if booking_id is not None:
+        filters.append(("booking_id = %s", booking_id))
+    archive = await archive_for(conn, "Payments", date_from, date_to)
+    return await fetch_list_page(conn, response, "Payments", Payment,
+                                 [("payment_date", "DESC"), ("payment_id", "DESC")],
+                                 filters, limit, cursor, fields, archive)
 
 @app.post("/api/payments", response_model=Payment, status_code=201)
-def create_payment(payment: PaymentCreate, conn=Depends(get_db_connection)):
-    cursor = conn.cursor(dictionary=True)
+async def create_payment(payment: PaymentCreate, conn=Depends(get_db_connection)):
+    cursor = await statement_cursor(conn, dictionary=True)
     try:
-        # Check if booking exists
-        cursor.execute("SELECT booking_id FROM Bookings WHERE booking_id = %s", (payment.booking_id,))
-        booking = cursor.fetchone()
-        if not booking:
-            raise HTTPException(status_code=404, detail=f"Booking with id {payment.booking_id} not found.")
-        
-        # Create payment
+        # Create payment; the booking foreign key rejects unknown bookings
+        created_at = row_timestamp()
+        amount_paid = money(payment.amount_paid)
         sql = """
-        INSERT INTO Payments (booking_id, amount_paid, payment_date, payment_method, remarks)
-        VALUES (%s, %s, %s, %s, %s)
+        INSERT INTO Payments (booking_id, amount_paid, payment_date, payment_method, remarks, created_at)
+        VALUES (%s, %s, %s, %s, %s, %s)
         """
-        cursor.execute(sql, (
-            payment.booking_id, payment.amount_paid, payment.payment_date,
-            payment.payment_method.value, payment.remarks
+        await cursor.execute(sql, (
+            payment.booking_id, amount_paid, payment.payment_date,
+            payment.payment_method.value, payment.remarks, created_at
         ))
-        
-        conn.commit()
         payment_id = cursor.lastrowid
-        
-        cursor.execute("SELECT * FROM Payments WHERE payment_id = %s", (payment_id,))
-        new_payment = cursor.fetchone()
-        return new_payment
+        await add_booking_payments(cursor, [(payment.booking_id, payment.payment_date, amount_paid)])
+        # Last before the commit: every payment of the month and method locks this row
+        await add_payments(cursor, [(payment.payment_date, payment.payment_method.value, amount_paid)])
+        await conn.commit()
+        created = {**payment.dict(), 'amount_paid': amount_paid, 'payment_id': payment_id, 'created_at': created_at}
+        event_hub.publish("payments", "created", created)
+        return created
 
+    except mysql.connector.IntegrityError as e:
+        await conn.rollback()
+        if missing_reference(e) is not None:
+            raise HTTPException(status_code=404, detail=f"Booking with id {payment.booking_id} not found.")
+        raise HTTPException(status_code=400, detail=f"Database error: {e}")
     except mysql.connector.Error as e:
-        conn.rollback()
+        await conn.rollback()
         raise HTTPException(status_code=400, detail=f"Database error: {e}")
     finally:
-        cursor.close()
-        conn.close()
+        await cursor.close()
+
+
+# --- Dues Endpoints ---
+# Balances come from BookingLedger plus rent computed in the same query
+# (see app/dues.py); neither endpoint sums Payments.
+
+@app.get("/api/bookings/overdue", response_model=List[BookingBalance])
+async def get_overdue_bookings(
+    response: Response,
+    as_of: Optional[date] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    conn=Depends(get_db_connection)
+):
+    """Active bookings owing rent as of `as_of` (default today), in booking_id order."""
+    try:
+        after = decode_cursor(cursor, 1)[0] if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    db_cursor = await statement_cursor(conn, dictionary=True)
+    try:
+        rows = await overdue_page(db_cursor, as_of or date.today(), after, limit)
+    finally:
+        await db_cursor.close()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor([rows[-1]['booking_id']])
+    return rows
+
+@app.get("/api/bookings/{booking_id}/balance", response_model=BookingBalance)
+async def get_booking_balance(booking_id: int, as_of: Optional[date] = None, conn=Depends(get_db_connection)):
+    """Rent charged, paid and outstanding for one booking as of `as_of` (default today)."""
+    cursor = await statement_cursor(conn, dictionary=True)
+    try:
+        balance = await booking_balance(cursor, booking_id, as_of or date.today())
+    finally:
+        await cursor.close()
+    if balance is None:
+        raise HTTPException(status_code=404, detail=f"Booking with id {booking_id} not found.")
+    return balance
 
 
 # --- Maintenance Request Endpoints ---
 
 @app.get("/api/maintenance", response_model=List[MaintenanceRequest])
-def get_all_maintenance_requests(conn=Depends(get_db_connection)):
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT * FROM MaintenanceRequests ORDER BY reported_date DESC")
-    requests = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    return requests
+async def get_all_maintenance_requests(
+    response: Response,
+    status: Optional[MaintenanceStatus] = None,
+    room_id: Optional[int] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    conn=Depends(get_db_connection)
+):
+    """Requests, newest first; a reported date range reaching past the archive cutoff adds archived ones."""
+    filters = []
+    if date_from:
+        filters.append(("reported_date >= %s", date_from))
+    if date_to:
+        filters.append(("reported_date <= %s", date_to))
+    if status:
+        filters.append(("status = %s", status.value))
+    if room_id is not None:
+        filters.append(("room_id = %s", room_id))
+    archive = await archive_for(conn, "MaintenanceRequests", date_from, date_to)
+    return await fetch_list_page(conn, response, "MaintenanceRequests", MaintenanceRequest,
+                                 [("reported_date", "DESC"), ("request_id", "DESC")],
+                                 filters, limit, cursor, fields, archive)
 
 @app.post("/api/maintenance", response_model=MaintenanceRequest, status_code=201)
-def create_maintenance_request(request: MaintenanceRequestCreate, conn=Depends(get_db_connection)):
-    cursor = conn.cursor(dictionary=True)
+async def create_maintenance_request(request: MaintenanceRequestCreate, conn=Depends(get_db_connection)):
+    cursor = await statement_cursor(conn, dictionary=True)
     try:
-        # Check if room exists
-        cursor.execute("SELECT room_id FROM Rooms WHERE room_id = %s", (request.room_id,))
-        room = cursor.fetchone()
-        if not room:
-            raise HTTPException(status_code=404, detail=f"Room with id {request.room_id} not found.")
-        
-        # Check if guest exists (if provided)
-        if request.guest_id:
-            cursor.execute("SELECT guest_id FROM Guests WHERE guest_id = %s", (request.guest_id,))
-            guest = cursor.fetchone()
-            if not guest:
-                raise HTTPException(status_code=404, detail=f"Guest with id {request.guest_id} not found.")
-        
-        # Create maintenance request
+        # Create maintenance request; the room and guest foreign keys reject unknown ids
         sql = """
         INSERT INTO MaintenanceRequests (room_id, guest_id, issue_description, reported_date, status, resolved_date)
         VALUES (%s, %s, %s, %s, %s, %s)
         """
-        cursor.execute(sql, (
+        await cursor.execute(sql, (
             request.room_id, request.guest_id, request.issue_description,
             request.reported_date, request.status.value, request.resolved_date
         ))
         
-        conn.commit()
         request_id = cursor.lastrowid
-        
-        cursor.execute("SELECT * FROM MaintenanceRequests WHERE request_id = %s", (request_id,))
-        new_request = cursor.fetchone()
-        return new_request
+        await conn.commit()
+        created = {**request.dict(), 'request_id': request_id}
+        event_hub.publish("maintenance", "created", created)
+        return created
+
+    except mysql.connector.IntegrityError as e:
+        await conn.rollback()
+        column = missing_reference(e)
+        if column == 'guest_id':
+            raise HTTPException(status_code=404, detail=f"Guest with id {request.guest_id} not found.")
+        if column == 'room_id':
+            raise HTTPException(status_code=404, detail=f"Room with id {request.room_id} not found.")
+        if column is not None:
+            raise HTTPException(status_code=404, detail=f"Room with id {request.room_id} or guest with id "
+                                                        f"{request.guest_id} not found.")
+        raise HTTPException(status_code=400, detail=f"Database error: {e}")
+    except mysql.connector.Error as e:
+        await conn.rollback()
+        raise HTTPException(status_code=400, detail=f"Database error: {e}")
+    finally:
+        await cursor.close()
+
+async def set_maintenance_status(conn, request_ids, status, resolved_date):
+    """
+    Moves `request_ids` to `status` in one transaction and returns the rows
+    that changed, in request_id order. Unknown ids abort the whole batch
+    with a 404.
+
+    The rooms of the changed requests are brought in line in the same pass:
+    an Available room with an In Progress request goes to Maintenance, and a
+    Maintenance room with none left goes back to Available. Occupied rooms
+    keep their status. Their version is bumped so an optimistic booking
+    that read the room before the change fails its version check.
+    """
+    ids = sorted(set(request_ids))
+    placeholders = ", ".join(["%s"] * len(ids))
+    cursor = await conn.cursor(dictionary=True)
+    try:
+        await cursor.execute(f"SELECT * FROM MaintenanceRequests WHERE request_id IN ({placeholders}) "
+                             "ORDER BY request_id FOR UPDATE", ids)
+        rows = await cursor.fetchall()
+        if len(rows) != len(ids):
+            missing = sorted(set(ids) - {row['request_id'] for row in rows})
+            raise HTTPException(status_code=404, detail=f"Maintenance requests not found: "
+                                                        f"{', '.join(map(str, missing))}.")
+
+        changed = [row for row in rows if row['status'] != status.value or row['resolved_date'] != resolved_date]
+        if not changed:
+            await conn.rollback()
+            return []
+
+        changed_ids = [row['request_id'] for row in changed]
+        await cursor.execute(
+            f"UPDATE MaintenanceRequests SET status = %s, resolved_date = %s "
+            f"WHERE request_id IN ({', '.join(['%s'] * len(changed_ids))})",
+            [status.value, resolved_date] + changed_ids,
+        )
+
+        room_ids = sorted({row['room_id'] for row in changed})
+        in_progress = ("EXISTS (SELECT 1 FROM MaintenanceRequests m "
+                       "WHERE m.room_id = Rooms.room_id AND m.status = 'In Progress')")
+        await cursor.execute(
+            f"UPDATE Rooms SET version = version + 1, occupancy_status = "
+            f"CASE WHEN {in_progress} THEN 'Maintenance' ELSE 'Available' END "
+            f"WHERE room_id IN ({', '.join(['%s'] * len(room_ids))}) "
+            f"AND ((occupancy_status = 'Available' AND {in_progress}) "
+            f"OR (occupancy_status = 'Maintenance' AND NOT {in_progress}))",
+            room_ids,
+        )
+        rooms = []
+        if cursor.rowcount > 0:
+            await cursor.execute(f"SELECT room_id, occupancy_status FROM Rooms "
+                                 f"WHERE room_id IN ({', '.join(['%s'] * len(room_ids))})", room_ids)
+            rooms = await cursor.fetchall()
+
+        await conn.commit()
+        updated = [{**row, 'status': status.value, 'resolved_date': resolved_date} for row in changed]
+        for row in updated:
+            event_hub.publish("maintenance", "updated", row)
+        if rooms:
+            response_cache.invalidate("rooms")
+            for room in rooms:
+                event_hub.publish("rooms", "updated", room)
+        return updated
 
     except mysql.connector.Error as e:
-        conn.rollback()
+        await conn.rollback()
         raise HTTPException(status_code=400, detail=f"Database error: {e}")
     finally:
-        cursor.close()
-        conn.close()
+        await cursor.close()
+
+@app.patch("/api/maintenance", response_model=List[MaintenanceRequest])
+async def update_maintenance_requests(update: MaintenanceBatchUpdate, conn=Depends(get_db_connection)):
+    """Moves many requests to one status; returns only the requests that changed."""
+    return await set_maintenance_status(conn, update.request_ids, update.status, update.resolved_date)
 
 @app.patch("/api/maintenance/{request_id}", response_model=MaintenanceRequest)
-def update_maintenance_request(
+async def update_maintenance_request(
     request_id: int,
     status: MaintenanceStatus,
     resolved_date: Optional[date] = None,
     conn=Depends(get_db_connection)
 ):
-    cursor = conn.cursor(dictionary=True)
+    changed = await set_maintenance_status(conn, [request_id], status, resolved_date)
+    if changed:
+        return changed[0]
+    # Already in that state: nothing was written, return the row as it is
+    cursor = await statement_cursor(conn, dictionary=True)
     try:
-        # Check if request exists
-        cursor.execute("SELECT * FROM MaintenanceRequests WHERE request_id = %s", (request_id,))
-        existing_request = cursor.fetchone()
-        if not existing_request:
-            raise HTTPException(status_code=404, detail=f"Maintenance request with id {request_id} not found.")
-        
-        # Update the request
-        sql = """
-        UPDATE MaintenanceRequests 
-        SET status = %s, resolved_date = %s
-        WHERE request_id = %s
-        """
-        cursor.execute(sql, (status.value, resolved_date, request_id))
-        
-        conn.commit()
-        
-        # Fetch and return the updated request
-        cursor.execute("SELECT * FROM MaintenanceRequests WHERE request_id = %s", (request_id,))
-        updated_request = cursor.fetchone()
-        return updated_request
+        await cursor.execute("SELECT * FROM MaintenanceRequests WHERE request_id = %s", (request_id,))
+        return await cursor.fetchone()
+    finally:
+        await cursor.close()
+
+
+# --- Bulk Import Endpoints ---
+
+async def run_bulk_import(request, conn, model, table, fmt, chunk_size, on_insert=None):
+    """
+    Validates rows from a JSON array, NDJSON or CSV body against `model` and
+    inserts them into `table` chunk by chunk, committing once per chunk.
+    Bad rows are reported individually instead of aborting the import.
+    `on_insert(cursor, records)` runs in each chunk's transaction with the
+    inserted rows as dicts.
+    """
+    columns = list(model.__fields__)
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+    results = []
+    chunk = []
+
+    async def inserted(cursor, rows):
+        await on_insert(cursor, [dict(zip(columns, params)) for params in rows])
+
+    async def flush():
+        failures = await insert_chunk(conn, sql, chunk, inserted if on_insert else None)
+        for row, _ in chunk:
+            if row in failures:
+                results.append({'row': row, 'status': BulkRowStatus.REJECTED, 'error': failures[row]})
+            else:
+                results.append({'row': row, 'status': BulkRowStatus.INSERTED})
+        chunk.clear()
 
+    try:
+        async for row, record in iter_records(request, detect_format(request.headers.get('content-type'), fmt)):
+            obj, error = validate(model, record)
+            if error:
+                results.append({'row': row, 'status': BulkRowStatus.INVALID, 'error': error})
+                continue
+            chunk.append((row, row_params(obj, columns)))
+            if len(chunk) >= chunk_size:
+                await flush()
+        if chunk:
+            await flush()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except mysql.connector.Error as e:
-        conn.rollback()
-        raise HTTPException(status_code=400, detail=f"Database error: {e}")
+        # Chunks committed before the failure are kept
+        raise HTTPException(status_code=400, detail=f"Database error after {len(results)} rows: {e}")
+    finally:
+        if results:
+            response_cache.invalidate(table.lower())
+            # Too many rows for deltas: subscribers reload the table
+            event_hub.publish(table.lower(), "reload")
+
+    results.sort(key=lambda r: r['row'])
+    inserted = sum(1 for r in results if r['status'] == BulkRowStatus.INSERTED)
+    return {'inserted': inserted, 'failed': len(results) - inserted, 'results': results}
+
+BULK_FORMAT = Query(None, regex="^(json|ndjson|csv)$", description="Overrides the Content-Type")
+BULK_CHUNK = Query(BULK_CHUNK_SIZE, ge=1, le=5000)
+
+@app.post("/api/guests/bulk", response_model=BulkImportResult)
+async def bulk_create_guests(
+    request: Request,
+    format: Optional[str] = BULK_FORMAT,
+    chunk_size: int = BULK_CHUNK,
+    conn=Depends(get_db_connection)
+):
+    return await run_bulk_import(request, conn, GuestCreate, "Guests", format, chunk_size)
+
+@app.post("/api/rooms/bulk", response_model=BulkImportResult)
+async def bulk_create_rooms(
+    request: Request,
+    format: Optional[str] = BULK_FORMAT,
+    chunk_size: int = BULK_CHUNK,
+    conn=Depends(get_db_connection)
+):
+    return await run_bulk_import(request, conn, RoomCreate, "Rooms", format, chunk_size)
+
+@app.post("/api/payments/bulk", response_model=BulkImportResult)
+async def bulk_create_payments(
+    request: Request,
+    format: Optional[str] = BULK_FORMAT,
+    chunk_size: int = BULK_CHUNK,
+    conn=Depends(get_db_connection)
+):
+    async def roll_up(cursor, payments):
+        await add_booking_payments(cursor, [(p['booking_id'], p['payment_date'], money(p['amount_paid']))
+                                            for p in payments])
+        await add_payments(cursor, [(p['payment_date'], p['payment_method'], money(p['amount_paid']))
+                                    for p in payments])
+    return await run_bulk_import(request, conn, PaymentCreate, "Payments", format, chunk_size, roll_up)
+
+
+# --- Export Endpoints ---
+
+PAYMENT_EXPORT_COLUMNS = ["payment_id", "booking_id", "amount_paid", "payment_date",
+                          "payment_method", "remarks", "created_at"]
+BOOKING_EXPORT_COLUMNS = ["booking_id", "guest_id", "room_id", "check_in_date",
+                          "check_out_date", "booking_status", "created_at"]
+
+async def export_response(request, table, columns, key, filters, fmt, gzip, date_from=None, date_to=None):
+    """
+    Builds a StreamingResponse that exports `table` ordered by `key`,
+    with its archived rows when [date_from, date_to] reaches them.
+
+    The export is rate limited like any read, and its connection (with its
+    admission slot) is held until the last chunk is sent or the client
+    goes away, so long exports count against the concurrency limit.
+    """
+    check_rate_limit(request)
+    stack = AsyncExitStack()
+    conn = await stack.enter_async_context(borrow_connection())
+    try:
+        archive = await archive_for(conn, table, date_from, date_to)
+    except BaseException:
+        await stack.aclose()
+        raise
+    where = " WHERE " + " AND ".join(fragment for fragment, _ in filters) if filters else ""
+    params = [value for _, value in filters]
+    sql = f"SELECT {', '.join(columns)} FROM {table}{where}"
+    if archive:
+        sql += f" UNION ALL SELECT {', '.join(columns)} FROM {archive}{where}"
+        params += params
+    sql += f" ORDER BY {key}"
+
+    body = stream_export(conn, sql, params, columns, fmt, gzip, EXPORT_CHUNK_ROWS)
+
+    async def finish():
+        # Runs once the response is over, even if the client went away
+        # mid-stream or before it started: closes the cursor, then the borrow.
+        try:
+            await body.aclose()
+        finally:
+            await stack.aclose()
+
+    filename = f"{table.lower()}.{fmt}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        body,
+        media_type="application/gzip" if gzip else MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+        background=BackgroundTask(finish),
+    )
+
+@app.get("/api/payments/export")
+async def export_payments(
+    request: Request,
+    format: str = Query("csv", regex="^(csv|ndjson)$"),
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    gzip: bool = False,
+):
+    """Streams Payments as CSV or NDJSON, optionally gzipped."""
+    filters = []
+    if date_from:
+        filters.append(("payment_date >= %s", date_from))
+    if date_to:
+        filters.append(("payment_date <= %s", date_to))
+    return await export_response(request, "Payments", PAYMENT_EXPORT_COLUMNS, "payment_id", filters, format,
+                                 gzip, date_from, date_to)
+
+@app.get("/api/bookings/export")
+async def export_bookings(
+    request: Request,
+    format: str = Query("csv", regex="^(csv|ndjson)$"),
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    booking_status: Optional[BookingStatus] = None,
+    gzip: bool = False,
+):
+    """Streams Bookings (filtered on check_in_date) as CSV or NDJSON, optionally gzipped."""
+    filters = []
+    if date_from:
+        filters.append(("check_in_date >= %s", date_from))
+    if date_to:
+        filters.append(("check_in_date <= %s", date_to))
+    if booking_status:
+        filters.append(("booking_status = %s", booking_status.value))
+    return await export_response(request, "Bookings", BOOKING_EXPORT_COLUMNS, "booking_id", filters, format,
+                                 gzip, date_from, date_to)
+
+
+# --- Dashboard Endpoints ---
+
+@app.get("/api/dashboard/summary", response_model=DashboardSummary)
+async def get_dashboard_summary(
+    months: int = Query(12, ge=1, le=120),
+    conn=Depends(get_db_connection)
+):
+    """Dashboard counters and payment totals computed with GROUP BY queries."""
+    cursor = await conn.cursor(dictionary=True)
+
+    async def counts_by(table, column, statuses):
+        await cursor.execute(f"SELECT {column} AS status, COUNT(*) AS n FROM {table} GROUP BY {column}")
+        counts = {s.value: 0 for s in statuses}
+        for row in await cursor.fetchall():
+            if row['status'] is not None:
+                counts[row['status']] = row['n']
+        return counts
+
+    await cursor.execute("SELECT COUNT(*) AS n FROM Guests")
+    total_guests = (await cursor.fetchone())['n']
+    rooms_by_status = await counts_by("Rooms", "occupancy_status", RoomStatus)
+    bookings_by_status = await counts_by("Bookings", "booking_status", BookingStatus)
+    maintenance_by_status = await counts_by("MaintenanceRequests", "status", MaintenanceStatus)
+
+    # Payment figures come from the RevenueMonthly rollup, not from Payments
+    await cursor.execute("""
+        SELECT month_start, SUM(payment_count) AS payment_count, SUM(total_amount) AS total_amount
+        FROM RevenueMonthly
+        GROUP BY month_start
+        ORDER BY month_start DESC
+        LIMIT %s
+    """, (months,))
+    payments_by_month = [
+        {
+            'month': row['month_start'].strftime('%Y-%m'),
+            'payment_count': row['payment_count'],
+            'total_amount': row['total_amount'],
+        }
+        for row in await cursor.fetchall()
+    ]
+
+    await cursor.execute("""
+        SELECT payment_method, SUM(payment_count) AS payment_count, SUM(total_amount) AS total_amount
+        FROM RevenueMonthly
+        GROUP BY payment_method
+    """)
+    payments_by_method = await cursor.fetchall()
+    await cursor.close()
+
+    return {
+        'total_guests': total_guests,
+        'total_rooms': sum(rooms_by_status.values()),
+        'rooms_by_status': rooms_by_status,
+        'total_bookings': sum(bookings_by_status.values()),
+        'active_bookings': bookings_by_status[BookingStatus.ACTIVE.value],
+        'bookings_by_status': bookings_by_status,
+        'maintenance_by_status': maintenance_by_status,
+        'total_payments': sum(row['payment_count'] for row in payments_by_method),
+        'total_payment_amount': sum((row['total_amount'] for row in payments_by_method), Decimal('0')),
+        'payments_by_month': payments_by_month,
+        'payments_by_method': payments_by_method,
+    }
+
+
+# --- Report Endpoints ---
+# Both read only the rollup tables (see app/rollups.py), so their cost
+# depends on the range asked for, not on how many payments or bookings exist.
+
+@app.get("/api/reports/revenue", response_model=RevenueReport)
+async def get_revenue_report(
+    months: int = Query(12, ge=1, le=120),
+    payment_method: Optional[PaymentMethod] = None,
+    conn=Depends(get_db_connection)
+):
+    """Payment count and total per month and method for the last `months` months, plus all-time totals."""
+    since = month_start(date.today())
+    for _ in range(months - 1):
+        since = month_start(since - timedelta(days=1))
+    method_filter = " AND payment_method = %s" if payment_method else ""
+    method_params = [payment_method.value] if payment_method else []
+
+    cursor = await conn.cursor(dictionary=True)
+    try:
+        await cursor.execute(
+            "SELECT COALESCE(SUM(payment_count), 0) AS payment_count, "
+            "COALESCE(SUM(total_amount), 0) AS total_amount FROM RevenueMonthly"
+            + method_filter.replace(" AND", " WHERE"),
+            method_params,
+        )
+        totals = await cursor.fetchone()
+        await cursor.execute(
+            "SELECT month_start, payment_method, payment_count, total_amount FROM RevenueMonthly "
+            "WHERE month_start >= %s" + method_filter + " ORDER BY month_start DESC, payment_method",
+            [since] + method_params,
+        )
+        rows = await cursor.fetchall()
+    finally:
+        await cursor.close()
+
+    return {
+        'payment_count': totals['payment_count'],
+        'total_amount': totals['total_amount'],
+        'months': [
+            {
+                'month': row['month_start'].strftime('%Y-%m'),
+                'payment_method': row['payment_method'],
+                'payment_count': row['payment_count'],
+                'total_amount': row['total_amount'],
+            }
+            for row in rows
+        ],
+    }
+
+@app.get("/api/reports/occupancy", response_model=List[OccupancyPoint])
+async def get_occupancy_report(
+    date_from: date,
+    date_to: date,
+    interval: str = Query("day", regex="^(day|month)$"),
+    room_type: Optional[str] = None,
+    conn=Depends(get_db_connection)
+):
+    """
+    Occupied room-nights and occupancy rate per day (or month) and room type.
+    The rate is measured against the rooms that exist now.
+    """
+    if date_to < date_from:
+        raise HTTPException(status_code=400, detail="date_to must not be before date_from.")
+    if (date_to - date_from).days >= MAX_REPORT_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range is limited to {MAX_REPORT_DAYS} days.")
+    type_filter = " AND room_type = %s" if room_type else ""
+    type_params = [room_type] if room_type else []
+
+    cursor = await conn.cursor(dictionary=True)
+    try:
+        await cursor.execute(
+            "SELECT room_type, COUNT(*) AS rooms FROM Rooms" + type_filter.replace(" AND", " WHERE")
+            + " GROUP BY room_type",
+            type_params,
+        )
+        rooms = {row['room_type']: row['rooms'] for row in await cursor.fetchall()}
+        await cursor.execute(
+            "SELECT stay_date, room_type, room_nights FROM RoomNightsDaily "
+            "WHERE stay_date >= %s AND stay_date <= %s" + type_filter,
+            [date_from, date_to] + type_params,
+        )
+        nights = {(row['stay_date'], row['room_type']): row['room_nights'] for row in await cursor.fetchall()}
     finally:
-        cursor.close()
-        conn.close()
+        await cursor.close()
+
+    room_types = sorted(set(rooms) | {t for _, t in nights})
+    points = {}  # (period, room_type) -> [room_nights, capacity in room-nights]
+    day = date_from
+    while day <= date_to:
+        period = day.isoformat() if interval == "day" else day.strftime('%Y-%m')
+        for t in room_types:
+            point = points.setdefault((period, t), [0, 0])
+            point[0] += nights.get((day, t), 0)
+            point[1] += rooms.get(t, 0)
+        day += timedelta(days=1)
+
+    return [
+        {
+            'period': period,
+            'room_type': t,
+            'room_nights': room_nights,
+            'rooms': rooms.get(t, 0),
+            'occupancy_rate': round(room_nights / capacity, 4) if capacity else 0.0,
+        }
+        for (period, t), (room_nights, capacity) in points.items()
+    ]
 
 
 # --- Startup Event ---
 @app.on_event("startup")
-def on_startup():
+async def on_startup():
     """Function to run on application startup."""
     print("Application is starting up...")
+    started = time.perf_counter()
     try:
-        setup_database()
+        version, applied = await setup_database()
+        startup_stats['schema_version'] = version
+        startup_stats['migrations_applied'] = len(applied)
     except Exception as e:
         print(f"An error occurred during startup: {e}")
         # Depending on the severity, you might want to exit the application
         # import sys
         # sys.exit(1)
+    startup_stats['startup_seconds'] = time.perf_counter() - started
+    print(f"Startup finished in {startup_stats['startup_seconds'] * 1000:.0f} ms "
+          f"(schema version {startup_stats['schema_version']}, "
+          f"{startup_stats['migrations_applied']} migration(s) applied)")
@@ -0,0 +1,275 @@
+"""
+Request and SQL metrics, rendered in the Prometheus text exposition format.
+
+MetricsMiddleware records latency and status code per route template
+(e.g. /api/maintenance/{request_id}), so label cardinality stays bounded
+no matter which ids clients ask for. Connections from a creator wrapped by
+instrument_connection() time every cursor.execute and count fetched rows
+per statement label ("SELECT Rooms", "INSERT Guests", ...).
+"""
+import logging
+import re
+import time
+from collections import defaultdict
+
+# Upper bounds (seconds) of the latency histogram buckets
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+slow_query_log = logging.getLogger("app.slow_query")
+
+_STATEMENT_TABLE = re.compile(r"\b(?:FROM|INTO|UPDATE|TABLE|EXISTS)\s+`?(\w+)", re.IGNORECASE)
+
+
+def statement_label(sql):
+    """Short, low-cardinality label for a statement: verb plus first table."""
+    words = sql.split(None, 1)
+    if not words:
+        return "EMPTY"
+    verb = words[0].upper()
+    match = _STATEMENT_TABLE.search(sql)
+    return f"{verb} {match.group(1)}" if match else verb
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values, extra=""):
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a tuple of label values."""
+
+    def __init__(self, name, help_text, label_names, buckets):
+        self.name = name
+        self.help = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}  # labels -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, labels, value):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+        series[-2] += 1
+        series[-1] += value
+
+    def count(self):
+        """Observations across all label sets."""
+        return sum(series[-2] for series in self._series.values())
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, series in sorted(self._series.items()):
+            for bound, count in zip(self.buckets, series):
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {count}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {series[-2]}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {series[-2]}")
+        return lines
+
+
+class Counter:
+    """Monotonic counter keyed by a tuple of label values."""
+
+    kind = "counter"
+
+    def __init__(self, name, help_text, label_names):
+        self.name = name
+        self.help = help_text
+        self.label_names = label_names
+        self._values = defaultdict(int)
+
+    def inc(self, labels, amount=1):
+        self._values[labels] += amount
+
+    def value(self, labels):
+        return self._values.get(labels, 0)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(self.label_names, labels)} {value}")
+        return lines
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, labels, amount=1):
+        self._values[labels] -= amount
+
+
+class Metrics:
+    """
+    Process-wide registry. Pass `slow_query_ms` > 0 to log every statement
+    slower than that many milliseconds to the "app.slow_query" logger.
+    """
+
+    def __init__(self, slow_query_ms=0):
+        self.slow_query_ms = slow_query_ms
+        self.requests = Counter("http_requests_total", "HTTP responses by route and status code.",
+                                ("method", "route", "status"))
+        self.request_seconds = Histogram("http_request_duration_seconds",
+                                         "Time from request start to the last response byte.",
+                                         ("method", "route"), REQUEST_BUCKETS)
+        self.in_flight = Gauge("http_requests_in_flight", "Requests currently being served.", ("method",))
+        self.query_seconds = Histogram("db_query_duration_seconds", "Time spent in cursor.execute.",
+                                       ("statement",), QUERY_BUCKETS)
+        self.query_rows = Counter("db_query_rows_total", "Rows fetched from result sets.", ("statement",))
+        self.query_errors = Counter("db_query_errors_total", "Statements that raised an error.",
+                                    ("statement",))
+        self.slow_queries = Counter("db_slow_queries_total",
+                                    "Statements slower than the slow-query threshold.", ("statement",))
+        self.db_errors = Counter("db_connection_errors_total",
+                                 "Failed connection checkouts by reason.", ("reason",))
+        self.transaction_retries = Counter("db_transaction_retries_total",
+                                           "Transactions re-run after a deadlock, lock wait timeout "
+                                           "or stale optimistic write.", ("transaction", "reason"))
+        self.prepared_statements = Counter("db_prepared_statements_total",
+                                           "Prepared statement cache lookups by result (hit, prepare, evict).",
+                                           ("result",))
+        self.requests_rejected = Counter("http_requests_rejected_total",
+                                         "Requests turned away before reaching the database, by reason "
+                                         "(queue_full, queue_timeout, read_rate_limit, write_rate_limit).",
+                                         ("reason",))
+
+    def observe_query(self, sql, seconds, failed=False):
+        label = statement_label(sql)
+        self.query_seconds.observe((label,), seconds)
+        if failed:
+            self.query_errors.inc((label,))
+        if self.slow_query_ms and seconds * 1000 >= self.slow_query_ms:
+            self.slow_queries.inc((label,))
+            slow_query_log.warning("slow query (%.1f ms): %s", seconds * 1000, " ".join(sql.split()))
+        return label
+
+    def render(self, extra=None):
+        """
+        The exposition text. `extra` maps further metric names to
+        (type, help text, value), for values owned elsewhere such as pool stats.
+        """
+        lines = []
+        for metric in (self.requests, self.request_seconds, self.in_flight, self.query_seconds,
+                       self.query_rows, self.query_errors, self.slow_queries, self.db_errors,
+                       self.transaction_retries, self.prepared_statements, self.requests_rejected):
+            lines.extend(metric.render())
+        for name, (kind, help_text, value) in (extra or {}).items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f"{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing each HTTP request until its response completes."""
+
+    def __init__(self, app, metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+        self.metrics.in_flight.inc((method,))
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.metrics.in_flight.dec((method,))
+            # The router stores the matched route in the scope; unmatched
+            # paths share one label instead of one series per URL.
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "(unmatched)"
+            self.metrics.requests.inc((method, path, str(status)))
+            self.metrics.request_seconds.observe((method, path), elapsed)
+
+
+# --- SQL instrumentation ---
+
+class InstrumentedCursor:
+    """Wraps an async cursor, timing execute() and counting fetched rows."""
+
+    def __init__(self, raw, metrics):
+        self._raw = raw
+        self._metrics = metrics
+        self._label = None
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    async def _timed(self, method, sql, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            result = await method(sql, *args, **kwargs)
+        except Exception:
+            self._label = self._metrics.observe_query(sql, time.perf_counter() - started, failed=True)
+            raise
+        self._label = self._metrics.observe_query(sql, time.perf_counter() - started)
+        return result
+
+    async def execute(self, sql, *args, **kwargs):
+        return await self._timed(self._raw.execute, sql, *args, **kwargs)
+
+    async def executemany(self, sql, *args, **kwargs):
+        return await self._timed(self._raw.executemany, sql, *args, **kwargs)
+
+    def _count(self, n):
+        if self._label and n:
+            self._metrics.query_rows.inc((self._label,), n)
+
+    async def fetchone(self):
+        row = await self._raw.fetchone()
+        self._count(row is not None)
+        return row
+
+    async def fetchmany(self, *args, **kwargs):
+        rows = await self._raw.fetchmany(*args, **kwargs)
+        self._count(len(rows))
+        return rows
+
+    async def fetchall(self):
+        rows = await self._raw.fetchall()
+        self._count(len(rows))
+        return rows
+
+
+class InstrumentedConnection:
+    """Wraps an async connection so every cursor it opens is instrumented."""
+
+    def __init__(self, raw, metrics):
+        self._raw = raw
+        self._metrics = metrics
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    async def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(await self._raw.cursor(*args, **kwargs), self._metrics)
+
+
+def instrument_connection(connect, metrics):
+    """Turns a connection coroutine function into one yielding instrumented connections."""
+    async def creator():
+        return InstrumentedConnection(await connect(), metrics)
+    return creator
@@ -0,0 +1,427 @@
+"""
+Versioned schema migrations.
+
+Each migration runs once, in order, and is recorded in the
+schema_migrations table. Add new schema changes as a new entry at the end
+of MIGRATIONS; never edit one that has already shipped.
+
+On startup ensure_schema() reads the recorded version with one query and
+only runs DDL when it is behind LATEST_VERSION. The upgrade itself runs
+under a named lock (GET_LOCK), so when several workers start together one
+applies the migrations and the others wait for it and find nothing to do.
+
+    python -m app.migrations status     # applied / pending versions
+    python -m app.migrations upgrade    # apply pending migrations
+    python -m app.migrations explain    # prove the hot queries use the indexes
+"""
+import asyncio
+import sys
+
+import mysql.connector
+from mysql.connector import errorcode
+
+from app.dues import rebuild as rebuild_ledger
+from app.pagination import build_page_query
+from app.rollups import rebuild as rebuild_rollups
+
+
+class Index:
+    """
+    CREATE INDEX step that is skipped when the index already exists.
+    `kind` may be "FULLTEXT" or "UNIQUE"; an `optional` index that the
+    server cannot build is reported and skipped instead of failing.
+    """
+
+    def __init__(self, table, name, columns, kind="", optional=False):
+        self.table = table
+        self.name = name
+        self.columns = columns
+        self.kind = kind
+        self.optional = optional
+
+    async def apply(self, cursor):
+        await cursor.execute(
+            "SELECT 1 FROM information_schema.statistics "
+            "WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s LIMIT 1",
+            (self.table, self.name),
+        )
+        if await cursor.fetchone():
+            return
+        kind = f"{self.kind} " if self.kind else ""
+        try:
+            await cursor.execute(f"CREATE {kind}INDEX {self.name} ON {self.table} ({', '.join(self.columns)})")
+        except mysql.connector.Error as e:
+            if not self.optional:
+                raise
+            print(f"Skipped optional index {self.name}: {e}")
+
+
+class Column:
+    """ADD COLUMN step that is skipped when the column already exists."""
+
+    def __init__(self, table, name, definition):
+        self.table = table
+        self.name = name
+        self.definition = definition
+
+    async def apply(self, cursor):
+        await cursor.execute(
+            "SELECT 1 FROM information_schema.columns "
+            "WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s LIMIT 1",
+            (self.table, self.name),
+        )
+        if await cursor.fetchone():
+            return
+        await cursor.execute(f"ALTER TABLE {self.table} ADD COLUMN {self.name} {self.definition}")
+
+
+class Backfill:
+    """Data step: awaits `fn(cursor)`, which must be safe to re-run."""
+
+    def __init__(self, fn):
+        self.fn = fn
+
+    async def apply(self, cursor):
+        await self.fn(cursor)
+
+
+MIGRATIONS = [
+    (1, "Initial tables", [
+        """
+        CREATE TABLE IF NOT EXISTS Guests (
+            guest_id INT AUTO_INCREMENT PRIMARY KEY,
+            full_name VARCHAR(100) NOT NULL,
+            phone_number VARCHAR(15) UNIQUE NOT NULL,
+            email VARCHAR(100) UNIQUE,
+            id_proof_type VARCHAR(50),
+            id_proof_number VARCHAR(50) UNIQUE,
+            address TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS Rooms (
+            room_id INT AUTO_INCREMENT PRIMARY KEY,
+            room_number VARCHAR(10) UNIQUE NOT NULL,
+            room_type VARCHAR(50) NOT NULL,
+            monthly_rent DECIMAL(10,2) NOT NULL,
+            occupancy_status ENUM('Available', 'Occupied', 'Maintenance') DEFAULT 'Available',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS Bookings (
+            booking_id INT AUTO_INCREMENT PRIMARY KEY,
+            guest_id INT NOT NULL,
+            room_id INT NOT NULL,
+            check_in_date DATE NOT NULL,
+            check_out_date DATE,
+            booking_status ENUM('Active', 'Completed', 'Cancelled') DEFAULT 'Active',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (guest_id) REFERENCES Guests(guest_id) ON DELETE CASCADE,
+            FOREIGN KEY (room_id) REFERENCES Rooms(room_id) ON DELETE CASCADE
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS Payments (
+            payment_id INT AUTO_INCREMENT PRIMARY KEY,
+            booking_id INT NOT NULL,
+            amount_paid DECIMAL(10,2) NOT NULL,
+            payment_date DATE NOT NULL,
+            payment_method ENUM('Cash', 'UPI', 'Card', 'Bank Transfer') NOT NULL,
+            remarks VARCHAR(255),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (booking_id) REFERENCES Bookings(booking_id) ON DELETE CASCADE
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS Users (
+            user_id INT AUTO_INCREMENT PRIMARY KEY,
+            username VARCHAR(50) UNIQUE NOT NULL,
+            password_hash VARCHAR(255) NOT NULL,
+            role ENUM('Admin', 'Staff') DEFAULT 'Staff',
+            last_login TIMESTAMP NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS MaintenanceRequests (
+            request_id INT AUTO_INCREMENT PRIMARY KEY,
+            room_id INT NOT NULL,
+            guest_id INT,
+            issue_description TEXT NOT NULL,
+            reported_date DATE NOT NULL DEFAULT (CURRENT_DATE),
+            status ENUM('Pending', 'In Progress', 'Resolved') DEFAULT 'Pending',
+            resolved_date DATE,
+            FOREIGN KEY (room_id) REFERENCES Rooms(room_id) ON DELETE CASCADE,
+            FOREIGN KEY (guest_id) REFERENCES Guests(guest_id) ON DELETE SET NULL
+        );
+        """
+    ]),
+    (2, "Indexes for list ordering, status filters and reports", [
+        Index("Payments", "idx_payments_date", ["payment_date", "payment_id"]),
+        Index("MaintenanceRequests", "idx_maintenance_reported", ["reported_date", "request_id"]),
+        Index("MaintenanceRequests", "idx_maintenance_status", ["status", "reported_date", "request_id"]),
+        Index("Bookings", "idx_bookings_status", ["booking_status", "booking_id"]),
+        Index("Rooms", "idx_rooms_status", ["occupancy_status", "room_id"]),
+    ]),
+    (3, "Index for booking date-range overlap checks", [
+        Index("Bookings", "idx_bookings_room_dates", ["room_id", "check_in_date", "check_out_date"]),
+    ]),
+    (4, "Revenue and room-night rollup tables", [
+        """
+        CREATE TABLE IF NOT EXISTS RevenueMonthly (
+            month_start DATE NOT NULL,
+            payment_method ENUM('Cash', 'UPI', 'Card', 'Bank Transfer') NOT NULL,
+            payment_count INT NOT NULL DEFAULT 0,
+            total_amount DECIMAL(14,2) NOT NULL DEFAULT 0,
+            PRIMARY KEY (month_start, payment_method)
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS RoomNightsDaily (
+            stay_date DATE NOT NULL,
+            room_type VARCHAR(50) NOT NULL,
+            room_nights INT NOT NULL DEFAULT 0,
+            PRIMARY KEY (stay_date, room_type)
+        );
+        """,
+        Backfill(rebuild_rollups),
+    ]),
+    (5, "Guest search indexes", [
+        Index("Guests", "idx_guests_name", ["full_name"]),
+        Index("Guests", "ft_guests_name", ["full_name"], kind="FULLTEXT", optional=True),
+    ]),
+    (6, "Room version for optimistic booking, guest overlap index", [
+        Column("Rooms", "version", "INT NOT NULL DEFAULT 0"),
+        Index("Bookings", "idx_bookings_guest_dates", ["guest_id", "check_in_date", "check_out_date"]),
+    ]),
+    (7, "Per-booking rent and payment ledger", [
+        """
+        CREATE TABLE IF NOT EXISTS BookingLedger (
+            booking_id INT PRIMARY KEY,
+            monthly_rent DECIMAL(10,2),
+            amount_paid DECIMAL(14,2) NOT NULL DEFAULT 0,
+            payment_count INT NOT NULL DEFAULT 0,
+            last_payment_date DATE,
+            FOREIGN KEY (booking_id) REFERENCES Bookings(booking_id) ON DELETE CASCADE
+        );
+        """,
+        Backfill(rebuild_ledger),
+    ]),
+    (8, "Archive tables for payments, finished bookings and resolved maintenance", [
+        # Same columns and indexes, no foreign keys; see app/archive.py.
+        # A column added to a live table must be added to its archive too.
+        "CREATE TABLE IF NOT EXISTS PaymentsArchive LIKE Payments",
+        "CREATE TABLE IF NOT EXISTS BookingsArchive LIKE Bookings",
+        "CREATE TABLE IF NOT EXISTS MaintenanceRequestsArchive LIKE MaintenanceRequests",
+        """
+        CREATE TABLE IF NOT EXISTS ArchiveState (
+            table_name VARCHAR(64) PRIMARY KEY,
+            archived_before DATE NOT NULL,
+            rows_archived BIGINT NOT NULL DEFAULT 0,
+            last_run_at TIMESTAMP NULL
+        );
+        """,
+    ]),
+    (9, "Normalized phone digits for guest search", [
+        Column("Guests", "phone_digits",
+               "VARCHAR(15) AS (REGEXP_REPLACE(phone_number, '[^0-9]', '')) STORED"),
+        Index("Guests", "idx_guests_phone_digits", ["phone_digits"]),
+    ]),
+    (10, "Guest version for optimistic booking", [
+        Column("Guests", "version", "INT NOT NULL DEFAULT 0"),
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+async def applied_versions(cursor):
+    await cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT PRIMARY KEY,
+            description VARCHAR(255) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    await cursor.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in await cursor.fetchall()}
+
+
+async def schema_version(cursor):
+    """Highest applied migration; 0 when schema_migrations does not exist yet."""
+    try:
+        await cursor.execute("SELECT MAX(version) FROM schema_migrations")
+    except mysql.connector.Error as e:
+        if e.errno != errorcode.ER_NO_SUCH_TABLE:
+            raise
+        return 0
+    return (await cursor.fetchone())[0] or 0
+
+
+async def ensure_schema(conn, lock_timeout=60):
+    """
+    Applies pending migrations unless the schema is already at (or, during
+    a rolling deploy, past) LATEST_VERSION. Returns (version, applied).
+    """
+    cursor = await conn.cursor()
+    try:
+        version = await schema_version(cursor)
+        # End the read's snapshot so the re-check under the lock sees
+        # migrations another worker committed in the meantime
+        await conn.commit()
+        if version >= LATEST_VERSION:
+            return version, []
+
+        await cursor.execute("SELECT GET_LOCK(CONCAT('schema_migrations:', DATABASE()), %s)", (lock_timeout,))
+        if (await cursor.fetchone())[0] != 1:
+            raise RuntimeError(f"Timed out after {lock_timeout}s waiting for the schema migration lock")
+        try:
+            applied = await migrate(conn)
+        finally:
+            await cursor.execute("SELECT RELEASE_LOCK(CONCAT('schema_migrations:', DATABASE()))")
+            await cursor.fetchone()
+        return LATEST_VERSION, applied
+    finally:
+        await cursor.close()
+
+
+async def migrate(conn, target=None):
+    """Applies every pending migration up to `target`. Returns the versions applied."""
+    cursor = await conn.cursor()
+    try:
+        done = await applied_versions(cursor)
+        applied = []
+        for version, description, steps in MIGRATIONS:
+            if version in done or (target is not None and version > target):
+                continue
+            # MySQL DDL commits implicitly, so each step is idempotent
+            # rather than relying on a rollback
+            for step in steps:
+                if isinstance(step, str):
+                    await cursor.execute(step)
+                else:
+                    await step.apply(cursor)
+            await cursor.execute(
+                "INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+                (version, description),
+            )
+            await conn.commit()
+            applied.append(version)
+            print(f"Applied migration {version}: {description}")
+        return applied
+    finally:
+        await cursor.close()
+
+
+# --- EXPLAIN checks ---
+
+def _page(table, order, filters=(), limit=100):
+    sql, params = build_page_query(table, ["*"], order, list(filters), None, limit)
+    return sql, params
+
+# (description, sql, params, index expected in EXPLAIN's `key`)
+EXPLAIN_CHECKS = [
+    ("payments list page",
+     *_page("Payments", [("payment_date", "DESC"), ("payment_id", "DESC")]), "idx_payments_date"),
+    ("payments date range",
+     *_page("Payments", [("payment_date", "DESC"), ("payment_id", "DESC")],
+            [("payment_date >= %s", "2024-01-01"), ("payment_date <= %s", "2024-01-31")]), "idx_payments_date"),
+    ("archived payments date range",
+     *_page("PaymentsArchive", [("payment_date", "DESC"), ("payment_id", "DESC")],
+            [("payment_date >= %s", "2022-01-01"), ("payment_date <= %s", "2022-01-31")]), "idx_payments_date"),
+    ("maintenance list page",
+     *_page("MaintenanceRequests", [("reported_date", "DESC"), ("request_id", "DESC")]),
+     "idx_maintenance_reported"),
+    ("maintenance by status",
+     *_page("MaintenanceRequests", [("reported_date", "DESC"), ("request_id", "DESC")],
+            [("status = %s", "Pending")]), "idx_maintenance_status"),
+    ("bookings by status",
+     *_page("Bookings", [("booking_id", "ASC")], [("booking_status = %s", "Active")]), "idx_bookings_status"),
+    ("rooms by status",
+     *_page("Rooms", [("room_id", "ASC")], [("occupancy_status = %s", "Available")]), "idx_rooms_status"),
+    ("booking overlap for a room",
+     "SELECT b.booking_id FROM Bookings b WHERE b.room_id = %s AND b.booking_status = 'Active' "
+     "AND (b.check_out_date IS NULL OR b.check_out_date > %s) AND b.check_in_date < %s",
+     [1, "2024-01-01", "2024-02-01"], "idx_bookings_room_dates"),
+    ("booking overlap for a guest",
+     "SELECT b.booking_id FROM Bookings b WHERE b.guest_id = %s AND b.booking_status = 'Active' "
+     "AND (b.check_out_date IS NULL OR b.check_out_date > %s) AND b.check_in_date < %s",
+     [1, "2024-01-01", "2024-02-01"], "idx_bookings_guest_dates"),
+    ("overdue bookings page",
+     "SELECT b.booking_id FROM Bookings b LEFT JOIN BookingLedger l ON l.booking_id = b.booking_id "
+     "WHERE b.booking_status = 'Active' AND b.booking_id > %s ORDER BY b.booking_id LIMIT 101",
+     [0], "idx_bookings_status"),
+    ("room counts by status",
+     "SELECT occupancy_status, COUNT(*) FROM Rooms GROUP BY occupancy_status", [], "idx_rooms_status"),
+    ("maintenance counts by status",
+     "SELECT status, COUNT(*) FROM MaintenanceRequests GROUP BY status", [], "idx_maintenance_status"),
+    ("booking counts by status",
+     "SELECT booking_status, COUNT(*) FROM Bookings GROUP BY booking_status", [], "idx_bookings_status"),
+    ("guest search by phone",
+     "SELECT * FROM Guests WHERE phone_digits LIKE %s ORDER BY phone_digits, guest_id LIMIT 20",
+     ["98765%"], "idx_guests_phone_digits"),
+]
+
+
+async def explain_checks(conn):
+    """
+    Runs EXPLAIN on every query in EXPLAIN_CHECKS and reports the index the
+    optimizer picked. A check fails when it picks another (or no) index, or
+    has to filesort a query whose ORDER BY the index should satisfy. On
+    near-empty tables MySQL may prefer a full scan, so run this against a
+    database with realistic data.
+    """
+    results = []
+    cursor = await conn.cursor(dictionary=True)
+    try:
+        for description, sql, params, expected in EXPLAIN_CHECKS:
+            await cursor.execute("EXPLAIN " + sql, params)
+            plan = (await cursor.fetchall())[0]
+            extra = plan.get("Extra") or ""
+            ok = plan.get("key") == expected and "filesort" not in extra
+            results.append({
+                "query": description,
+                "expected": expected,
+                "key": plan.get("key"),
+                "rows": plan.get("rows"),
+                "extra": extra,
+                "ok": ok,
+            })
+    finally:
+        await cursor.close()
+    return results
+
+
+async def _run(command):
+    import mysql.connector.aio
+    from app.main import DB_CONFIG
+
+    conn = await mysql.connector.aio.connect(**DB_CONFIG)
+    try:
+        if command == "upgrade":
+            applied = await migrate(conn)
+            print(f"Schema at version {LATEST_VERSION} ({len(applied)} migration(s) applied)")
+            return 0
+        if command == "status":
+            cursor = await conn.cursor()
+            done = await applied_versions(cursor)
+            await cursor.close()
+            for version, description, _ in MIGRATIONS:
+                print(f"{'applied' if version in done else 'pending':8} {version:4}  {description}")
+            return 0
+        if command == "explain":
+            results = await explain_checks(conn)
+            for r in results:
+                print(f"{'OK  ' if r['ok'] else 'FAIL'} {r['query']:32} key={r['key']} "
+                      f"(expected {r['expected']}) rows={r['rows']} {r['extra']}")
+            return 0 if all(r["ok"] for r in results) else 1
+        print(__doc__)
+        return 2
+    finally:
+        await conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(_run(sys.argv[1] if len(sys.argv) > 1 else "")))
@@ -0,0 +1,92 @@
+"""Keyset (cursor) pagination helpers shared by the list endpoints."""
+import base64
+import json
+from datetime import date, datetime
+
+
+def encode_cursor(values):
+    """Encodes the sort-key values of the last row into an opaque token."""
+    plain = [v.isoformat() if isinstance(v, (date, datetime)) else v for v in values]
+    raw = json.dumps(plain, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token, key_count):
+    """Decodes a token produced by encode_cursor. Raises ValueError if malformed."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+    if not isinstance(values, list) or len(values) != key_count:
+        raise ValueError("Invalid cursor: wrong number of key values")
+    return values
+
+
+def parse_fields(fields, allowed, required):
+    """
+    Turns a comma separated `fields=` value into a validated column list.
+    Columns in `required` (the sort keys) are always included.
+    """
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+    columns = list(required)
+    columns += [f for f in requested if f not in columns]
+    return columns
+
+
+def build_page_query(table, columns, order, filters, after=None, limit=None):
+    """
+    Builds a keyset-paginated SELECT.
+
+    `order` is a list of (column, direction) pairs sharing one direction,
+    ending in the primary key so that the ordering is total. `filters` is a
+    list of (sql_fragment, value) pairs ANDed together. `after` holds the key
+    values of the last row already returned. One extra row is requested so
+    the caller can tell whether another page exists.
+    """
+    where = []
+    params = []
+    for fragment, value in filters:
+        where.append(fragment)
+        params.append(value)
+
+    if after is not None:
+        op = "<" if order[0][1] == "DESC" else ">"
+        # (a, b) > (x, y)  ==>  a > x OR (a = x AND b > y); spelled out so
+        # MySQL can use a range scan on the composite index.
+        clauses = []
+        for i, (column, _) in enumerate(order):
+            parts = [f"{order[j][0]} = %s" for j in range(i)] + [f"{column} {op} %s"]
+            clauses.append("(" + " AND ".join(parts) + ")")
+            params.extend(after[:i + 1])
+        where.append("(" + " OR ".join(clauses) + ")")
+
+    sql = f"SELECT {', '.join(columns)} FROM {table}"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY " + ", ".join(f"{c} {d}" for c, d in order)
+    if limit is not None:
+        sql += " LIMIT %s"
+        params.append(limit + 1)
+    return sql, params
+
+
+def build_union_page_query(tables, columns, order, filters, after=None, limit=None):
+    """
+    build_page_query over several tables with the same columns (a live
+    table and its archive). Each one is paged on its own index and the
+    pages are merged, so no table is read past `limit` + 1 rows.
+    """
+    parts, params = [], []
+    for i, table in enumerate(tables):
+        sql, table_params = build_page_query(table, columns, order, filters, after, limit)
+        parts.append(f"SELECT * FROM ({sql}) t{i}")
+        params += table_params
+    sql = " UNION ALL ".join(parts) + " ORDER BY " + ", ".join(f"{c} {d}" for c, d in order)
+    if limit is not None:
+        sql += " LIMIT %s"
+        params.append(limit + 1)
+    return sql, params
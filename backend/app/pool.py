@@ -0,0 +1,200 @@
+"""Bounded connection pool used by the FastAPI dependencies in main.py."""
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection could be checked out within the pool timeout."""
+
+
+class _BasePool:
+    """
+    Pool bookkeeping, independent of how callers wait (the blocking pool
+    in benchmarks.async_load reuses it).
+
+    At most pool_size + max_overflow connections exist at once. Up to
+    pool_size connections are kept idle between requests; overflow
+    connections are closed as soon as they are returned. Idle connections
+    older than `recycle` seconds are replaced, and with `pre_ping` every
+    checkout verifies the server is still reachable before handing it out.
+    """
+
+    def __init__(self, creator, pool_size=5, max_overflow=10, timeout=30.0,
+                 recycle=3600, pre_ping=True):
+        self._creator = creator
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.pre_ping = pre_ping
+
+        self._idle = deque()  # (raw connection, created_at)
+        self._opened = 0
+        self._in_use = 0
+
+        self._checkouts = 0
+        self._checkout_failures = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+
+    def _can_checkout(self):
+        return bool(self._idle) or self._opened < self.pool_size + self.max_overflow
+
+    def _take(self):
+        """Pops an idle connection or reserves a slot for a new one (lock held)."""
+        self._in_use += 1
+        if self._idle:
+            return self._idle.pop()
+        self._opened += 1
+        return None, None
+
+    def _timed_out(self):
+        self._checkout_failures += 1
+        return PoolTimeout(f"No connection available within {self.timeout}s ({self._in_use} in use)")
+
+    def _checkout_failed(self):
+        self._opened -= 1
+        self._in_use -= 1
+        self._checkout_failures += 1
+
+    def _checked_out(self, started):
+        waited = time.monotonic() - started
+        self._checkouts += 1
+        self._wait_time_total += waited
+        self._wait_time_max = max(self._wait_time_max, waited)
+
+    def _put_back(self, raw, created_at, keep):
+        """Returns True if the connection was kept idle (lock held)."""
+        self._in_use -= 1
+        if keep and len(self._idle) < self.pool_size:
+            self._idle.append((raw, created_at))
+            return True
+        self._opened -= 1
+        return False
+
+    def _expired(self, created_at):
+        return self.recycle is not None and self.recycle >= 0 and time.monotonic() - created_at > self.recycle
+
+    def stats(self):
+        """Returns a snapshot of pool usage counters."""
+        checkouts = self._checkouts
+        return {
+            "pool_size": self.pool_size,
+            "max_overflow": self.max_overflow,
+            "opened": self._opened,
+            "in_use": self._in_use,
+            "idle": len(self._idle),
+            "checkouts": checkouts,
+            "checkout_failures": self._checkout_failures,
+            "wait_time_total_ms": round(self._wait_time_total * 1000, 3),
+            "wait_time_avg_ms": round(self._wait_time_total * 1000 / checkouts, 3) if checkouts else 0.0,
+            "wait_time_max_ms": round(self._wait_time_max * 1000, 3),
+        }
+
+
+class AsyncPooledConnection:
+    """Wraps a raw connection so that `await conn.close()` hands it back to the pool."""
+
+    def __init__(self, pool, raw, created_at):
+        self._pool = pool
+        self._raw = raw
+        self._created_at = created_at
+        self._returned = False
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    async def close(self):
+        """Returns the connection to the pool. Safe to call more than once."""
+        if not self._returned:
+            self._returned = True
+            await self._pool._release(self._raw, self._created_at)
+
+
+class AsyncConnectionPool(_BasePool):
+    """
+    Pool for mysql.connector.aio connections. `creator` is a coroutine
+    function returning a new connection. Waiting for a free connection
+    suspends the request instead of blocking a worker thread.
+    """
+
+    def __init__(self, creator, **kwargs):
+        super().__init__(creator, **kwargs)
+        self._cond = asyncio.Condition()
+
+    async def acquire(self):
+        """Checks out a connection, waiting up to `timeout` seconds."""
+        started = time.monotonic()
+        async with self._cond:
+            try:
+                await asyncio.wait_for(self._cond.wait_for(self._can_checkout), self.timeout)
+            except asyncio.TimeoutError:
+                raise self._timed_out()
+            raw, created_at = self._take()
+
+        try:
+            if raw is not None and not await self._is_usable(raw, created_at):
+                await self._close_quietly(raw)
+                raw = None
+            if raw is None:
+                raw = await self._creator()
+                created_at = time.monotonic()
+        except BaseException:
+            async with self._cond:
+                self._checkout_failed()
+                self._cond.notify()
+            raise
+
+        self._checked_out(started)
+        return AsyncPooledConnection(self, raw, created_at)
+
+    @asynccontextmanager
+    async def connection(self):
+        """Async context manager that always returns the connection to the pool."""
+        conn = await self.acquire()
+        try:
+            yield conn
+        finally:
+            await conn.close()
+
+    async def _release(self, raw, created_at):
+        keep = True
+        try:
+            # Never hand a half-finished transaction to the next request.
+            if raw.in_transaction:
+                await raw.rollback()
+        except Exception:
+            keep = False
+        async with self._cond:
+            kept = self._put_back(raw, created_at, keep)
+            self._cond.notify()
+        if not kept:
+            await self._close_quietly(raw)
+
+    async def _is_usable(self, raw, created_at):
+        if self._expired(created_at):
+            return False
+        if self.pre_ping:
+            try:
+                return await raw.is_connected()
+            except Exception:
+                return False
+        return True
+
+    @staticmethod
+    async def _close_quietly(raw):
+        try:
+            await raw.close()
+        except Exception:
+            pass
+
+    async def dispose(self):
+        """Closes every idle connection. Checked-out connections are unaffected."""
+        async with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._opened -= len(idle)
+        for raw, _ in idle:
+            await self._close_quietly(raw)
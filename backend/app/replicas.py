@@ -0,0 +1,107 @@
+"""
+Read/write splitting across a primary and read replicas.
+
+GET requests read from a replica, picked round-robin; everything else
+goes to the primary. Replication is asynchronous, so two cases read from
+the primary instead:
+
+- read-your-writes: a client that wrote in the last `sticky_seconds`
+  reads its own writes back from the primary;
+- shared results (the response cache): after anyone's write, a page that
+  every client will be served is refilled from the primary, so a lagging
+  replica cannot put pre-write rows back into the cache.
+
+Health is checked at checkout: the pool pings the connection (pre_ping)
+and opens new ones on demand, and a replica whose checkout fails is
+skipped for `retry_seconds`, its reads falling back to the primary. After
+that the next read tries it again.
+
+Stickiness is tracked per client (X-Client-Id header, else the client
+address) inside this process, like the response cache.
+"""
+import itertools
+import time
+
+
+class Replica:
+    def __init__(self, name, pool):
+        self.name = name
+        self.pool = pool
+        self.down_until = 0.0
+        self.reads = 0
+        self.failures = 0
+        self.last_error = None
+
+    def healthy(self, now):
+        return self.down_until <= now
+
+
+class ReplicaRouter:
+    """Picks the pool a read runs on. `replicas` is a list of (name, pool)."""
+
+    def __init__(self, replicas=(), sticky_seconds=5.0, retry_seconds=30.0, max_clients=10000):
+        self.replicas = [Replica(name, pool) for name, pool in replicas]
+        self.sticky_seconds = sticky_seconds
+        self.retry_seconds = retry_seconds
+        self.max_clients = max_clients
+        self._next = itertools.cycle(range(len(self.replicas))) if self.replicas else None
+        self._sticky = {}  # client -> monotonic time its reads may leave the primary
+        self._last_write = float("-inf")
+        self.primary_reads = {"sticky": 0, "fresh": 0, "failover": 0}
+
+    def note_write(self, client):
+        """Sends `client`'s reads, and shared reads, to the primary for `sticky_seconds`."""
+        if not self.replicas:
+            return
+        now = time.monotonic()
+        self._last_write = now
+        if len(self._sticky) >= self.max_clients:
+            self._sticky = {c: until for c, until in self._sticky.items() if until > now}
+        self._sticky[client] = now + self.sticky_seconds
+
+    def pick(self, client, shared=False):
+        """A healthy replica for this read, or None to read from the primary."""
+        if not self.replicas:
+            return None
+        now = time.monotonic()
+        if self._sticky.get(client, 0) > now:
+            self.primary_reads["sticky"] += 1
+            return None
+        if shared and now - self._last_write < self.sticky_seconds:
+            self.primary_reads["fresh"] += 1
+            return None
+        for _ in range(len(self.replicas)):
+            replica = self.replicas[next(self._next)]
+            if replica.healthy(now):
+                replica.reads += 1
+                return replica
+        self.primary_reads["failover"] += 1
+        return None
+
+    def failed(self, replica, error):
+        """Takes `replica` out of rotation for `retry_seconds` after a failed checkout."""
+        replica.reads -= 1
+        replica.failures += 1
+        replica.last_error = str(error)
+        replica.down_until = time.monotonic() + self.retry_seconds
+        self.primary_reads["failover"] += 1
+
+    def stats(self):
+        now = time.monotonic()
+        return {
+            "sticky_seconds": self.sticky_seconds,
+            "sticky_clients": sum(1 for until in self._sticky.values() if until > now),
+            "primary_reads": dict(self.primary_reads),
+            "replicas": [
+                {
+                    "name": r.name,
+                    "healthy": r.healthy(now),
+                    "retry_in_s": round(max(0.0, r.down_until - now), 3),
+                    "reads": r.reads,
+                    "failures": r.failures,
+                    "last_error": r.last_error,
+                    "pool": r.pool.stats(),
+                }
+                for r in self.replicas
+            ],
+        }
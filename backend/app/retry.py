@@ -0,0 +1,60 @@
+"""
+Re-running short transactions that lost a race.
+
+InnoDB rolls back one side of a deadlock (errno 1213) and gives up on a
+lock wait after innodb_lock_wait_timeout (errno 1205); in both cases the
+transaction can simply be run again from the start. Optimistic writers
+raise StaleWrite when a version check shows that another transaction got
+there first, and are retried the same way.
+"""
+import asyncio
+import random
+
+import mysql.connector
+from mysql.connector import errorcode
+
+RETRYABLE_ERRNOS = (errorcode.ER_LOCK_DEADLOCK, errorcode.ER_LOCK_WAIT_TIMEOUT)
+
+
+class StaleWrite(Exception):
+    """A conditional write matched no row because the row changed since it was read."""
+
+
+def retry_reason(e):
+    """'deadlock', 'lock_wait_timeout' or 'stale_write' if `e` is worth a retry, else None."""
+    if isinstance(e, StaleWrite):
+        return "stale_write"
+    if isinstance(e, mysql.connector.Error):
+        if e.errno == errorcode.ER_LOCK_DEADLOCK:
+            return "deadlock"
+        if e.errno == errorcode.ER_LOCK_WAIT_TIMEOUT:
+            return "lock_wait_timeout"
+    return None
+
+
+def backoff(attempt, base_delay, max_delay):
+    """Full-jitter exponential backoff: spreads retries so they do not collide again."""
+    return random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+async def run_transaction(conn, body, attempts=4, base_delay=0.01, max_delay=0.25, on_retry=None):
+    """
+    Awaits `body()`, which must run (and commit) one whole transaction on
+    `conn`. A retryable failure rolls back and runs it again after a backoff,
+    up to `attempts` runs in all; the last failure is re-raised. Other
+    exceptions propagate unchanged. `on_retry(reason)` is called before
+    each retry.
+    """
+    for attempt in range(attempts):
+        try:
+            return await body()
+        except (mysql.connector.Error, StaleWrite) as e:
+            reason = retry_reason(e)
+            if reason is None:
+                raise
+            await conn.rollback()
+            if attempt == attempts - 1:
+                raise
+            if on_retry:
+                on_retry(reason)
+            await asyncio.sleep(backoff(attempt, base_delay, max_delay))
@@ -0,0 +1,188 @@
+"""
+Rollup tables behind the report endpoints.
+
+RevenueMonthly holds payment count and total per (month, payment_method);
+RoomNightsDaily holds occupied room-nights per (day, room_type). Both are
+updated in the same transaction as the payment or booking that changes
+them, so reports read a few rollup rows instead of scanning history.
+The price is a hot row: every payment of a month and method updates the
+same RevenueMonthly row and holds its lock until it commits, so callers
+upsert rollups last, right before the commit.
+
+A stay occupies the nights [check_in_date, check_out_date); Cancelled
+bookings occupy nothing. Open-ended stays (no check_out_date) are counted
+up to today when booked, so run the rebuild daily to keep them accruing
+nights. The command reads archived payments and bookings too:
+
+    python -m app.rollups rebuild                       # everything
+    python -m app.rollups rebuild --from 2024-06-01     # from a date on
+"""
+import argparse
+import asyncio
+import sys
+from collections import Counter
+from datetime import date, timedelta
+from decimal import Decimal
+
+from app.archive import with_archive
+
+REVENUE_UPSERT = """
+    INSERT INTO RevenueMonthly (month_start, payment_method, payment_count, total_amount)
+    VALUES (%s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE payment_count = payment_count + VALUES(payment_count),
+                            total_amount = total_amount + VALUES(total_amount)
+"""
+
+ROOM_NIGHTS_UPSERT = """
+    INSERT INTO RoomNightsDaily (stay_date, room_type, room_nights)
+    VALUES (%s, %s, %s)
+    ON DUPLICATE KEY UPDATE room_nights = room_nights + VALUES(room_nights)
+"""
+
+# Booking statuses that hold a room for their nights
+OCCUPYING_STATUSES = ("Active", "Completed")
+
+BATCH_ROWS = 1000
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def next_month(day):
+    """First day of the month after the one containing `day`."""
+    return (day.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+def _where(conditions):
+    return " WHERE " + " AND ".join(conditions) if conditions else ""
+
+
+def stay_nights(check_in, check_out, today, date_from=None, date_to=None):
+    """Nights of the stay, clipped to [date_from, date_to] and, when open-ended, to today."""
+    last = check_out - timedelta(days=1) if check_out else today
+    if date_to and date_to < last:
+        last = date_to
+    day = max(check_in, date_from) if date_from else check_in
+    while day <= last:
+        yield day
+        day += timedelta(days=1)
+
+
+async def _upsert(cursor, sql, counts):
+    rows = [key + value for key, value in counts.items()]
+    for i in range(0, len(rows), BATCH_ROWS):
+        await cursor.executemany(sql, rows[i:i + BATCH_ROWS])
+
+
+async def add_payments(cursor, payments):
+    """Adds [(payment_date, payment_method, amount_paid), ...] to RevenueMonthly."""
+    counts = {}
+    for payment_date, method, amount in payments:
+        key = (month_start(payment_date), method)
+        count, total = counts.get(key, (0, Decimal("0")))
+        counts[key] = (count + 1, total + amount)
+    await _upsert(cursor, REVENUE_UPSERT, counts)
+
+
+async def add_stay(cursor, room_type, check_in, check_out, booking_status, today=None):
+    """Adds the nights of one booking to RoomNightsDaily."""
+    if booking_status not in OCCUPYING_STATUSES:
+        return
+    counts = {(day, room_type): (1,) for day in stay_nights(check_in, check_out, today or date.today())}
+    await _upsert(cursor, ROOM_NIGHTS_UPSERT, counts)
+
+
+async def rebuild(cursor, date_from=None, date_to=None, today=None, archived=False):
+    """
+    Recomputes both rollups from Payments and Bookings for the days in
+    [date_from, date_to] (either end may be open). Revenue is rebuilt for
+    every whole month the range touches. With `archived` the archive
+    tables (migration 8) are read as well. The caller commits; returns the
+    number of (revenue, room-night) rows written.
+    """
+    today = today or date.today()
+    payments = (with_archive("Payments", ["payment_date", "payment_method", "amount_paid"])
+                if archived else "Payments")
+    bookings = (with_archive("Bookings", ["room_id", "check_in_date", "check_out_date", "booking_status"])
+                if archived else "Bookings")
+
+    # Revenue: whole months overlapping the range
+    month_where, payment_where, params = [], [], []
+    if date_from:
+        month_where.append("month_start >= %s")
+        payment_where.append("payment_date >= %s")
+        params.append(month_start(date_from))
+    if date_to:
+        month_where.append("month_start < %s")
+        payment_where.append("payment_date < %s")
+        params.append(next_month(date_to))
+    await cursor.execute("DELETE FROM RevenueMonthly" + _where(month_where), params)
+    await cursor.execute(
+        "SELECT YEAR(payment_date), MONTH(payment_date), payment_method, COUNT(*), SUM(amount_paid) "
+        f"FROM {payments} p" + _where(payment_where)
+        + " GROUP BY YEAR(payment_date), MONTH(payment_date), payment_method",
+        params,
+    )
+    revenue = {(date(year, month, 1), method): (count, total)
+               for year, month, method, count, total in await cursor.fetchall()}
+    await _upsert(cursor, REVENUE_UPSERT, revenue)
+
+    # Room-nights: exactly the days in the range
+    where, params = [], []
+    if date_from:
+        where.append("stay_date >= %s")
+        params.append(date_from)
+    if date_to:
+        where.append("stay_date <= %s")
+        params.append(date_to)
+    await cursor.execute("DELETE FROM RoomNightsDaily" + _where(where), params)
+
+    sql = (f"SELECT r.room_type, b.check_in_date, b.check_out_date FROM {bookings} b "
+           "JOIN Rooms r ON r.room_id = b.room_id "
+           f"WHERE b.booking_status IN ({', '.join(['%s'] * len(OCCUPYING_STATUSES))})")
+    params = list(OCCUPYING_STATUSES)
+    if date_from:
+        sql += " AND (b.check_out_date IS NULL OR b.check_out_date > %s)"
+        params.append(date_from)
+    if date_to:
+        sql += " AND b.check_in_date <= %s"
+        params.append(date_to)
+    await cursor.execute(sql, params)
+    nights = Counter()
+    while True:
+        rows = await cursor.fetchmany(BATCH_ROWS)
+        if not rows:
+            break
+        for room_type, check_in, check_out in rows:
+            for day in stay_nights(check_in, check_out, today, date_from, date_to):
+                nights[(day, room_type)] += 1
+    await _upsert(cursor, ROOM_NIGHTS_UPSERT, {key: (n,) for key, n in nights.items()})
+    return len(revenue), len(nights)
+
+
+async def _run(argv):
+    import mysql.connector.aio
+    from app.main import DB_CONFIG
+
+    parser = argparse.ArgumentParser(prog="python -m app.rollups", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["rebuild"])
+    parser.add_argument("--from", dest="date_from", type=date.fromisoformat)
+    parser.add_argument("--to", dest="date_to", type=date.fromisoformat)
+    args = parser.parse_args(argv)
+
+    conn = await mysql.connector.aio.connect(**DB_CONFIG)
+    try:
+        cursor = await conn.cursor()
+        revenue, nights = await rebuild(cursor, args.date_from, args.date_to, archived=True)
+        await cursor.close()
+        await conn.commit()
+        print(f"Rebuilt {revenue} revenue row(s) and {nights} room-night row(s)")
+        return 0
+    finally:
+        await conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(_run(sys.argv[1:])))
@@ -0,0 +1,213 @@
+"""
+Guest search for the front desk: by name, phone number or email prefix.
+
+On MySQL with the ft_guests_name FULLTEXT index, name terms are matched
+with a boolean-mode prefix query ranked by relevance; phone and email
+queries use B-tree indexes with a LIKE 'prefix%' range. When the server
+has no FULLTEXT index on Guests, searches are answered from an in-process
+prefix index over every guest's name words, phone digits and email
+instead.
+
+Both match a phone query as a prefix of the number's digits, whatever the
+punctuation on either side: "+91 98765" and "9198765" find
+"+91 98765-43210", "98765" does not (it is not how that number starts).
+MySQL compares against the phone_digits column (migration 9), the
+fallback index against the same digits.
+"""
+import asyncio
+import bisect
+import re
+import time
+
+_WORD = re.compile(r"[^\W_]+")
+_BOOLEAN_OPERATORS = re.compile(r'[+\-<>()~*"@]')
+
+# InnoDB ignores full-text tokens shorter than innodb_ft_min_token_size (3)
+FULLTEXT_MIN_TOKEN = 3
+
+
+def classify(q):
+    """'phone', 'email' or 'name' for a search string."""
+    if "@" in q:
+        return "email"
+    if re.fullmatch(r"[\d\s()+\-]+", q):
+        return "phone"
+    return "name"
+
+
+def phone_digits(value):
+    return re.sub(r"\D", "", value or "")
+
+
+def _like_prefix(value):
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+class PrefixIndex:
+    """
+    Every guest's tokens in one sorted list, with the owning guest ids in a
+    parallel list. All tokens starting with a prefix form one contiguous
+    slice found by two bisects, so a lookup costs O(log n) plus the size of
+    the slice, however many guests are indexed.
+    """
+
+    def __init__(self):
+        self.rows = {}  # guest_id -> row
+        self._tokens = []
+        self._ids = []
+        self.max_id = 0
+
+    @staticmethod
+    def tokens(row):
+        tokens = {w.lower() for w in _WORD.findall(row["full_name"] or "")}
+        digits = phone_digits(row["phone_number"])
+        if digits:
+            tokens.add(digits)
+        if row["email"]:
+            tokens.add(row["email"].lower())
+        return tokens
+
+    def add(self, rows):
+        pairs = []
+        for row in rows:
+            self.rows[row["guest_id"]] = row
+            self.max_id = max(self.max_id, row["guest_id"])
+            pairs.extend((token, row["guest_id"]) for token in self.tokens(row))
+        if len(pairs) < 64:
+            for token, guest_id in pairs:
+                i = bisect.bisect_right(self._tokens, token)
+                self._tokens.insert(i, token)
+                self._ids.insert(i, guest_id)
+        else:
+            pairs.extend(zip(self._tokens, self._ids))
+            pairs.sort()
+            self._tokens = [token for token, _ in pairs]
+            self._ids = [guest_id for _, guest_id in pairs]
+
+    def _slice(self, prefix):
+        """[lo, hi) range of the tokens starting with `prefix`."""
+        lo = bisect.bisect_left(self._tokens, prefix)
+        return lo, bisect.bisect_left(self._tokens, prefix + "\U0010ffff", lo)
+
+    def search(self, q, limit):
+        """
+        Guests with a token starting with every term of `q`. Ranked by the
+        most selective term: exact token matches first, then the shortest
+        completions in alphabetical order, then guest_id. Stops after
+        `limit` hits, so broad prefixes like "a" stay cheap.
+        """
+        kind = classify(q)
+        if kind == "phone":
+            terms = [phone_digits(q)]
+        elif kind == "email":
+            terms = [q.strip().lower()]
+        else:
+            terms = [w.lower() for w in _WORD.findall(q)]
+        terms = [t for t in terms if t]
+        if not terms:
+            return []
+
+        slices = sorted((self._slice(term) for term in set(terms)), key=lambda r: r[1] - r[0])
+        (lo, hi), others = slices[0], [set(self._ids[o_lo:o_hi]) for o_lo, o_hi in slices[1:]]
+        found = []
+        seen = set()
+        for guest_id in self._ids[lo:hi]:
+            if guest_id in seen:
+                continue
+            seen.add(guest_id)
+            if all(guest_id in other for other in others):
+                found.append(self.rows[guest_id])
+                if len(found) == limit:
+                    break
+        return found
+
+
+class GuestSearch:
+    """
+    Picks the search strategy on first use and owns the fallback index.
+
+    The fallback index loads every guest once, then picks up newly created
+    guests (ids above the highest one seen) before each search; it is
+    rebuilt from scratch every `ttl` seconds to catch edits made elsewhere.
+    """
+
+    def __init__(self, ttl=600.0):
+        self.ttl = ttl
+        self.fulltext = None  # unknown until the first search
+        self._index = None
+        self._loaded_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def _detect(self, cursor):
+        try:
+            await cursor.execute(
+                "SELECT 1 FROM information_schema.statistics WHERE table_schema = DATABASE() "
+                "AND table_name = 'Guests' AND index_type = 'FULLTEXT' LIMIT 1"
+            )
+            return await cursor.fetchone() is not None
+        except Exception:
+            return False
+
+    async def search(self, conn, q, limit=20):
+        cursor = await conn.cursor(dictionary=True)
+        try:
+            if self.fulltext is None:
+                self.fulltext = await self._detect(cursor)
+            if self.fulltext:
+                return await self._search_sql(cursor, q, limit)
+            index = await self._refresh(cursor)
+            return index.search(q, limit)
+        finally:
+            await cursor.close()
+
+    async def _search_sql(self, cursor, q, limit):
+        kind = classify(q)
+        if kind == "phone":
+            digits = phone_digits(q)
+            if not digits:
+                return []
+            await cursor.execute(
+                "SELECT * FROM Guests WHERE phone_digits LIKE %s ORDER BY phone_digits, guest_id LIMIT %s",
+                (_like_prefix(digits), limit),
+            )
+            return await cursor.fetchall()
+        if kind == "email":
+            await cursor.execute(
+                "SELECT * FROM Guests WHERE email LIKE %s ORDER BY email, guest_id LIMIT %s",
+                (_like_prefix(q.strip().lower()), limit),
+            )
+            return await cursor.fetchall()
+
+        terms = [w for w in _WORD.findall(_BOOLEAN_OPERATORS.sub(" ", q))]
+        long_terms = [t for t in terms if len(t) >= FULLTEXT_MIN_TOKEN]
+        if not long_terms:
+            # Too short for the full-text index: prefix range on idx_guests_name
+            await cursor.execute(
+                "SELECT * FROM Guests WHERE full_name LIKE %s ORDER BY full_name, guest_id LIMIT %s",
+                (_like_prefix(q.strip()), limit),
+            )
+            return await cursor.fetchall()
+
+        against = " ".join(f"+{t}*" for t in long_terms)
+        short_filters = "".join(" AND full_name LIKE %s" for t in terms if len(t) < FULLTEXT_MIN_TOKEN)
+        short_params = [f"%{t}%" for t in terms if len(t) < FULLTEXT_MIN_TOKEN]
+        await cursor.execute(
+            "SELECT * FROM Guests WHERE MATCH(full_name) AGAINST (%s IN BOOLEAN MODE)" + short_filters
+            + " ORDER BY MATCH(full_name) AGAINST (%s IN BOOLEAN MODE) DESC, guest_id LIMIT %s",
+            [against] + short_params + [against, limit],
+        )
+        return await cursor.fetchall()
+
+    async def _refresh(self, cursor):
+        async with self._lock:
+            if self._index is None or time.monotonic() - self._loaded_at > self.ttl:
+                index = PrefixIndex()
+                await cursor.execute("SELECT * FROM Guests")
+                index.add(await cursor.fetchall())
+                self._index, self._loaded_at = index, time.monotonic()
+            else:
+                await cursor.execute("SELECT * FROM Guests WHERE guest_id > %s", (self._index.max_id,))
+                new_rows = await cursor.fetchall()
+                if new_rows:
+                    self._index.add(new_rows)
+            return self._index
@@ -0,0 +1,43 @@
+"""
+Fast JSON encoding for list responses built from trusted database rows.
+
+The regular path validates every row dict against the response model and
+then runs jsonable_encoder and the stdlib encoder over it. Rows selected
+from the model's own columns need neither, so the fast path encodes tuple
+rows directly with orjson (or the stdlib encoder when orjson is not
+installed). Values come out exactly as the regular path writes them:
+dates and datetimes in ISO format, and DECIMAL columns as JSON numbers
+via pydantic's decimal_encoder (6500.00 -> 6500.0).
+"""
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from pydantic.json import decimal_encoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is listed in requirements.txt
+    orjson = None
+
+
+def _default(value):
+    if isinstance(value, Decimal):
+        return decimal_encoder(value)
+    if isinstance(value, (date, datetime)):  # only reached by the stdlib encoder
+        return value.isoformat()
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def dumps(obj):
+    """`obj` as compact JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default)
+    return json.dumps(obj, default=_default, separators=(",", ":")).encode()
+
+
+def encode_rows(columns, rows):
+    """A JSON array of objects from tuple `rows` whose values follow `columns`."""
+    return dumps([dict(zip(columns, row)) for row in rows])
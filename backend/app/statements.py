@@ -0,0 +1,162 @@
+"""
+Per-connection cache of server-side prepared statements.
+
+The handlers send the same few SQL strings over and over, and with the
+text protocol MySQL parses and plans each of them on every execution. A
+prepared statement is parsed once per connection and then executed by id
+with binary parameters. StatementCache keeps up to `maxsize` prepared
+cursors per connection, keyed by statement text; the least recently used
+one is closed (COM_STMT_CLOSE, freeing it on the server) to make room.
+The cache is attached to the connection when it is opened, so it lives
+as long as the pooled connection and survives across requests.
+
+Handlers opt in per call site with statement_cursor(), which returns a
+cursor-like object routing each execute() to the cached statement. Only
+statements from a bounded set of texts belong there: SQL with a varying
+number of placeholders (IN lists) would just churn the cache.
+
+MySQL caps prepared statements per server (max_prepared_stmt_count,
+16382 by default); each pooled connection holds up to `maxsize`.
+"""
+from collections import OrderedDict
+
+from mysql.connector.aio.cursor import MySQLCursorPrepared, MySQLCursorPreparedDict
+from mysql.connector.errors import ProgrammingError
+
+
+class _Reexecuting:
+    """
+    Runs an already prepared statement again without the COM_STMT_RESET
+    round trip the connector sends before every execution. The reset only
+    discards long data (COM_STMT_SEND_LONG_DATA), which nothing here sends.
+    """
+
+    async def execute(self, operation, params=None, map_results=False):
+        if not self._prepared or operation is not self._executed or map_results:
+            return await super().execute(operation, params, map_results)
+        params = tuple(params or ())
+        if len(self._prepared["parameters"]) != len(params):
+            raise ProgrammingError(errno=1210, msg="Incorrect number of arguments executing prepared statement")
+        result = await self._connection.cmd_stmt_execute(
+            self._prepared["statement_id"],
+            data=params,
+            parameters=self._prepared["parameters"],
+            read_timeout=self._read_timeout,
+            write_timeout=self._write_timeout,
+        )
+        await self._handle_result(result)
+
+
+class PreparedCursor(_Reexecuting, MySQLCursorPrepared):
+    pass
+
+
+class PreparedDictCursor(_Reexecuting, MySQLCursorPreparedDict):
+    pass
+
+
+class StatementCache:
+    """LRU of prepared cursors on one connection, keyed by (sql, dictionary)."""
+
+    def __init__(self, conn, maxsize=64, metrics=None):
+        self.conn = conn
+        self.maxsize = maxsize
+        self._metrics = metrics
+        self._statements = OrderedDict()  # (sql, dictionary) -> (sql, cursor)
+
+    def _count(self, result):
+        if self._metrics is not None:
+            self._metrics.prepared_statements.inc((result,))
+
+    async def get(self, sql, dictionary=False):
+        """
+        The prepared cursor for `sql` and the str object to execute it with.
+        The connector re-prepares unless it is handed the very object it
+        prepared, so callers must execute the returned `sql`, not their own.
+        """
+        key = (sql, dictionary)
+        entry = self._statements.get(key)
+        if entry is not None:
+            self._statements.move_to_end(key)
+            self._count("hit")
+            return entry
+        self._count("prepare")
+        cursor = await self.conn.cursor(prepared=True, dictionary=dictionary,
+                                        cursor_class=PreparedDictCursor if dictionary else PreparedCursor)
+        entry = self._statements[key] = (sql, cursor)
+        if len(self._statements) > self.maxsize:
+            _, (_, evicted) = self._statements.popitem(last=False)
+            self._count("evict")
+            await evicted.close()
+        return entry
+
+    def __len__(self):
+        return len(self._statements)
+
+
+class CachedStatementCursor:
+    """
+    Cursor facade over a StatementCache. Results are read in full on
+    execute, like a buffered cursor, so the connection is free for the next
+    statement whether or not the caller fetches. close() keeps the
+    statements prepared. executemany() goes through a plain cursor, whose
+    multi-row INSERT rewrite beats one prepared execution per row.
+    """
+
+    def __init__(self, cache, dictionary=False):
+        self._cache = cache
+        self._dictionary = dictionary
+        self._rows = []
+        self.lastrowid = None
+        self.rowcount = -1
+
+    async def execute(self, sql, params=None):
+        sql, cursor = await self._cache.get(sql, self._dictionary)
+        await cursor.execute(sql, params or ())
+        self._rows = list(await cursor.fetchall()) if cursor.with_rows else []
+        self.lastrowid = cursor.lastrowid
+        self.rowcount = len(self._rows) if cursor.with_rows else cursor.rowcount
+
+    async def executemany(self, sql, seq_params):
+        cursor = await self._cache.conn.cursor(dictionary=self._dictionary)
+        try:
+            await cursor.executemany(sql, seq_params)
+            self._rows = []
+            self.lastrowid = cursor.lastrowid
+            self.rowcount = cursor.rowcount
+        finally:
+            await cursor.close()
+
+    async def fetchone(self):
+        return self._rows.pop(0) if self._rows else None
+
+    async def fetchmany(self, size=1):
+        rows, self._rows = self._rows[:size], self._rows[size:]
+        return rows
+
+    async def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+    async def close(self):
+        self._rows = []
+
+
+async def statement_cursor(conn, dictionary=False):
+    """
+    A cursor that runs each statement prepared through `conn`'s
+    StatementCache, or a plain cursor when the connection has none.
+    """
+    cache = getattr(conn, "statements", None)
+    if cache is None:
+        return await conn.cursor(dictionary=dictionary)
+    return CachedStatementCursor(cache, dictionary)
+
+
+def cache_statements(connect, maxsize, metrics=None):
+    """Turns a connection coroutine function into one whose connections carry a StatementCache."""
+    async def creator():
+        conn = await connect()
+        conn.statements = StatementCache(conn, maxsize, metrics)
+        return conn
+    return creator
@@ -0,0 +1,217 @@
+"""
+Admission control benchmark: a dashboard burst with and without a
+concurrency limit, and per-client rate limits.
+
+  burst  `--burst` simultaneous GET /api/dashboard/summary requests (every
+         tab refreshing at once) against a pool of `--pool-size`
+         connections with a `--pool-timeout`, on the SQLite stand-in with
+         `--latency` per round trip. "pool" leaves admission off, so the
+         surplus waits on the pool and fails after the pool timeout;
+         "admission" admits `--pool-size` at a time, queues `--queue-size`
+         more for up to `--queue-timeout` and turns the rest away at once.
+         Reports, per status, how many and how long they took.
+  handoff  a queued request whose slot is handed over by `release()` right
+         at its queue deadline, `--handoff-trials` times with the release
+         a little before, at, or after the deadline.
+  rate   one client address sends `--rate-requests` GETs back to back
+         under a read budget of `--read-rps` (burst `--read-burst`), with a
+         fresh X-Client-Id on every request, then writes, while a second
+         address reads.
+
+Checks, exiting 1 on a failure, that with admission every rejection is a
+503 with Retry-After that came back well before the pool timeout and the
+pool itself never timed out, that a handoff at the deadline either admits
+the waiter or gives the slot back, and that only the busy address's reads are
+limited (429 with Retry-After), whatever X-Client-Id it sends, while its
+writes and the other address's reads go through.
+
+Usage (from backend/):
+    python -m benchmarks.admission --burst 800 --pool-size 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+import app.main as main
+from app.admission import AdmissionControl, Overloaded, RateLimiter
+from app.pool import AsyncConnectionPool
+from benchmarks import standin
+from benchmarks.harness import ASGIClient, percentile, print_table
+from benchmarks.seed import seed
+
+
+async def burst(client, n):
+    """Sends `n` requests at once; returns {status: [latency_ms, ...]} and the 503s' headers."""
+    latencies, rejections = {}, []
+
+    async def one():
+        started = time.perf_counter()
+        status, headers, _ = await client.request("GET", "/api/dashboard/summary")
+        latencies.setdefault(status, []).append((time.perf_counter() - started) * 1000)
+        if status == 503:
+            rejections.append(headers)
+
+    await asyncio.gather(*(one() for _ in range(n)))
+    return latencies, rejections
+
+
+async def drive_burst(path, target, args):
+    main.db_pool = AsyncConnectionPool(lambda: standin.async_connect(path, args.latency),
+                                       pool_size=args.pool_size, max_overflow=0, timeout=args.pool_timeout)
+    main.admission = AdmissionControl(args.pool_size if target == "admission" else 0, args.queue_size,
+                                      args.queue_timeout, metrics=main.metrics)
+    client = ASGIClient(main.app)
+    started = time.perf_counter()
+    latencies, rejections = await burst(client, args.burst)
+    elapsed = time.perf_counter() - started
+    pool_failures = main.db_pool.stats()["checkout_failures"]
+    await main.db_pool.dispose()
+
+    rows = []
+    for status, values in sorted(latencies.items()):
+        values.sort()
+        rows.append({"target": target, "status": status, "requests": len(values),
+                     "p50_ms": round(percentile(values, 50), 1), "p99_ms": round(percentile(values, 99), 1),
+                     "max_ms": round(values[-1], 1)})
+    stats = main.admission.stats()
+    for row in rows:
+        row.update({"burst_s": round(elapsed, 2), "pool_timeouts": pool_failures,
+                    "max_queue_depth": stats["max_queue_depth"], "rejected": stats["rejected"]})
+    fast = all(v < args.pool_timeout * 1000 for v in latencies.get(503, []))
+    ok = (target == "pool" or (pool_failures == 0 and fast
+                               and all("retry-after" in headers for headers in rejections)))
+    return ok, rows
+
+
+async def drive_handoff(args):
+    """
+    Holds the only slot while a request queues, and releases it around the
+    queue deadline so the handoff races the timeout. Whichever wins, the
+    slot must not stay counted in flight afterwards.
+    """
+    timeout = 0.01
+    admission = AdmissionControl(1, 1, timeout)
+    outcomes = {"admitted": 0, "queue_timeout": 0}
+    ok = True
+    loop = asyncio.get_running_loop()
+    for i in range(args.handoff_trials):
+        await admission.acquire()
+        offset = (i % 21 - 10) * timeout / 100  # -10% .. +10% of the timeout
+        loop.call_at(loop.time() + timeout + offset, admission.release)
+        try:
+            await admission.acquire()
+        except Overloaded as e:
+            outcomes[e.reason] += 1
+        else:
+            outcomes["admitted"] += 1
+            admission.release()
+        await asyncio.sleep(timeout * 0.2)  # let a late release run
+        stats = admission.stats()
+        ok = ok and stats["in_flight"] == 0 and stats["queue_depth"] == 0
+    return ok, outcomes
+
+
+async def drive_rate(path, args):
+    main.db_pool = AsyncConnectionPool(lambda: standin.async_connect(path), pool_size=4, max_overflow=0)
+    main.admission = AdmissionControl(0)
+    main.rate_limiter = RateLimiter(args.read_rps, args.read_burst, args.write_rps, args.write_burst,
+                                    metrics=main.metrics)
+    busy = ASGIClient(main.app, client=("10.0.0.1", 50000))
+    quiet = ASGIClient(main.app, client=("10.0.0.2", 50000))
+
+    started = time.perf_counter()
+    statuses, retry_after = {}, True
+    for i in range(args.rate_requests):
+        # A new X-Client-Id per request must not buy a new bucket
+        status, headers, _ = await busy.request("GET", "/api/rooms", params={"limit": 10},
+                                                headers={"X-Client-Id": f"busy-{i}"})
+        statuses[status] = statuses.get(status, 0) + 1
+        retry_after = retry_after and (status != 429 or "retry-after" in headers)
+    elapsed = time.perf_counter() - started
+    quiet_statuses = {}
+    for _ in range(args.read_burst):
+        status, _, _ = await quiet.request("GET", "/api/rooms", params={"limit": 10})
+        quiet_statuses[status] = quiet_statuses.get(status, 0) + 1
+    write_statuses = {}
+    for i in range(args.write_burst):
+        status, _, _ = await busy.request("POST", "/api/maintenance", json_body={
+            "room_id": 1, "issue_description": f"Burst {i}", "reported_date": "2024-01-01",
+        })
+        write_statuses[status] = write_statuses.get(status, 0) + 1
+    await main.db_pool.dispose()
+
+    # The busy client gets its burst plus what the rate refilled meanwhile
+    allowed = args.read_burst + args.read_rps * elapsed
+    ok = (statuses.get(429, 0) > 0 and statuses.get(200, 0) <= allowed + 1 and retry_after
+          and quiet_statuses == {200: args.read_burst} and write_statuses == {201: args.write_burst})
+    rows = [
+        {"client": "busy", "kind": "read", "requests": args.rate_requests, "statuses": statuses,
+         "seconds": round(elapsed, 3), "budget": f"{args.read_burst} + {args.read_rps}/s"},
+        {"client": "quiet", "kind": "read", "requests": args.read_burst, "statuses": quiet_statuses,
+         "seconds": "", "budget": f"{args.read_burst} + {args.read_rps}/s"},
+        {"client": "busy", "kind": "write", "requests": args.write_burst, "statuses": write_statuses,
+         "seconds": "", "budget": f"{args.write_burst} + {args.write_rps}/s"},
+    ]
+    return ok, rows
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=10000, help="seeded bookings (see benchmarks.seed)")
+    parser.add_argument("--burst", type=int, default=800, help="simultaneous dashboard requests")
+    parser.add_argument("--latency", type=float, default=0.005, help="simulated DB round trip in seconds")
+    parser.add_argument("--pool-size", type=int, default=10)
+    parser.add_argument("--pool-timeout", type=float, default=3.0)
+    parser.add_argument("--queue-size", type=int, default=50)
+    parser.add_argument("--queue-timeout", type=float, default=1.0)
+    parser.add_argument("--handoff-trials", type=int, default=200,
+                        help="slot handoffs timed against the queue deadline")
+    parser.add_argument("--rate-requests", type=int, default=200, help="back-to-back GETs of the busy client")
+    parser.add_argument("--read-rps", type=float, default=50)
+    parser.add_argument("--read-burst", type=int, default=20)
+    parser.add_argument("--write-rps", type=float, default=5)
+    parser.add_argument("--write-burst", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    main.response_cache.enabled = False
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "admission.db")
+        standin.create_database(path)
+
+        async def setup():
+            conn = await standin.async_connect(path)
+            await seed(conn, args.scale)
+            await conn.close()
+        asyncio.run(setup())
+
+        checks, burst_rows = {}, []
+        for target in ("pool", "admission"):
+            ok, rows = asyncio.run(drive_burst(path, target, args))
+            checks[f"burst ({target})"] = ok
+            burst_rows += rows
+        checks["handoff at the queue deadline"], handoff = asyncio.run(drive_handoff(args))
+        checks["rate limits"], rate_rows = asyncio.run(drive_rate(path, args))
+
+    if args.json:
+        print(json.dumps({"burst": burst_rows, "handoff": handoff, "rate": rate_rows, "checks": checks}, indent=2, default=str))
+    else:
+        print_table(f"Dashboard burst of {args.burst}, pool {args.pool_size} (timeout {args.pool_timeout}s), "
+                    f"queue {args.queue_size} (timeout {args.queue_timeout}s)",
+                    burst_rows, ["target", "status", "requests", "p50_ms", "p99_ms", "max_ms", "burst_s",
+                                 "pool_timeouts", "max_queue_depth", "rejected"])
+        print(f"\nHandoffs at the queue deadline: {handoff}")
+        print_table("Per-client rate limits", rate_rows,
+                    ["client", "kind", "requests", "seconds", "budget", "statuses"])
+        print()
+        for name, passed in checks.items():
+            print(f"{'OK  ' if passed else 'FAIL'} {name}")
+    sys.exit(0 if all(checks.values()) else 1)
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,250 @@
+"""
+Archival benchmark: live-table reads before and after moving history out.
+
+Seeds `--rooms` rooms with `--years` of monthly Completed stays, each with
+its payment and a Resolved maintenance request, plus one Active booking
+per room. Then, against the SQLite stand-in:
+
+  before   a read mix on the full tables: the dashboard (status counts),
+           the first payments page, a room's bookings (limit 20) and the
+           Pending maintenance list; then a write mix posting payments and
+           maintenance requests
+  archive  app.archive.archive() with a `--days` horizon while the write
+           mix runs again; reports the rows moved, how long it took and the
+           write latency meanwhile
+  after    the same read mix on what is left in the live tables
+
+and checks, exiting 1 on a failure, that:
+
+  - walking payments, bookings and maintenance over a date range that
+    reaches back past the cutoff returns the same rows as before archiving
+  - a range that starts at the cutoff does not read the archive
+  - the report rollups and booking ledgers kept current by the concurrent
+    writes equal a rebuild that includes the archive tables
+
+Usage (from backend/):
+    python -m benchmarks.archive --rooms 300 --years 3 --days 365
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+import app.dues as dues
+import app.main as main
+import app.rollups as rollups
+from app.archive import archive
+from app.pool import AsyncConnectionPool
+from benchmarks import standin
+from benchmarks.harness import ASGIClient, print_table, run_load
+
+TODAY = date.today()
+RENT = 5000
+
+
+def months_before(day, n):
+    month = day.year * 12 + day.month - 1 - n
+    return day.replace(year=month // 12, month=month % 12 + 1)
+
+
+async def seed(path, rooms, years):
+    """Returns the Active booking ids."""
+    standin.create_database(path)
+    conn = standin.connect(path)
+    cursor = conn.cursor()
+    cursor.executemany("INSERT INTO Guests (full_name, phone_number) VALUES (%s, %s)",
+                       [(f"Guest {i}", f"9{i:09d}") for i in range(rooms)])
+    cursor.executemany("INSERT INTO Rooms (room_number, room_type, monthly_rent) VALUES (%s, 'Single', %s)",
+                       [(f"R{i}", RENT) for i in range(rooms)])
+
+    first = months_before(TODAY.replace(day=1), years * 12 + 1)
+    bookings, payments, requests, active = [], [], [], []
+    for r in range(rooms):
+        for m in range(years * 12):
+            check_in = months_before(first, -m)
+            bookings.append((r + 1, r + 1, check_in, months_before(check_in, -1), "Completed"))
+            payments.append((len(bookings), RENT, check_in))
+            requests.append((r + 1, check_in + timedelta(days=3), "Resolved", check_in + timedelta(days=5)))
+        bookings.append((r + 1, r + 1, TODAY - timedelta(days=20), TODAY + timedelta(days=10), "Active"))
+        active.append(len(bookings))
+        requests.append((r + 1, TODAY - timedelta(days=2), "Pending", None))
+    cursor.executemany("INSERT INTO Bookings (guest_id, room_id, check_in_date, check_out_date, booking_status) "
+                       "VALUES (%s, %s, %s, %s, %s)", bookings)
+    cursor.executemany("INSERT INTO Payments (booking_id, amount_paid, payment_date, payment_method) "
+                       "VALUES (%s, %s, %s, 'UPI')", payments)
+    cursor.executemany("INSERT INTO MaintenanceRequests (room_id, issue_description, reported_date, status, "
+                       "resolved_date) VALUES (%s, 'Leak', %s, %s, %s)", requests)
+    # MySQL indexes foreign key columns; SQLite does not
+    cursor.execute("CREATE INDEX idx_payments_booking ON Payments (booking_id)")
+    conn.commit()
+    conn.close()
+
+    aconn = await standin.async_connect(path)
+    acursor = await aconn.cursor()
+    await rollups.rebuild(acursor)
+    await dues.rebuild(acursor)
+    await aconn.commit()
+    await aconn.close()
+    return active
+
+
+async def walk(client, path, params):
+    rows, cursor = [], None
+    while True:
+        page = {**params, "limit": 500, **({"cursor": cursor} if cursor else {})}
+        status, headers, body = await client.request("GET", path, params=page)
+        assert status == 200, body
+        rows += json.loads(body)
+        cursor = headers.get("x-next-cursor")
+        if not cursor:
+            return rows
+
+
+async def history(client, date_from):
+    """Every row dated from `date_from` up to yesterday, per list endpoint."""
+    params = {"date_from": date_from, "date_to": TODAY - timedelta(days=1)}
+    return {path: await walk(client, path, params)
+            for path in ("/api/payments", "/api/bookings", "/api/maintenance")}
+
+
+def read_request(client, rooms):
+    async def one(i):
+        kind, room = i % 4, i // 4 % rooms + 1
+        if kind == 0:
+            status, _, _ = await client.request("GET", "/api/dashboard/summary")
+        elif kind == 1:
+            status, _, _ = await client.request("GET", "/api/payments", params={"limit": 50})
+        elif kind == 2:
+            status, _, _ = await client.request("GET", "/api/bookings", params={"room_id": room, "limit": 20})
+        else:
+            status, _, _ = await client.request("GET", "/api/maintenance",
+                                                params={"status": "Pending", "limit": 50})
+        return status
+    return one
+
+
+def write_request(client, rooms, active):
+    async def one(i):
+        if i % 2:
+            status, _, _ = await client.request("POST", "/api/payments", json_body={
+                "booking_id": active[i % len(active)], "amount_paid": "250.00",
+                "payment_date": TODAY, "payment_method": "Cash",
+            })
+        else:
+            status, _, _ = await client.request("POST", "/api/maintenance", json_body={
+                "room_id": i % rooms + 1, "issue_description": "Dripping tap", "reported_date": TODAY,
+            })
+        return status
+    return one
+
+
+async def snapshot(conn):
+    """Rollup and ledger rows, for comparing with a rebuild."""
+    cursor = await conn.cursor()
+    tables = {}
+    for name, sql in (("RevenueMonthly", "SELECT * FROM RevenueMonthly ORDER BY month_start, payment_method"),
+                      ("RoomNightsDaily", "SELECT * FROM RoomNightsDaily ORDER BY stay_date, room_type"),
+                      ("BookingLedger", "SELECT booking_id, amount_paid, payment_count, last_payment_date "
+                                        "FROM BookingLedger ORDER BY booking_id")):
+        await cursor.execute(sql)
+        tables[name] = [tuple(row) for row in await cursor.fetchall()]
+    await cursor.close()
+    return tables
+
+
+async def table_counts(path):
+    conn = await standin.async_connect(path)
+    cursor = await conn.cursor()
+    counts = {}
+    for table in ("Payments", "Bookings", "MaintenanceRequests"):
+        await cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        counts[table] = (await cursor.fetchone())[0]
+    await cursor.close()
+    await conn.close()
+    return counts
+
+
+async def run(path, args):
+    active = await seed(path, args.rooms, args.years)
+    main.db_pool = AsyncConnectionPool(lambda: standin.async_connect(path),
+                                       pool_size=args.concurrency + 1, max_overflow=0)
+    client = ASGIClient(main.app)
+    cutoff = TODAY - timedelta(days=args.days)
+    oldest = months_before(TODAY.replace(day=1), args.years * 12 + 1)
+    checks = {}
+
+    before = await history(client, oldest)
+    results = [{**await run_load(read_request(client, args.rooms), args.concurrency, args.requests),
+                "phase": "before", "mix": "read", **await table_counts(path)}]
+    results.append({**await run_load(write_request(client, args.rooms, active), args.concurrency, args.writes),
+                    "phase": "before", "mix": "write"})
+
+    conn = await standin.async_connect(path)
+    started = time.perf_counter()
+    archiving = asyncio.ensure_future(archive(conn, cutoff, args.batch, args.pause))
+    writes = await run_load(write_request(client, args.rooms, active), args.concurrency, args.writes)
+    moved = await archiving
+    elapsed = time.perf_counter() - started
+    results.append({**writes, "phase": "archive", "mix": "write",
+                    **{table: f"-{n}" for table, n in moved.items()}})
+
+    results.append({**await run_load(read_request(client, args.rooms), args.concurrency, args.requests),
+                    "phase": "after", "mix": "read", **await table_counts(path)})
+
+    checks["history unchanged"] = await history(client, oldest) == before
+    async with main.db_pool.connection() as pooled:
+        tables = ("Payments", "Bookings", "MaintenanceRequests")
+        checks["recent range reads live only"] = [
+            await main.archive_for(pooled, table, cutoff, None) for table in tables] == [None] * 3
+        checks["older range reads the archive"] = None not in [
+            await main.archive_for(pooled, table, cutoff - timedelta(days=1), None) for table in tables]
+
+    kept = await snapshot(conn)
+    cursor = await conn.cursor()
+    await rollups.rebuild(cursor, archived=True)
+    await dues.rebuild(cursor, archived=True)
+    await cursor.close()
+    await conn.commit()
+    checks["rollups and ledgers match a rebuild"] = await snapshot(conn) == kept
+    await conn.close()
+    await main.db_pool.dispose()
+    return results, moved, elapsed, checks
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rooms", type=int, default=300)
+    parser.add_argument("--years", type=int, default=3, help="years of monthly stays per room")
+    parser.add_argument("--days", type=int, default=365, help="archive horizon in days")
+    parser.add_argument("--batch", type=int, default=500, help="rows per archive transaction")
+    parser.add_argument("--pause", type=float, default=0.01, help="seconds between archive batches")
+    parser.add_argument("--requests", type=int, default=2000, help="timed reads per phase")
+    parser.add_argument("--writes", type=int, default=1000, help="writes per write phase")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    main.response_cache.enabled = False
+    with tempfile.TemporaryDirectory() as tmp:
+        results, moved, elapsed, checks = asyncio.run(run(os.path.join(tmp, "archive.db"), args))
+
+    ok = all(checks.values())
+    if args.json:
+        print(json.dumps({"results": results, "moved": moved, "archive_seconds": elapsed, "checks": checks},
+                         indent=2))
+    else:
+        print_table(f"Archival, {args.rooms} rooms x {args.years} years, horizon {args.days} days",
+                    results, ["phase", "mix", "requests", "rps", "p50_ms", "p95_ms", "p99_ms",
+                              "Payments", "Bookings", "MaintenanceRequests", "statuses"])
+        print(f"\nArchived {sum(moved.values())} rows in {elapsed:.2f}s")
+        for name, passed in checks.items():
+            print(f"{'OK  ' if passed else 'FAIL'} {name}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,244 @@
+"""
+Load benchmark: blocking handlers on the threadpool vs the async handlers.
+
+The "sync" target is the pre-port handler code (plain `def` endpoints and
+blocking connections, run by FastAPI on its default 40-thread pool); the
+"async" target is app.main itself. Both talk to the same SQLite stand-in
+with an identical simulated round-trip latency, and both pools may grow to
+one connection per client, so the difference is only how many requests
+can wait on the database at once.
+
+Usage (from backend/):
+    python -m benchmarks.async_load --concurrency 200 --requests 4000 --latency 0.02
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import List
+
+from fastapi import Depends, FastAPI, HTTPException
+
+import app.main as main
+from app.admission import AdmissionControl
+from app.pool import AsyncConnectionPool, _BasePool
+from benchmarks import standin
+from benchmarks.harness import ASGIClient, print_table, run_load
+
+
+class PooledConnection:
+    """Wraps a raw connection so that close() hands it back to the pool."""
+
+    def __init__(self, pool, raw, created_at):
+        self._pool = pool
+        self._raw = raw
+        self._created_at = created_at
+        self._returned = False
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def close(self):
+        """Returns the connection to the pool. Safe to call more than once."""
+        if not self._returned:
+            self._returned = True
+            self._pool._release(self._raw, self._created_at)
+
+
+class ConnectionPool(_BasePool):
+    """Thread-safe pool for blocking mysql.connector connections."""
+
+    def __init__(self, creator, **kwargs):
+        super().__init__(creator, **kwargs)
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        """Checks out a connection, blocking up to `timeout` seconds."""
+        started = time.monotonic()
+        with self._cond:
+            if not self._cond.wait_for(self._can_checkout, self.timeout):
+                raise self._timed_out()
+            raw, created_at = self._take()
+
+        try:
+            if raw is not None and not self._is_usable(raw, created_at):
+                self._close_quietly(raw)
+                raw = None
+            if raw is None:
+                raw = self._creator()
+                created_at = time.monotonic()
+        except Exception:
+            with self._cond:
+                self._checkout_failed()
+                self._cond.notify()
+            raise
+
+        with self._cond:
+            self._checked_out(started)
+        return PooledConnection(self, raw, created_at)
+
+    @contextmanager
+    def connection(self):
+        """Context manager that always returns the connection to the pool."""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _release(self, raw, created_at):
+        keep = True
+        try:
+            # Never hand a half-finished transaction to the next request.
+            if raw.in_transaction:
+                raw.rollback()
+        except Exception:
+            keep = False
+        with self._cond:
+            kept = self._put_back(raw, created_at, keep)
+            self._cond.notify()
+        if not kept:
+            self._close_quietly(raw)
+
+    def _is_usable(self, raw, created_at):
+        if self._expired(created_at):
+            return False
+        if self.pre_ping:
+            try:
+                return raw.is_connected()
+            except Exception:
+                return False
+        return True
+
+    @staticmethod
+    def _close_quietly(raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    def dispose(self):
+        """Closes every idle connection. Checked-out connections are unaffected."""
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._opened -= len(idle)
+        for raw, _ in idle:
+            self._close_quietly(raw)
+
+    def stats(self):
+        with self._cond:
+            return super().stats()
+
+
+def seed(path, rooms):
+    conn = standin.connect(path)
+    cursor = conn.cursor()
+    cursor.executemany(
+        "INSERT INTO Rooms (room_number, room_type, monthly_rent) VALUES (%s, %s, %s)",
+        [(f"R{i}", "Double" if i % 2 else "Single", 4500 + i % 7 * 250) for i in range(rooms)],
+    )
+    conn.commit()
+    conn.close()
+
+
+def build_sync_app(path, latency, pool_size, max_overflow):
+    """The blocking handlers as they were before the async port."""
+    pool = ConnectionPool(lambda: standin.connect(path, latency),
+                          pool_size=pool_size, max_overflow=max_overflow)
+
+    def get_db_connection():
+        with pool.connection() as conn:
+            yield conn
+
+    app = FastAPI()
+
+    @app.get("/api/rooms", response_model=List[main.Room])
+    def get_all_rooms(limit: int = 50, conn=Depends(get_db_connection)):
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute("SELECT * FROM Rooms ORDER BY room_id LIMIT %s", (limit,))
+        rooms = cursor.fetchall()
+        cursor.close()
+        return rooms
+
+    @app.post("/api/guests", response_model=main.Guest, status_code=201)
+    def create_guest(guest: main.GuestCreate, conn=Depends(get_db_connection)):
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute(
+                "INSERT INTO Guests (full_name, phone_number, email) VALUES (%s, %s, %s)",
+                (guest.full_name, guest.phone_number, guest.email),
+            )
+            conn.commit()
+            cursor.execute("SELECT * FROM Guests WHERE guest_id = %s", (cursor.lastrowid,))
+            return cursor.fetchone()
+        except main.mysql.connector.IntegrityError as e:
+            conn.rollback()
+            raise HTTPException(status_code=400, detail=str(e))
+        finally:
+            cursor.close()
+
+    return app
+
+
+def build_async_app(path, latency, pool_size, max_overflow):
+    main.db_pool = AsyncConnectionPool(lambda: standin.async_connect(path, latency),
+                                       pool_size=pool_size, max_overflow=max_overflow)
+    # Every request waits on the pool, as on the sync side: no admission shedding
+    main.admission = AdmissionControl(0)
+    return main.app
+
+
+async def drive(app, label, args):
+    client = ASGIClient(app)
+
+    async def one(i):
+        if i % 5 == 4:
+            status, _, _ = await client.request("POST", "/api/guests", json_body={
+                "full_name": f"Guest {label} {i}",
+                "phone_number": f"{label[:1]}{i:09d}",
+            })
+        else:
+            status, _, _ = await client.request("GET", "/api/rooms", params={"limit": args.page_size})
+        return status
+
+    result = await run_load(one, args.concurrency, args.requests)
+    result["target"] = label
+    return result
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=4000)
+    parser.add_argument("--latency", type=float, default=0.02, help="simulated DB round trip in seconds")
+    parser.add_argument("--page-size", type=int, default=10, help="rooms returned per list request")
+    parser.add_argument("--pool-size", type=int, default=20, help="idle connections kept between requests")
+    parser.add_argument("--rooms", type=int, default=500)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, build in (("sync", build_sync_app), ("async", build_async_app)):
+            path = os.path.join(tmp, f"{label}.db")
+            standin.create_database(path)
+            seed(path, args.rooms)
+            app = build(path, args.latency, args.pool_size, args.concurrency)
+            results.append(asyncio.run(drive(app, label, args)))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(
+            f"GET /api/rooms + POST /api/guests, latency={args.latency}s, pool={args.pool_size}",
+            results, ["target", "requests", "concurrency", "rps", "p50_ms", "p95_ms", "p99_ms", "statuses"],
+        )
+
+
+if __name__ == "__main__":
+    main_()
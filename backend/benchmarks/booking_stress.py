@@ -0,0 +1,150 @@
+"""
+Booking stress test: hundreds of concurrent POST /api/bookings for a
+few rooms and fewer guests, in both BOOKING_LOCKING modes.
+
+Every request asks for a random 1-5 night stay in one of `--rooms` rooms
+within a `--days` window, for one of `--guests` guests, so most requests
+collide with another on the room, the guest or both, and a guest's
+concurrent requests are mostly for different rooms. Afterwards the
+database is checked for double bookings (two Active bookings of one room,
+or of one guest, with overlapping nights), for 201 responses without a
+row or rows without a 201, and for room-nights in RoomNightsDaily that do
+not match the accepted bookings. Any violation exits 1.
+
+Usage (from backend/):
+    python -m benchmarks.booking_stress --requests 500 --concurrency 500 --rooms 20 --guests 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+from datetime import date, timedelta
+
+import app.main as main
+from app.admission import AdmissionControl
+from app.metrics import instrument_connection
+from app.pool import AsyncConnectionPool
+from benchmarks import standin
+from benchmarks.harness import ASGIClient, print_table, run_load
+
+OVERLAPS = """
+    SELECT COUNT(*) FROM Bookings a JOIN Bookings b
+      ON a.{column} = b.{column} AND a.booking_id < b.booking_id
+     WHERE a.booking_status = 'Active' AND b.booking_status = 'Active'
+       AND a.check_in_date < b.check_out_date AND b.check_in_date < a.check_out_date
+"""
+
+
+def seed(path, rooms, guests):
+    conn = standin.connect(path)
+    cursor = conn.cursor()
+    cursor.executemany("INSERT INTO Rooms (room_number, room_type, monthly_rent) VALUES (%s, 'Double', 6500)",
+                       [(f"S{i}",) for i in range(rooms)])
+    cursor.executemany("INSERT INTO Guests (full_name, phone_number) VALUES (%s, %s)",
+                       [(f"Stress {i}", f"8{i:09d}") for i in range(guests)])
+    conn.commit()
+    conn.close()
+
+
+def check(path, accepted):
+    """Consistency violations after a run, as human-readable lines."""
+    conn = standin.connect(path)
+    cursor = conn.cursor()
+    problems = []
+    for column in ("room_id", "guest_id"):
+        cursor.execute(OVERLAPS.format(column=column))
+        overlaps = cursor.fetchone()[0]
+        if overlaps:
+            problems.append(f"{overlaps} overlapping Active booking pair(s) by {column}")
+    cursor.execute("SELECT booking_id, check_in_date, check_out_date FROM Bookings")
+    rows = {booking_id: (check_in, check_out) for booking_id, check_in, check_out in cursor.fetchall()}
+    if set(rows) != set(accepted):
+        problems.append(f"{len(accepted)} bookings returned 201 but {len(rows)} rows exist")
+    nights = sum((check_out - check_in).days for check_in, check_out in rows.values())
+    cursor.execute("SELECT COALESCE(SUM(room_nights), 0) FROM RoomNightsDaily")
+    rolled_up = cursor.fetchone()[0]
+    if rolled_up != nights:
+        problems.append(f"RoomNightsDaily holds {rolled_up} room-nights, bookings hold {nights}")
+    conn.close()
+    return problems
+
+
+async def drive(args, mode):
+    rng = random.Random(args.seed)
+    client = ASGIClient(main.app)
+    first_day = date.today() + timedelta(days=30)
+    accepted = []
+
+    async def one(i):
+        check_in = first_day + timedelta(days=rng.randrange(args.days))
+        status, _, body = await client.request("POST", "/api/bookings", json_body={
+            "guest_id": rng.randrange(args.guests) + 1,
+            "room_id": rng.randrange(args.rooms) + 1,
+            "check_in_date": check_in.isoformat(),
+            "check_out_date": (check_in + timedelta(days=rng.randint(1, 5))).isoformat(),
+        })
+        if status == 201:
+            accepted.append(json.loads(body)["booking_id"])
+        return status
+
+    retries = {reason: main.metrics.transaction_retries.value(("booking", reason))
+               for reason in ("deadlock", "lock_wait_timeout", "stale_write")}
+    result = await run_load(one, args.concurrency, args.requests)
+    result["mode"] = mode
+    result["retries"] = {reason: main.metrics.transaction_retries.value(("booking", reason)) - before
+                         for reason, before in retries.items()
+                         if main.metrics.transaction_retries.value(("booking", reason)) > before}
+    return result, accepted
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--rooms", type=int, default=20)
+    parser.add_argument("--guests", type=int, default=10)
+    parser.add_argument("--days", type=int, default=30, help="window the check-in dates fall in")
+    parser.add_argument("--latency", type=float, default=0.002, help="simulated DB round trip in seconds")
+    parser.add_argument("--pool-size", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    results, failed = [], False
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("optimistic", "pessimistic"):
+            path = os.path.join(tmp, f"{mode}.db")
+            standin.create_database(path)
+            seed(path, args.rooms, args.guests)
+            main.BOOKING_LOCKING = mode
+            main.db_pool = AsyncConnectionPool(
+                instrument_connection(lambda: standin.async_connect(path, args.latency), main.metrics),
+                pool_size=args.pool_size, max_overflow=0,
+            )
+            # Every booking must reach the database to race the others
+            main.admission = AdmissionControl(0)
+            result, accepted = asyncio.run(drive(args, mode))
+            result["problems"] = check(path, accepted)
+            failed = failed or bool(result["problems"])
+            results.append(result)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(
+            f"POST /api/bookings, {args.rooms} rooms, {args.guests} guests, {args.days}-day window",
+            results, ["mode", "requests", "concurrency", "rps", "p50_ms", "p99_ms", "statuses", "retries"],
+        )
+        for result in results:
+            for problem in result["problems"]:
+                print(f"FAIL {result['mode']}: {problem}")
+        if not failed:
+            print("\nNo double bookings.")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main_()
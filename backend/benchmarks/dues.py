@@ -0,0 +1,169 @@
+"""
+Dues benchmark: the BookingLedger vs summing Payments per request.
+
+Seeds `--rooms` rooms with `--years` of monthly Completed stays, each paid
+in full, and one Active booking per room that is up to date, one month
+behind or two months behind. Then, against the SQLite stand-in:
+
+  overdue  walks GET /api/bookings/overdue page by page (`--page` rows)
+  balance  GET /api/bookings/{id}/balance for random Active bookings
+
+once with the paid totals read from BookingLedger ("ledger", app.main as
+it is) and once from a GROUP BY over Payments in the same query ("sum",
+the set-based pass without a ledger; Payments gets the booking_id index
+MySQL creates for its foreign key). Both must return the same balances,
+and the overdue list must match the seeded arrears; the script exits 1
+otherwise.
+
+Usage (from backend/):
+    python -m benchmarks.dues --rooms 2000 --years 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+from datetime import date, timedelta
+
+import app.dues as dues
+import app.main as main
+from app.pool import AsyncConnectionPool
+from benchmarks import standin
+from benchmarks.harness import ASGIClient, print_table, run_load
+
+AS_OF = date(2024, 6, 20)
+RENT = 5000
+SUMMED_LEDGER = ("(SELECT booking_id, NULL AS monthly_rent, SUM(amount_paid) AS amount_paid, "
+                 "COUNT(*) AS payment_count, MAX(payment_date) AS last_payment_date "
+                 "FROM Payments GROUP BY booking_id)")
+
+
+def months_before(day, n):
+    month = day.year * 12 + day.month - 1 - n
+    return day.replace(year=month // 12, month=month % 12 + 1)
+
+
+async def seed(path, rooms, years):
+    """Returns ({booking_id: months behind} for the Active bookings, payment count)."""
+    standin.create_database(path)
+    conn = standin.connect(path)
+    cursor = conn.cursor()
+    cursor.executemany("INSERT INTO Guests (full_name, phone_number) VALUES (%s, %s)",
+                       [(f"Guest {i}", f"9{i:09d}") for i in range(rooms)])
+    cursor.executemany("INSERT INTO Rooms (room_number, room_type, monthly_rent) VALUES (%s, 'Single', %s)",
+                       [(f"R{i}", RENT) for i in range(rooms)])
+
+    # Room r: `years` * 12 one-month Completed stays, then an Active stay
+    # that started 6 months before AS_OF (7 months charged)
+    first = months_before(AS_OF.replace(day=1), years * 12 + 6)
+    bookings, payments, behind = [], [], {}
+    for r in range(rooms):
+        for m in range(years * 12):
+            check_in = months_before(first, -m)
+            bookings.append((r + 1, r + 1, check_in, months_before(check_in, -1), "Completed"))
+            payments.append((len(bookings), RENT, check_in))
+        bookings.append((r + 1, r + 1, months_before(AS_OF, 6), None, "Active"))
+        behind[len(bookings)] = r % 3
+        for m in range(7 - r % 3):
+            payments.append((len(bookings), RENT, months_before(AS_OF, 6 - m)))
+    cursor.executemany("INSERT INTO Bookings (guest_id, room_id, check_in_date, check_out_date, booking_status) "
+                       "VALUES (%s, %s, %s, %s, %s)", bookings)
+    cursor.executemany("INSERT INTO Payments (booking_id, amount_paid, payment_date, payment_method) "
+                       "VALUES (%s, %s, %s, 'UPI')", payments)
+    # MySQL indexes foreign key columns; SQLite does not
+    cursor.execute("CREATE INDEX idx_payments_booking ON Payments (booking_id)")
+    conn.commit()
+    conn.close()
+
+    aconn = await standin.async_connect(path)
+    acursor = await aconn.cursor()
+    await dues.rebuild(acursor)
+    await aconn.commit()
+    await aconn.close()
+    return behind, len(payments)
+
+
+async def walk_overdue(client, page):
+    rows, cursor, requests = [], None, 0
+    while True:
+        params = {"as_of": AS_OF, "limit": page}
+        if cursor:
+            params["cursor"] = cursor
+        status, headers, body = await client.request("GET", "/api/bookings/overdue", params=params)
+        assert status == 200, body
+        requests += 1
+        rows += json.loads(body)
+        cursor = headers.get("x-next-cursor")
+        if not cursor:
+            return rows, requests
+
+
+async def drive(client, target, behind, args):
+    rng = random.Random(3)
+    active = sorted(behind)
+
+    # Correctness first: the overdue list is exactly the seeded arrears
+    rows, pages = await walk_overdue(client, args.page)
+    expected = {b: n * RENT for b, n in behind.items() if n}
+    got = {row["booking_id"]: row["balance"] for row in rows}
+    ok = got == expected
+
+    async def walk(i):
+        await walk_overdue(client, args.page)
+        return 200
+    results = [{**await run_load(walk, 1, args.walks), "part": "overdue walk", "target": target, "pages": pages}]
+
+    async def balance(i):
+        status, _, _ = await client.request("GET", f"/api/bookings/{rng.choice(active)}/balance",
+                                            params={"as_of": AS_OF})
+        return status
+    results.append({**await run_load(balance, args.concurrency, args.requests),
+                    "part": "balance", "target": target, "pages": ""})
+    return ok, rows, results
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rooms", type=int, default=1000, help="rooms, each with one Active booking")
+    parser.add_argument("--years", type=int, default=5, help="years of paid monthly stays per room")
+    parser.add_argument("--page", type=int, default=100, help="overdue page size")
+    parser.add_argument("--walks", type=int, default=5, help="timed walks of the whole overdue list")
+    parser.add_argument("--requests", type=int, default=1000, help="balance requests")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    async def run(path):
+        behind, payments = await seed(path, args.rooms, args.years)
+        main.db_pool = AsyncConnectionPool(lambda: standin.async_connect(path),
+                                           pool_size=args.concurrency, max_overflow=0)
+        client = ASGIClient(main.app)
+        ledger_select = dues.BALANCE_SELECT
+        results, lists, ok = [], {}, True
+        for target in ("sum", "ledger"):
+            dues.BALANCE_SELECT = (ledger_select if target == "ledger" else
+                                   ledger_select.replace("LEFT JOIN BookingLedger l", f"LEFT JOIN {SUMMED_LEDGER} l"))
+            target_ok, lists[target], target_results = await drive(client, target, behind, args)
+            ok = ok and target_ok
+            results += target_results
+        dues.BALANCE_SELECT = ledger_select
+        return ok and lists["sum"] == lists["ledger"], payments, results
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ok, payments, results = asyncio.run(run(os.path.join(tmp, "dues.db")))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(f"Dues, {args.rooms} Active bookings, {payments} payments",
+                    results, ["part", "target", "requests", "pages", "rps", "p50_ms", "p95_ms", "p99_ms",
+                              "statuses"])
+        print("\nBalances match the seeded arrears in both modes" if ok else
+              "\nFAIL: balances differ from the seeded arrears or between the modes")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,108 @@
+"""
+Guest search benchmark: /api/guests/search vs downloading every guest.
+
+Seeds the SQLite stand-in with `--guests` synthetic guests and times the
+search endpoint for name, phone and email queries. SQLite has no FULLTEXT
+index, so this exercises the in-process prefix index that app.search falls
+back to; the first search pays for loading it and is reported separately.
+The "download all" row is what the browser had to do before.
+
+Usage (from backend/):
+    python -m benchmarks.guest_search --guests 100000 --requests 2000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+
+import app.main as main
+from app.pool import AsyncConnectionPool
+from app.search import GuestSearch
+from benchmarks import standin
+from benchmarks.harness import ASGIClient, print_table, run_load
+
+FIRST = ["Aarav", "Aditi", "Arjun", "Diya", "Ishaan", "Kavya", "Meera", "Nikhil", "Priya", "Rahul",
+         "Rohan", "Saanvi", "Sneha", "Tanvi", "Varun", "Vikram", "Ananya", "Karthik", "Lakshmi", "Manoj"]
+LAST = ["Sharma", "Verma", "Iyer", "Reddy", "Nair", "Gupta", "Patel", "Rao", "Menon", "Das",
+        "Kumar", "Singh", "Joshi", "Pillai", "Shetty", "Bose", "Chopra", "Mehta", "Kapoor", "Naidu"]
+
+
+def seed(path, guests, rng):
+    conn = standin.connect(path)
+    cursor = conn.cursor()
+    rows = []
+    for i in range(guests):
+        first, last = rng.choice(FIRST), rng.choice(LAST)
+        rows.append((f"{first} {last}", f"9{i:09d}", f"{first.lower()}.{last.lower()}{i}@example.com"))
+    cursor.executemany("INSERT INTO Guests (full_name, phone_number, email) VALUES (%s, %s, %s)", rows)
+    conn.commit()
+    conn.close()
+
+
+def queries(guests, rng):
+    """(label, query factory) per kind of search the front desk runs."""
+    return [
+        ("name", lambda: rng.choice(LAST)),
+        ("name prefix", lambda: f"{rng.choice(FIRST)[:3]} {rng.choice(LAST)[:2]}"),
+        ("phone", lambda: f"9{rng.randrange(guests):09d}"[:7]),
+        ("email", lambda: f"{rng.choice(FIRST).lower()}.{rng.choice(LAST).lower()}{rng.randrange(guests)}@"),
+    ]
+
+
+async def drive(args):
+    rng = random.Random(7)
+    client = ASGIClient(main.app)
+    results = []
+
+    started = time.perf_counter()
+    status, _, body = await client.request("GET", "/api/guests/search", params={"q": "Sharma", "limit": 20})
+    results.append({"query": "first search (loads index)", "requests": 1, "concurrency": 1,
+                    "p50_ms": round((time.perf_counter() - started) * 1000, 2), "statuses": {str(status): 1}})
+
+    for label, make_q in queries(args.guests, rng):
+        async def one(i):
+            status, _, _ = await client.request("GET", "/api/guests/search",
+                                                params={"q": make_q(), "limit": 20})
+            return status
+
+        result = await run_load(one, args.concurrency, args.requests)
+        result["query"] = label
+        results.append(result)
+
+    started = time.perf_counter()
+    status, _, body = await client.request("GET", "/api/guests")
+    results.append({"query": f"download all ({len(body) // 1024} KiB)", "requests": 1, "concurrency": 1,
+                    "p50_ms": round((time.perf_counter() - started) * 1000, 2), "statuses": {str(status): 1}})
+    return results
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--guests", type=int, default=100000)
+    parser.add_argument("--requests", type=int, default=2000, help="searches per query kind")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "search.db")
+        standin.create_database(path)
+        seed(path, args.guests, random.Random(1))
+        main.db_pool = AsyncConnectionPool(lambda: standin.async_connect(path),
+                                           pool_size=args.concurrency, max_overflow=0)
+        main.guest_search = GuestSearch()
+        main.response_cache.enabled = False
+        results = asyncio.run(drive(args))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(f"GET /api/guests/search, {args.guests} guests", results,
+                    ["query", "requests", "concurrency", "rps", "p50_ms", "p95_ms", "p99_ms", "statuses"])
+
+
+if __name__ == "__main__":
+    main_()
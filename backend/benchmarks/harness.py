@@ -0,0 +1,108 @@
+"""In-process ASGI client and load driver shared by the benchmark scripts."""
+import asyncio
+import json
+import time
+from urllib.parse import urlencode
+
+
+class ASGIClient:
+    """Sends HTTP requests straight into an ASGI app without a socket, from `client` (host, port)."""
+
+    def __init__(self, app, client=("127.0.0.1", 50000)):
+        self.app = app
+        self.client = client
+
+    async def request(self, method, path, params=None, json_body=None, headers=None, body=None):
+        query = urlencode(params or {}, doseq=True).encode()
+        raw_headers = [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]
+        if json_body is not None:
+            body = json.dumps(json_body, default=str).encode()
+            raw_headers.append((b"content-type", b"application/json"))
+        body = body or b""
+        raw_headers.append((b"content-length", str(len(body)).encode()))
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": query,
+            "root_path": "",
+            "headers": raw_headers,
+            "client": self.client,
+            "server": ("testserver", 80),
+        }
+        sent = False
+
+        async def receive():
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            await asyncio.Event().wait()  # no disconnect until the app returns
+
+        status = None
+        response_headers = {}
+        chunks = []
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                response_headers.update((k.decode(), v.decode()) for k, v in message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await self.app(scope, receive, send)
+        return status, response_headers, b"".join(chunks)
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[k]
+
+
+async def run_load(make_request, concurrency, total_requests):
+    """
+    Runs `total_requests` calls of `make_request(i)` (a coroutine returning
+    an HTTP status) across `concurrency` workers. Returns a result dict.
+    """
+    latencies = []
+    statuses = {}
+    counter = iter(range(total_requests))
+
+    async def worker():
+        for i in counter:
+            started = time.perf_counter()
+            status = await make_request(i)
+            latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": total_requests,
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "rps": round(total_requests / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "statuses": {str(k): v for k, v in sorted(statuses.items(), key=lambda kv: str(kv[0]))},
+    }
+
+
+def print_table(title, rows, columns):
+    """Prints a list of result dicts as an aligned table."""
+    print(f"\n{title}")
+    widths = [max(len(c), *(len(str(r.get(c, ""))) for r in rows)) for c in columns]
+    print("  ".join(c.ljust(w) for c, w in zip(columns, widths)))
+    for r in rows:
+        print("  ".join(str(r.get(c, "")).ljust(w) for c, w in zip(columns, widths)))
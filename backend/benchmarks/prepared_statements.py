@@ -0,0 +1,168 @@
+"""
+Prepared statement benchmark: text protocol vs the per-connection statement cache.
+
+Runs a write mix and a read mix against app.main on the SQLite stand-in,
+once with every statement sent as text ("text") and once with
+DB_STATEMENT_CACHE_SIZE connections ("prepared"). The stand-in charges
+`--parse-cost` seconds for every statement the server has to parse and
+`--latency` per round trip; a prepared statement is parsed, for one extra
+round trip, the first time a connection runs it and never again, so the
+runs show what parsing costs the request once the cache is warm.
+
+  write  POST /api/guests, /api/rooms, /api/bookings (Active, so with the
+         room and guest overlap checks), /api/payments, /api/maintenance
+  read   GET /api/payments?booking_id=, /api/maintenance?room_id=,
+         /api/bookings?guest_id= (pages of 20) and /api/rooms/availability
+
+Usage (from backend/):
+    python -m benchmarks.prepared_statements --concurrency 20 --requests 2000 --parse-cost 0.002
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+from datetime import date, timedelta
+
+import app.main as main
+from app.metrics import instrument_connection
+from app.pool import AsyncConnectionPool
+from app.statements import cache_statements
+from benchmarks import standin
+from benchmarks.harness import ASGIClient, print_table, run_load
+
+FIRST_DAY = date(2031, 1, 1)  # stays in the future leave room status alone
+
+
+def seed(path, rooms):
+    conn = standin.connect(path)
+    cursor = conn.cursor()
+    cursor.executemany("INSERT INTO Guests (full_name, phone_number) VALUES (%s, %s)",
+                       [(f"Seed {i}", f"seed{i}") for i in range(rooms)])
+    cursor.executemany("INSERT INTO Rooms (room_number, room_type, monthly_rent) VALUES (%s, 'Single', 5000)",
+                       [(f"R{i}",) for i in range(rooms)])
+    cursor.executemany("INSERT INTO Bookings (guest_id, room_id, check_in_date, check_out_date) "
+                       "VALUES (%s, %s, '2024-01-01', '2024-02-01')",
+                       [(i + 1, i + 1) for i in range(rooms)])
+    cursor.executemany("INSERT INTO Payments (booking_id, amount_paid, payment_date, payment_method) "
+                       "VALUES (%s, 5000, '2024-01-05', 'UPI')",
+                       [(i % rooms + 1,) for i in range(rooms * 5)])
+    cursor.executemany("INSERT INTO MaintenanceRequests (room_id, issue_description, reported_date) "
+                       "VALUES (%s, 'Leak', '2024-01-02')",
+                       [(i % rooms + 1,) for i in range(rooms * 2)])
+    conn.commit()
+    conn.close()
+
+
+def write_request(client, rooms, target):
+    async def one(i):
+        kind, n = i % 5, i // 5
+        if kind == 0:
+            status, _, _ = await client.request("POST", "/api/guests", json_body={
+                "full_name": f"Guest {i}", "phone_number": f"{target[0]}{i:09d}",
+            })
+        elif kind == 1:
+            status, _, _ = await client.request("POST", "/api/rooms", json_body={
+                "room_number": f"{target[0]}{i}", "room_type": "Double", "monthly_rent": "6500",
+            })
+        elif kind == 2:
+            # Guest g books room g for two nights, one window after the other
+            check_in = FIRST_DAY + timedelta(days=3 * (n // rooms))
+            status, _, _ = await client.request("POST", "/api/bookings", json_body={
+                "guest_id": n % rooms + 1, "room_id": n % rooms + 1,
+                "check_in_date": check_in, "check_out_date": check_in + timedelta(days=2),
+            })
+        elif kind == 3:
+            status, _, _ = await client.request("POST", "/api/payments", json_body={
+                "booking_id": n % rooms + 1, "amount_paid": "1500.00",
+                "payment_date": "2024-02-01", "payment_method": "UPI",
+            })
+        else:
+            status, _, _ = await client.request("POST", "/api/maintenance", json_body={
+                "room_id": n % rooms + 1, "issue_description": "Flickering light", "reported_date": "2024-02-02",
+            })
+        return status
+    return one
+
+
+def read_request(client, rooms, target):
+    async def one(i):
+        kind, n = i % 4, i // 4 % rooms + 1
+        if kind == 0:
+            status, _, _ = await client.request("GET", "/api/payments", params={"booking_id": n, "limit": 20})
+        elif kind == 1:
+            status, _, _ = await client.request("GET", "/api/maintenance", params={"room_id": n, "limit": 20})
+        elif kind == 2:
+            status, _, _ = await client.request("GET", "/api/bookings", params={"guest_id": n, "limit": 20})
+        else:
+            check_in = FIRST_DAY + timedelta(days=n % 30)
+            status, _, _ = await client.request("GET", "/api/rooms/availability", params={
+                "check_in": check_in, "check_out": check_in + timedelta(days=7),
+            })
+        return status
+    return one
+
+
+async def drive(path, mix, target, args):
+    connect = instrument_connection(lambda: standin.async_connect(path, args.latency, args.parse_cost),
+                                    main.metrics)
+    if target == "prepared":
+        connect = cache_statements(connect, args.cache_size, main.metrics)
+    main.db_pool = AsyncConnectionPool(connect, pool_size=args.pool_size, max_overflow=0)
+    client = ASGIClient(main.app)
+    make = (write_request if mix == "write" else read_request)(client, args.rooms, target)
+
+    standin.round_trips.reset()
+    standin.parses.reset()
+    before = {r: main.metrics.prepared_statements.value((r,)) for r in ("hit", "prepare", "evict")}
+    result = await run_load(make, args.concurrency, args.requests)
+    lookups = {r: main.metrics.prepared_statements.value((r,)) - n for r, n in before.items()}
+    await main.db_pool.dispose()
+
+    result.update({
+        "mix": mix,
+        "target": target,
+        "round_trips_per_req": round(standin.round_trips.count / args.requests, 2),
+        "parses_per_req": round(standin.parses.count / args.requests, 2),
+        "cache_hit_rate": (round(lookups["hit"] / (lookups["hit"] + lookups["prepare"]), 3)
+                           if target == "prepared" else ""),
+    })
+    return result
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.0005, help="simulated DB round trip in seconds")
+    parser.add_argument("--parse-cost", type=float, default=0.002,
+                        help="simulated server parse time per statement in seconds")
+    parser.add_argument("--pool-size", type=int, default=10)
+    parser.add_argument("--cache-size", type=int, default=64, help="prepared statements per connection")
+    parser.add_argument("--rooms", type=int, default=200, help="seeded rooms, guests and bookings")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    main.response_cache.enabled = False
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for mix in ("write", "read"):
+            for target in ("text", "prepared"):
+                path = os.path.join(tmp, f"{mix}-{target}.db")
+                standin.create_database(path)
+                seed(path, args.rooms)
+                results.append(asyncio.run(drive(path, mix, target, args)))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(
+            f"Statement cache, latency={args.latency}s, parse cost={args.parse_cost}s, "
+            f"pool={args.pool_size}, concurrency={args.concurrency}",
+            results, ["mix", "target", "requests", "rps", "p50_ms", "p95_ms", "p99_ms",
+                      "round_trips_per_req", "parses_per_req", "cache_hit_rate", "statuses"],
+        )
+
+
+if __name__ == "__main__":
+    main_()
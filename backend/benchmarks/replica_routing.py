@@ -0,0 +1,141 @@
+"""
+Read/write splitting check against two SQLite stand-in databases.
+
+The "primary" and the "replica" are separate files; replication is
+simulated by copying the primary onto the replica on demand, so the
+replica is stale until then, like a lagging MySQL replica. The script
+drives app.main in-process and checks that:
+
+  1. GET requests read from the replica and writes go to the primary;
+  2. a client that just wrote reads its own write back (from the primary),
+     while other clients keep reading the replica;
+  3. after the sticky window the writer is back on the replica;
+  4. a cached list refilled right after a write comes from the primary;
+  5. a replica that cannot be connected to is failed over to the primary,
+     and is used again once it is back and the retry interval has passed.
+
+Any failed check exits 1. To run the same routing against two MySQL
+servers, start the app with DB_REPLICAS=host:port instead.
+
+Usage (from backend/):
+    python -m benchmarks.replica_routing
+"""
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+
+from mysql.connector import errors
+
+import app.main as main
+from app.metrics import instrument_connection
+from app.pool import AsyncConnectionPool
+from app.replicas import ReplicaRouter
+from benchmarks import standin
+from benchmarks.harness import ASGIClient
+
+
+def replicate(primary, replica):
+    """Copies the primary database file onto the replica."""
+    src, dst = sqlite3.connect(primary), sqlite3.connect(replica)
+    try:
+        src.backup(dst)
+    finally:
+        src.close()
+        dst.close()
+
+
+async def run(args, tmp):
+    primary, replica = os.path.join(tmp, "primary.db"), os.path.join(tmp, "replica.db")
+    standin.create_database(primary)
+    conn = standin.connect(primary)
+    conn.cursor().execute("INSERT INTO Rooms (room_number, room_type, monthly_rent) VALUES ('101', 'Single', 5000)")
+    conn.commit()
+    conn.close()
+    replicate(primary, replica)
+
+    replica_up = True
+
+    async def connect_replica():
+        if not replica_up:
+            raise errors.InterfaceError(msg="Can't connect to replica (simulated outage)", errno=2003)
+        return await standin.async_connect(replica)
+
+    main.db_pool = AsyncConnectionPool(instrument_connection(lambda: standin.async_connect(primary), main.metrics),
+                                       pool_size=4, max_overflow=0)
+    replica_pool = AsyncConnectionPool(instrument_connection(connect_replica, main.metrics),
+                                       pool_size=4, max_overflow=0)
+    main.replica_router = ReplicaRouter([("replica", replica_pool)], sticky_seconds=args.sticky,
+                                        retry_seconds=args.retry)
+    client = ASGIClient(main.app)
+    checks = []
+
+    def check(name, ok):
+        checks.append((name, ok))
+        print(f"{'OK  ' if ok else 'FAIL'} {name}")
+
+    async def issues(client_id):
+        status, _, body = await client.request("GET", "/api/maintenance", headers={"X-Client-Id": client_id})
+        assert status == 200, body
+        return {row["issue_description"] for row in json.loads(body)}
+
+    async def room_numbers(client_id):
+        status, _, body = await client.request("GET", "/api/rooms", headers={"X-Client-Id": client_id})
+        assert status == 200, body
+        return {row["room_number"] for row in json.loads(body)}
+
+    reads_before = main.replica_router.replicas[0].reads
+    status, _, body = await client.request("POST", "/api/maintenance", headers={"X-Client-Id": "writer"}, json_body={
+        "room_id": 1, "issue_description": "Leaking tap", "reported_date": "2024-05-01",
+    })
+    assert status == 201, body
+    check("writer reads its own write", "Leaking tap" in await issues("writer"))
+    check("other clients read the (stale) replica", "Leaking tap" not in await issues("reader"))
+    check("GETs were served by the replica", main.replica_router.replicas[0].reads > reads_before)
+
+    await asyncio.sleep(args.sticky)
+    check("writer is back on the replica after the sticky window", "Leaking tap" not in await issues("writer"))
+    replicate(primary, replica)
+    check("replica serves the write once replicated", "Leaking tap" in await issues("reader"))
+
+    await room_numbers("reader")  # fill the cache
+    status, _, body = await client.request("POST", "/api/rooms", headers={"X-Client-Id": "writer"}, json_body={
+        "room_number": "102", "room_type": "Double", "monthly_rent": "6500",
+    })
+    assert status == 201, body
+    check("cached room list refilled from the primary after a write", "102" in await room_numbers("reader"))
+    await asyncio.sleep(args.sticky)
+
+    replica_up = False
+    await replica_pool.dispose()
+    status, _, body = await client.request("POST", "/api/maintenance", headers={"X-Client-Id": "writer"}, json_body={
+        "room_id": 1, "issue_description": "Broken window", "reported_date": "2024-05-02",
+    })
+    assert status == 201, body
+    check("reads fail over to the primary while the replica is down", "Broken window" in await issues("reader"))
+    check("the replica is out of rotation", not main.replica_router.stats()["replicas"][0]["healthy"])
+
+    replica_up = True
+    await asyncio.sleep(args.retry)
+    check("the replica is back in rotation after the retry interval",
+          "Broken window" not in await issues("reader"))
+
+    print(json.dumps(main.replica_router.stats(), indent=2, default=str))
+    return all(ok for _, ok in checks)
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sticky", type=float, default=0.5, help="read-your-writes window in seconds")
+    parser.add_argument("--retry", type=float, default=0.5, help="seconds a failed replica is skipped")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        ok = asyncio.run(run(args, tmp))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main_()
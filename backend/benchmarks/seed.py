@@ -0,0 +1,129 @@
+"""
+Synthetic data for the benchmarks, at a configurable scale.
+
+`scale` is the number of bookings and payments; the other tables are sized
+from it (see sizes()), so --scale 10000 ... 1000000 spans a single hostel
+to a large chain. Every room gets a back-to-back history of Completed
+monthly stays ending before today, which leaves the future free for the
+bookings a load test creates. Works on any mysql.connector.aio-style
+connection: the SQLite stand-in, or a MySQL database whose schema
+setup_database() has created. The tables must be empty, since the load
+generators address rows by id.
+
+    python -m benchmarks.seed --scale 100000 --path /tmp/hostel.db
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from app.dues import rebuild as rebuild_ledger
+from app.rollups import rebuild as rebuild_rollups
+
+ROOM_TYPES = [("Single", Decimal("4500.00")), ("Double", Decimal("6500.00")),
+              ("Triple", Decimal("8000.00")), ("Dormitory", Decimal("3000.00"))]
+PAYMENT_METHODS = ["Cash", "UPI", "Card", "Bank Transfer"]
+MAINTENANCE_STATUSES = ["Pending", "Pending", "In Progress", "Resolved"]
+STAY_DAYS = 30
+BATCH_ROWS = 5000
+
+
+def sizes(scale):
+    """Row counts per table for `scale` bookings."""
+    return {
+        "Guests": max(scale // 2, 10),
+        "Rooms": max(scale // 50, 10),
+        "Bookings": scale,
+        "Payments": scale,
+        "MaintenanceRequests": max(scale // 10, 10),
+        "Users": max(scale // 10000, 5),
+    }
+
+
+async def _insert(conn, sql, rows):
+    cursor = await conn.cursor()
+    try:
+        for i in range(0, len(rows), BATCH_ROWS):
+            await cursor.executemany(sql, rows[i:i + BATCH_ROWS])
+            await conn.commit()
+    finally:
+        await cursor.close()
+
+
+async def seed(conn, scale, rng_seed=1, today=None):
+    """Fills all six tables plus the rollups and the booking ledger. Returns the row counts."""
+    rng = random.Random(rng_seed)
+    today = today or date.today()
+    n = sizes(scale)
+
+    cursor = await conn.cursor()
+    await cursor.execute("SELECT COUNT(*) FROM Guests")
+    existing = (await cursor.fetchone())[0]
+    await cursor.close()
+    if existing:
+        raise RuntimeError("Guests is not empty; seed a fresh database")
+
+    await _insert(conn, "INSERT INTO Users (username, password_hash, role) VALUES (%s, %s, %s)", [
+        (f"staff{i}", "x" * 60, "Admin" if i == 0 else "Staff") for i in range(n["Users"])
+    ])
+    await _insert(conn, "INSERT INTO Guests (full_name, phone_number, email) VALUES (%s, %s, %s)", [
+        (f"Guest {i}", f"9{i:09d}", f"guest{i}@example.com") for i in range(n["Guests"])
+    ])
+    rooms = [(f"R{i:06d}", *ROOM_TYPES[i % len(ROOM_TYPES)]) for i in range(n["Rooms"])]
+    await _insert(conn, "INSERT INTO Rooms (room_number, room_type, monthly_rent) VALUES (%s, %s, %s)", rooms)
+
+    # Stay k of room r; room r's last stay ends just before today
+    stays_per_room = -(-n["Bookings"] // n["Rooms"])
+    bookings, payments = [], []
+    for i in range(n["Bookings"]):
+        room, k = i % n["Rooms"], i // n["Rooms"]
+        check_in = today - timedelta(days=(stays_per_room - k) * STAY_DAYS + 1)
+        check_out = check_in + timedelta(days=STAY_DAYS)
+        bookings.append((rng.randrange(n["Guests"]) + 1, room + 1, check_in, check_out, "Completed"))
+        payments.append((i + 1, rooms[room][2], check_in, PAYMENT_METHODS[i % len(PAYMENT_METHODS)]))
+    await _insert(conn, "INSERT INTO Bookings (guest_id, room_id, check_in_date, check_out_date, booking_status) "
+                        "VALUES (%s, %s, %s, %s, %s)", bookings)
+    await _insert(conn, "INSERT INTO Payments (booking_id, amount_paid, payment_date, payment_method) "
+                        "VALUES (%s, %s, %s, %s)", payments)
+    await _insert(conn, "INSERT INTO MaintenanceRequests (room_id, issue_description, reported_date, status) "
+                        "VALUES (%s, %s, %s, %s)", [
+        (rng.randrange(n["Rooms"]) + 1, "Synthetic issue", today - timedelta(days=rng.randrange(365)),
+         rng.choice(MAINTENANCE_STATUSES))
+        for _ in range(n["MaintenanceRequests"])
+    ])
+
+    cursor = await conn.cursor()
+    try:
+        await rebuild_rollups(cursor, today=today)
+        await rebuild_ledger(cursor)
+        await conn.commit()
+    finally:
+        await cursor.close()
+    return n
+
+
+def main_():
+    from benchmarks import standin
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=10000, help="bookings (and payments) to create")
+    parser.add_argument("--path", required=True, help="SQLite stand-in database file to create")
+    args = parser.parse_args()
+
+    async def run():
+        standin.create_database(args.path)
+        conn = await standin.async_connect(args.path)
+        try:
+            started = time.perf_counter()
+            counts = await seed(conn, args.scale)
+            print(f"Seeded {counts} in {time.perf_counter() - started:.1f}s")
+        finally:
+            await conn.close()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main_()
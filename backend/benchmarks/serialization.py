@@ -0,0 +1,165 @@
+"""
+Serialization benchmark: the response_model path vs the LIST_FAST_PATH one.
+
+Two parts, both at each of `--rows` page sizes:
+
+  encode   CPU time to turn one page of payment rows into the response
+           body, without any database work. "model" is what FastAPI does
+           for `response_model=List[Payment]` (validate every dict, run
+           jsonable_encoder, stdlib json); "fast" encodes tuple rows with
+           app.serialize.encode_rows.
+  request  GET /api/payments?limit=N (the whole table for the largest
+           size above MAX_PAGE_SIZE) end to end against the SQLite
+           stand-in, with LIST_FAST_PATH off and on (tuple cursor, no
+           validation, orjson).
+
+Both paths must produce the same JSON; the benchmark checks that first.
+
+Usage (from backend/):
+    python -m benchmarks.serialization --rows 100,1000,10000
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+
+import app.main as main
+from app import serialize
+from app.metrics import instrument_connection
+from app.pool import AsyncConnectionPool
+from benchmarks import standin
+from benchmarks.harness import ASGIClient, percentile, print_table
+
+COLUMNS = list(main.Payment.__fields__)
+
+
+def payment_rows(n):
+    """Tuple rows shaped like the Payments columns, as a DB driver returns them."""
+    methods = [m.value for m in main.PaymentMethod]
+    first = date(2024, 1, 1)
+    return [
+        (i % 500 + 1, Decimal(f"{4500 + i % 7 * 250}.00"), first + timedelta(days=i % 365),
+         methods[i % len(methods)], None if i % 3 else "Monthly rent", i + 1,
+         datetime(2024, 1, 1, 9, 30) + timedelta(minutes=i))
+        for i in range(n)
+    ]
+
+
+def list_field(path):
+    route = next(r for r in main.app.routes if getattr(r, "path", None) == path and "GET" in r.methods)
+    return route.secure_cloned_response_field
+
+
+async def model_body(field, rows):
+    dicts = [dict(zip(COLUMNS, row)) for row in rows]
+    content = await serialize_response(field=field, response_content=dicts)
+    return JSONResponse(content=content).body
+
+
+def fast_body(rows):
+    return serialize.encode_rows(COLUMNS, rows)
+
+
+async def time_encode(n, repeat):
+    field = list_field("/api/payments")
+    rows = payment_rows(n)
+    if json.loads(await model_body(field, rows)) != json.loads(fast_body(rows)):
+        raise SystemExit("fast path output differs from the response_model path")
+
+    results = []
+    for target in ("model", "fast"):
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            if target == "model":
+                await model_body(field, rows)
+            else:
+                fast_body(rows)
+            samples.append(time.perf_counter() - started)
+        samples.sort()
+        results.append({"part": "encode", "target": target, "rows": n,
+                        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+                        "rows_per_s": round(n / percentile(samples, 50))})
+    return results
+
+
+def seed(path, n):
+    conn = standin.connect(path)
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO Guests (full_name, phone_number) VALUES ('Seed', 'seed')")
+    cursor.execute("INSERT INTO Rooms (room_number, room_type, monthly_rent) VALUES ('R1', 'Single', 5000)")
+    cursor.execute("INSERT INTO Bookings (guest_id, room_id, check_in_date) VALUES (1, 1, '2024-01-01')")
+    cursor.executemany(
+        "INSERT INTO Payments (booking_id, amount_paid, payment_date, payment_method, remarks, created_at) "
+        "VALUES (1, %s, %s, %s, %s, %s)",
+        [row[1:5] + (row[6],) for row in payment_rows(n)],
+    )
+    conn.commit()
+    conn.close()
+
+
+async def time_requests(client, n, repeat):
+    # Pages stop at MAX_PAGE_SIZE; larger sizes read the whole (seeded) table
+    params = {"limit": n} if n <= main.MAX_PAGE_SIZE else {}
+    results, bodies = [], {}
+    for fast in (False, True):
+        main.LIST_FAST_PATH = fast
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            status, _, body = await client.request("GET", "/api/payments", params=params)
+            samples.append(time.perf_counter() - started)
+            assert status == 200, body
+        bodies[fast] = body
+        samples.sort()
+        results.append({"part": "request", "target": "fast" if fast else "model", "rows": n,
+                        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+                        "rows_per_s": round(n / percentile(samples, 50))})
+    if json.loads(bodies[False]) != json.loads(bodies[True]):
+        raise SystemExit("GET /api/payments differs between the two paths")
+    return results
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", default="100,1000,10000", help="comma separated page sizes")
+    parser.add_argument("--repeat", type=int, default=20, help="timed runs per size and target")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+    sizes = [int(n) for n in args.rows.split(",")]
+
+    async def run():
+        results = []
+        for n in sizes:
+            results += await time_encode(n, args.repeat)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "serialization.db")
+            standin.create_database(path)
+            seed(path, max(sizes))
+            main.db_pool = AsyncConnectionPool(
+                instrument_connection(lambda: standin.async_connect(path), main.metrics),
+                pool_size=1, max_overflow=0,
+            )
+            client = ASGIClient(main.app)
+            for n in sizes:
+                if n <= main.MAX_PAGE_SIZE or n == max(sizes):
+                    results += await time_requests(client, n, args.repeat)
+        return results
+
+    results = asyncio.run(run())
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table("Payment list serialization, orjson " + ("on" if serialize.orjson else "off"),
+                    results, ["part", "target", "rows", "p50_ms", "rows_per_s"])
+
+
+if __name__ == "__main__":
+    main_()
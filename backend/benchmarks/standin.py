@@ -0,0 +1,534 @@
+"""
+SQLite stand-in for MySQL used by the benchmarks.
+
+Exposes blocking and asyncio connections with the subset of the
+mysql.connector / mysql.connector.aio API that app.main relies on
+(dictionary cursors, %s placeholders, lastrowid, commit/rollback), so the
+real request handlers can be driven without a MySQL server. Every
+statement and commit can be delayed by `latency` seconds to model the
+network round trip to a remote database server; the sync connection
+sleeps (holding its worker thread) while the async one awaits. Commits
+are applied before the delay so SQLite's single write lock is not held
+across simulated network time, which MySQL's row locks would not do.
+
+Async connections also model statement parsing: each text-protocol
+statement costs `parse_cost` seconds more, while a prepared cursor
+(`cursor(prepared=True)`) pays it, plus one round trip for the prepare,
+only when it is handed a different statement.
+
+A transaction that has written still holds SQLite's database-wide lock
+for its remaining round trips, which stalls every other writer where
+MySQL would only lock the rows written. With `row_locks` an async
+connection instead sleeps those round trips after the commit: the
+request takes as long, but other writers are held up only while
+statements run. Contention on the same rows is then no longer simulated,
+so `lock_holds` records, per table, for how many round trips each
+transaction kept the rows it wrote locked (first write to commit).
+"""
+import asyncio
+import re
+import sqlite3
+import threading
+import time
+from datetime import date, datetime
+from decimal import Decimal
+
+from mysql.connector import errors
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS Guests (
+        guest_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        full_name VARCHAR(100) NOT NULL,
+        phone_number VARCHAR(15) UNIQUE NOT NULL,
+        email VARCHAR(100) UNIQUE,
+        id_proof_type VARCHAR(50),
+        id_proof_number VARCHAR(50) UNIQUE,
+        address TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        version INT NOT NULL DEFAULT 0
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS Rooms (
+        room_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        room_number VARCHAR(10) UNIQUE NOT NULL,
+        room_type VARCHAR(50) NOT NULL,
+        monthly_rent DECIMAL(10,2) NOT NULL,
+        occupancy_status VARCHAR(20) DEFAULT 'Available',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        version INT NOT NULL DEFAULT 0
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS Bookings (
+        booking_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        guest_id INT NOT NULL REFERENCES Guests(guest_id) ON DELETE CASCADE,
+        room_id INT NOT NULL REFERENCES Rooms(room_id) ON DELETE CASCADE,
+        check_in_date DATE NOT NULL,
+        check_out_date DATE,
+        booking_status VARCHAR(20) DEFAULT 'Active',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS Payments (
+        payment_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        booking_id INT NOT NULL REFERENCES Bookings(booking_id) ON DELETE CASCADE,
+        amount_paid DECIMAL(10,2) NOT NULL,
+        payment_date DATE NOT NULL,
+        payment_method VARCHAR(20) NOT NULL,
+        remarks VARCHAR(255),
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS Users (
+        user_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username VARCHAR(50) UNIQUE NOT NULL,
+        password_hash VARCHAR(255) NOT NULL,
+        role VARCHAR(10) DEFAULT 'Staff',
+        last_login TIMESTAMP NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS MaintenanceRequests (
+        request_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        room_id INT NOT NULL REFERENCES Rooms(room_id) ON DELETE CASCADE,
+        guest_id INT REFERENCES Guests(guest_id) ON DELETE SET NULL,
+        issue_description TEXT NOT NULL,
+        reported_date DATE NOT NULL DEFAULT CURRENT_DATE,
+        status VARCHAR(20) DEFAULT 'Pending',
+        resolved_date DATE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS RevenueMonthly (
+        month_start DATE NOT NULL,
+        payment_method VARCHAR(20) NOT NULL,
+        payment_count INT NOT NULL DEFAULT 0,
+        total_amount DECIMAL(14,2) NOT NULL DEFAULT 0,
+        PRIMARY KEY (month_start, payment_method)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS RoomNightsDaily (
+        stay_date DATE NOT NULL,
+        room_type VARCHAR(50) NOT NULL,
+        room_nights INT NOT NULL DEFAULT 0,
+        PRIMARY KEY (stay_date, room_type)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS BookingLedger (
+        booking_id INT PRIMARY KEY REFERENCES Bookings(booking_id) ON DELETE CASCADE,
+        monthly_rent DECIMAL(10,2),
+        amount_paid DECIMAL(14,2) NOT NULL DEFAULT 0,
+        payment_count INT NOT NULL DEFAULT 0,
+        last_payment_date DATE
+    )
+    """,
+    # Archive tables: the live columns without foreign keys (migration 8)
+    """
+    CREATE TABLE IF NOT EXISTS PaymentsArchive (
+        payment_id INTEGER PRIMARY KEY,
+        booking_id INT NOT NULL,
+        amount_paid DECIMAL(10,2) NOT NULL,
+        payment_date DATE NOT NULL,
+        payment_method VARCHAR(20) NOT NULL,
+        remarks VARCHAR(255),
+        created_at TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS BookingsArchive (
+        booking_id INTEGER PRIMARY KEY,
+        guest_id INT NOT NULL,
+        room_id INT NOT NULL,
+        check_in_date DATE NOT NULL,
+        check_out_date DATE,
+        booking_status VARCHAR(20),
+        created_at TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS MaintenanceRequestsArchive (
+        request_id INTEGER PRIMARY KEY,
+        room_id INT NOT NULL,
+        guest_id INT,
+        issue_description TEXT NOT NULL,
+        reported_date DATE NOT NULL,
+        status VARCHAR(20),
+        resolved_date DATE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS ArchiveState (
+        table_name VARCHAR(64) PRIMARY KEY,
+        archived_before DATE NOT NULL,
+        rows_archived BIGINT NOT NULL DEFAULT 0,
+        last_run_at TIMESTAMP NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_payments_date ON Payments (payment_date, payment_id)",
+    "CREATE INDEX IF NOT EXISTS idx_maintenance_reported ON MaintenanceRequests (reported_date, request_id)",
+    "CREATE INDEX IF NOT EXISTS idx_maintenance_status ON MaintenanceRequests (status, reported_date, request_id)",
+    "CREATE INDEX IF NOT EXISTS idx_bookings_status ON Bookings (booking_status, booking_id)",
+    "CREATE INDEX IF NOT EXISTS idx_rooms_status ON Rooms (occupancy_status, room_id)",
+    "CREATE INDEX IF NOT EXISTS idx_bookings_room_dates ON Bookings (room_id, check_in_date, check_out_date)",
+    "CREATE INDEX IF NOT EXISTS idx_bookings_guest_dates ON Bookings (guest_id, check_in_date, check_out_date)",
+    "CREATE INDEX IF NOT EXISTS idx_guests_name ON Guests (full_name)",
+    "CREATE INDEX IF NOT EXISTS idx_archive_payments_date ON PaymentsArchive (payment_date, payment_id)",
+    "CREATE INDEX IF NOT EXISTS idx_archive_bookings_status ON BookingsArchive (booking_status, booking_id)",
+    "CREATE INDEX IF NOT EXISTS idx_archive_maintenance_reported "
+    "ON MaintenanceRequestsArchive (reported_date, request_id)",
+]
+
+sqlite3.register_adapter(Decimal, str)
+sqlite3.register_adapter(date, lambda d: d.isoformat())
+sqlite3.register_adapter(datetime, lambda d: d.isoformat(" "))
+sqlite3.register_converter("DATE", lambda b: date.fromisoformat(b.decode()))
+sqlite3.register_converter("TIMESTAMP", lambda b: datetime.fromisoformat(b.decode()))
+
+
+class RoundTrips:
+    """Thread-safe process-wide counter (statements sent, statements parsed)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def add(self, n=1):
+        with self._lock:
+            self.count += n
+
+    def reset(self):
+        with self._lock:
+            self.count = 0
+
+
+class LockHolds:
+    """Thread-safe process-wide {table: [transactions, round trips held]}."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.tables = {}
+
+    def add(self, table, trips):
+        with self._lock:
+            held = self.tables.setdefault(table, [0, 0])
+            held[0] += 1
+            held[1] += trips
+
+    def per_transaction(self, table):
+        """Mean round trips a transaction writing `table` held it, or None."""
+        with self._lock:
+            transactions, trips = self.tables.get(table, (0, 0))
+        return trips / transactions if transactions else None
+
+    def reset(self):
+        with self._lock:
+            self.tables = {}
+
+
+round_trips = RoundTrips()
+parses = RoundTrips()
+lock_holds = LockHolds()
+
+_FOR_UPDATE = re.compile(r"\s+FOR\s+UPDATE(\s+SKIP\s+LOCKED)?\b", re.I)
+_ON_DUPLICATE = re.compile(r"\bON\s+DUPLICATE\s+KEY\s+UPDATE\b", re.I)
+_VALUES_REF = re.compile(r"\bVALUES\((\w+)\)", re.I)
+_WRITTEN_TABLE = re.compile(r"^\s*(?:INSERT\s+INTO|UPDATE|DELETE\s+FROM)\s+(\w+)", re.I)
+
+
+def create_database(path):
+    """Creates the application tables and their indexes in a SQLite file."""
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    for ddl in SCHEMA:
+        conn.execute(ddl)
+    conn.commit()
+    conn.close()
+
+
+def translate(sql):
+    """Rewrites the MySQL dialect used by app.main into SQLite. Returns (sql, locking)."""
+    locking = bool(_FOR_UPDATE.search(sql))
+    sql = _FOR_UPDATE.sub("", sql).replace("%s", "?").replace("%%", "%")
+    match = _ON_DUPLICATE.search(sql)
+    if match:
+        # MySQL upsert -> SQLite upsert; VALUES(col) is SQLite's excluded.col
+        update = _VALUES_REF.sub(r"excluded.\1", sql[match.end():])
+        sql = sql[:match.start()] + "ON CONFLICT DO UPDATE SET" + update
+    return sql, locking
+
+
+def _to_mysql_error(e):
+    msg = str(e)
+    if isinstance(e, sqlite3.IntegrityError):
+        # SQLite does not name the failing foreign key, MySQL's 1452 message does
+        errno = 1452 if "FOREIGN KEY" in msg else 1062
+        return errors.IntegrityError(msg=msg, errno=errno)
+    if "locked" in msg or "busy" in msg:
+        return errors.DatabaseError(msg=msg, errno=1205)
+    if "no such table" in msg:
+        return errors.ProgrammingError(msg=msg, errno=1146)
+    return errors.DatabaseError(msg=msg)
+
+
+def _convert(value):
+    # SQLite hands back floats for DECIMAL columns and SUM(); MySQL gives Decimal
+    return Decimal(repr(value)) if isinstance(value, float) else value
+
+
+def _open(path):
+    raw = sqlite3.connect(path, timeout=30, detect_types=sqlite3.PARSE_DECLTYPES,
+                          check_same_thread=False)
+    raw.create_function("YEAR", 1, lambda d: int(d[:4]) if d else None)
+    raw.create_function("MONTH", 1, lambda d: int(d[5:7]) if d else None)
+    raw.create_function("DAY", 1, lambda d: int(d[8:10]) if d else None)
+    raw.create_function("LEAST", -1, lambda *args: None if None in args else min(args))
+    raw.create_function("GREATEST", -1, lambda *args: None if None in args else max(args))
+    raw.execute("PRAGMA foreign_keys=ON")
+    return raw
+
+
+class _CursorBase:
+    def __init__(self, conn, dictionary=False):
+        self._conn = conn
+        self._cur = conn._raw.cursor()
+        self._dictionary = dictionary
+        self._rowcount = -1
+        self._lastrowid = None
+
+    def _shape(self, row):
+        if row is None:
+            return None
+        row = tuple(_convert(v) for v in row)
+        if self._dictionary:
+            return dict(zip(self.column_names, row))
+        return row
+
+    @property
+    def description(self):
+        return self._cur.description
+
+    @property
+    def column_names(self):
+        return tuple(d[0] for d in self._cur.description or ())
+
+    @property
+    def with_rows(self):
+        return self._cur.description is not None
+
+    @property
+    def lastrowid(self):
+        return self._lastrowid
+
+    @property
+    def rowcount(self):
+        return self._rowcount
+
+    def _run(self, sql, params, many=False):
+        sql, locking = translate(sql)
+        raw = self._conn._raw
+        if locking and not raw.in_transaction:
+            raw.execute("BEGIN IMMEDIATE")
+        if many:
+            self._cur.executemany(sql, [tuple(p) for p in params])
+        else:
+            self._cur.execute(sql, tuple(params or ()))
+        self._rowcount = self._cur.rowcount
+        # Like MySQL, only an INSERT reports a new id; other statements give 0
+        self._lastrowid = self._cur.lastrowid if sql.lstrip()[:6].upper() == "INSERT" else 0
+
+
+class Cursor(_CursorBase):
+    def execute(self, sql, params=None):
+        self._conn._round_trip()
+        try:
+            self._run(sql, params)
+        except sqlite3.Error as e:
+            raise _to_mysql_error(e)
+
+    def executemany(self, sql, seq_params):
+        self._conn._round_trip()
+        try:
+            self._run(sql, seq_params, many=True)
+        except sqlite3.Error as e:
+            raise _to_mysql_error(e)
+
+    def fetchone(self):
+        return self._shape(self._cur.fetchone())
+
+    def fetchmany(self, size=1):
+        return [self._shape(r) for r in self._cur.fetchmany(size)]
+
+    def fetchall(self):
+        return [self._shape(r) for r in self._cur.fetchall()]
+
+    def close(self):
+        self._cur.close()
+
+
+class Connection:
+    """Blocking stand-in for mysql.connector.MySQLConnection."""
+
+    def __init__(self, path, latency=0.0):
+        self._raw = _open(path)
+        self.latency = latency
+
+    def _round_trip(self):
+        round_trips.add()
+        if self.latency:
+            time.sleep(self.latency)
+
+    def cursor(self, dictionary=False, **kwargs):
+        return Cursor(self, dictionary)
+
+    @property
+    def in_transaction(self):
+        return self._raw.in_transaction
+
+    def commit(self):
+        self._raw.commit()
+        self._round_trip()
+
+    def rollback(self):
+        self._raw.rollback()
+        self._round_trip()
+
+    def is_connected(self):
+        return True
+
+    def close(self):
+        self._raw.close()
+
+
+class AsyncCursor(_CursorBase):
+    async def _retrying(self, sql, params, many=False):
+        await self._conn._round_trip()
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                self._run(sql, params, many)
+                self._conn._wrote(sql)
+                return
+            except sqlite3.OperationalError as e:
+                # Never block the event loop on SQLite's busy handler
+                if "locked" not in str(e) or time.monotonic() > deadline:
+                    raise _to_mysql_error(e)
+                await asyncio.sleep(0.001)
+            except sqlite3.Error as e:
+                raise _to_mysql_error(e)
+
+    async def execute(self, sql, params=None):
+        await self._conn._parse()
+        await self._retrying(sql, params)
+
+    async def executemany(self, sql, seq_params):
+        await self._conn._parse()
+        await self._retrying(sql, seq_params, many=True)
+
+    async def fetchone(self):
+        return self._shape(self._cur.fetchone())
+
+    async def fetchmany(self, size=1):
+        return [self._shape(r) for r in self._cur.fetchmany(size)]
+
+    async def fetchall(self):
+        return [self._shape(r) for r in self._cur.fetchall()]
+
+    async def close(self):
+        self._cur.close()
+
+
+class PreparedAsyncCursor(AsyncCursor):
+    """
+    A prepared cursor: parses when handed a statement other than the one it
+    prepared. Like mysql.connector it compares the str object, not its text.
+    """
+
+    def __init__(self, conn, dictionary=False):
+        super().__init__(conn, dictionary)
+        self._prepared = None
+
+    async def execute(self, sql, params=None):
+        if sql is not self._prepared:
+            await self._conn._round_trip()  # COM_STMT_PREPARE
+            await self._conn._parse()
+            self._prepared = sql
+        await self._retrying(sql, params)
+
+
+class AsyncConnection:
+    """asyncio stand-in for mysql.connector.aio.MySQLConnection."""
+
+    def __init__(self, path, latency=0.0, parse_cost=0.0, row_locks=False):
+        self._raw = _open(path)
+        self._raw.execute("PRAGMA busy_timeout=0")
+        self.latency = latency
+        self.parse_cost = parse_cost
+        self.row_locks = row_locks
+        self._trips = 0
+        self._written = {}  # table -> self._trips at its first write in this transaction
+        self._owed = 0.0  # latency to sleep once the transaction ends
+
+    async def _round_trip(self):
+        round_trips.add()
+        self._trips += 1
+        if not self.latency:
+            return
+        if self.row_locks and self._raw.in_transaction:
+            self._owed += self.latency
+        else:
+            await asyncio.sleep(self.latency)
+
+    def _wrote(self, sql):
+        match = _WRITTEN_TABLE.match(sql)
+        if match:
+            self._written.setdefault(match.group(1), self._trips)
+
+    async def _end_transaction(self):
+        await self._round_trip()
+        for table, first in self._written.items():
+            lock_holds.add(table, self._trips - first)
+        self._written = {}
+        owed, self._owed = self._owed, 0.0
+        if owed:
+            await asyncio.sleep(owed)
+
+    async def _parse(self):
+        parses.add()
+        if self.parse_cost:
+            await asyncio.sleep(self.parse_cost)
+
+    async def cursor(self, dictionary=False, prepared=False, **kwargs):
+        return (PreparedAsyncCursor if prepared else AsyncCursor)(self, dictionary)
+
+    @property
+    def in_transaction(self):
+        return self._raw.in_transaction
+
+    async def commit(self):
+        self._raw.commit()
+        await self._end_transaction()
+
+    async def rollback(self):
+        self._raw.rollback()
+        await self._end_transaction()
+
+    async def is_connected(self):
+        return True
+
+    async def close(self):
+        self._raw.close()
+
+
+def connect(path, latency=0.0):
+    return Connection(path, latency)
+
+
+async def async_connect(path, latency=0.0, parse_cost=0.0, row_locks=False):
+    return AsyncConnection(path, latency, parse_cost, row_locks)
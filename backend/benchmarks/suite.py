@@ -0,0 +1,255 @@
+"""
+Load-test suite: a mixed front-desk workload against a seeded database.
+
+Seeds the six tables at `--scale` bookings (see benchmarks.seed), then runs
+`--requests` requests from `--concurrency` clients, drawn from `--mix`:
+
+    rooms        GET /api/rooms?limit=50
+    booking      POST /api/bookings (one night, a free future date)
+    payment      POST /api/payments
+    maintenance  PATCH /api/maintenance/{id}
+
+and reports throughput, p50/p95/p99 latency and SQL statements per request,
+overall and per endpoint. On the stand-in it also counts round trips
+(statements plus commits/rollbacks). `--save` writes the result as JSON;
+`--compare` checks it against a saved baseline and exits 1 when throughput
+fell, or p99 rose, by more than `--tolerance`.
+
+The stand-in target needs nothing installed. The mysql target uses the
+app's DB_* settings and pool, runs setup_database(), and seeds the
+database when Guests is empty; point it at a scratch database.
+
+Usage (from backend/):
+    python -m benchmarks.suite --scale 10000 --save benchmarks/baselines/standin-10k.json
+    python -m benchmarks.suite --scale 10000 --compare benchmarks/baselines/standin-10k.json
+    python -m benchmarks.suite --target mysql --scale 1000000 --concurrency 100
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+import app.main as main
+from app.metrics import instrument_connection
+from app.pool import AsyncConnectionPool
+from benchmarks import seed as seeder
+from benchmarks import standin
+from benchmarks.harness import ASGIClient, percentile, print_table, run_load
+
+DEFAULT_MIX = "rooms=50,booking=20,payment=20,maintenance=10"
+MAINTENANCE_STATUSES = ("Pending", "In Progress", "Resolved")
+PAYMENT_METHODS = ("Cash", "UPI", "Card", "Bank Transfer")
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name not in ("rooms", "booking", "payment", "maintenance"):
+            raise argparse.ArgumentTypeError(f"unknown endpoint {name!r} in --mix")
+        mix[name] = int(weight or 1)
+    return mix
+
+
+async def table_sizes(conn):
+    """Max ids the generators may address, and the first free booking date."""
+    cursor = await conn.cursor()
+    try:
+        sizes = {}
+        for table, column in (("Guests", "guest_id"), ("Rooms", "room_id"),
+                              ("Bookings", "booking_id"), ("MaintenanceRequests", "request_id")):
+            await cursor.execute(f"SELECT COALESCE(MAX({column}), 0) FROM {table}")
+            sizes[table] = (await cursor.fetchone())[0]
+        await cursor.execute("SELECT MAX(COALESCE(check_out_date, check_in_date)) FROM Bookings")
+        last = (await cursor.fetchone())[0]
+        if isinstance(last, str):  # SQLite loses the column type through MAX()
+            last = date.fromisoformat(last)
+        sizes["first_free_day"] = max(last or date.today(), date.today()) + timedelta(days=1)
+        return sizes
+    finally:
+        await cursor.close()
+
+
+def request_factory(client, sizes, mix, rng_seed):
+    """`one(i)` for run_load, plus the per-endpoint latencies it records."""
+    rng = random.Random(rng_seed)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    rooms = sizes["Rooms"]
+    booked = iter(range(sys.maxsize))
+    latencies = {name: [] for name in names}
+    statuses = {name: {} for name in names}
+
+    async def one(i):
+        name = rng.choices(names, weights)[0]
+        started = time.perf_counter()
+        if name == "rooms":
+            status, _, _ = await client.request("GET", "/api/rooms", params={"limit": 50})
+        elif name == "booking":
+            # Room by room, then the next night, so bookings never overlap;
+            # consecutive guests so no guest holds two rooms on one night
+            n = next(booked)
+            check_in = sizes["first_free_day"] + timedelta(days=n // rooms)
+            status, _, _ = await client.request("POST", "/api/bookings", json_body={
+                "guest_id": n % sizes["Guests"] + 1,
+                "room_id": n % rooms + 1,
+                "check_in_date": check_in.isoformat(),
+                "check_out_date": (check_in + timedelta(days=1)).isoformat(),
+            })
+        elif name == "payment":
+            status, _, _ = await client.request("POST", "/api/payments", json_body={
+                "booking_id": rng.randrange(sizes["Bookings"]) + 1,
+                "amount_paid": "1500.00",
+                "payment_date": date.today().isoformat(),
+                "payment_method": rng.choice(PAYMENT_METHODS),
+            })
+        else:
+            status, _, _ = await client.request(
+                "PATCH", f"/api/maintenance/{rng.randrange(sizes['MaintenanceRequests']) + 1}",
+                params={"status": rng.choice(MAINTENANCE_STATUSES)},
+            )
+        latencies[name].append(time.perf_counter() - started)
+        statuses[name][str(status)] = statuses[name].get(str(status), 0) + 1
+        return status
+
+    return one, latencies, statuses
+
+
+def summarize(name, values, statuses):
+    values = sorted(values)
+    return {
+        "endpoint": name,
+        "requests": len(values),
+        "p50_ms": round(percentile(values, 50) * 1000, 2),
+        "p95_ms": round(percentile(values, 95) * 1000, 2),
+        "p99_ms": round(percentile(values, 99) * 1000, 2),
+        "statuses": dict(sorted(statuses.items())),
+    }
+
+
+async def drive(args, pool):
+    main.db_pool = pool
+    async with pool.connection() as conn:
+        if args.target == "mysql":
+            cursor = await conn.cursor()
+            await cursor.execute("SELECT COUNT(*) FROM Guests")
+            empty = (await cursor.fetchone())[0] == 0
+            await cursor.close()
+        else:
+            empty = True
+        if empty:
+            started = time.perf_counter()
+            await seeder.seed(conn, args.scale)
+            print(f"Seeded {args.scale} bookings in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+        sizes = await table_sizes(conn)
+
+    client = ASGIClient(main.app)
+    one, latencies, statuses = request_factory(client, sizes, args.mix, args.seed)
+
+    # Warm up the pool and caches, then measure
+    warm, _, _ = request_factory(client, sizes, {"rooms": 1}, args.seed)
+    await run_load(warm, args.concurrency, args.concurrency)
+
+    standin.round_trips.reset()
+    statements = main.metrics.query_seconds.count()
+    overall = await run_load(one, args.concurrency, args.requests)
+    overall["sql_statements_per_req"] = round((main.metrics.query_seconds.count() - statements) / args.requests, 2)
+    if args.target == "standin":
+        overall["round_trips_per_req"] = round(standin.round_trips.count / args.requests, 2)
+    return {
+        "meta": {
+            "target": args.target,
+            "scale": args.scale,
+            "rows": {k: v for k, v in sizes.items() if k != "first_free_day"},
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "latency_s": args.latency if args.target == "standin" else None,
+            "mix": args.mix,
+            "seed": args.seed,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "date": date.today().isoformat(),
+        },
+        "overall": overall,
+        "endpoints": {name: summarize(name, latencies[name], statuses[name]) for name in args.mix},
+    }
+
+
+def compare(result, baseline, tolerance):
+    """Regressions beyond `tolerance` as human-readable lines (empty if none)."""
+    problems = [f"{key} differs: baseline {baseline['meta'].get(key)!r}, now {result['meta'][key]!r}"
+                for key in ("target", "scale", "concurrency", "latency_s", "mix")
+                if baseline["meta"].get(key) != result["meta"][key]]
+    rows = [("overall", result["overall"], baseline["overall"])]
+    rows += [(name, result["endpoints"][name], baseline["endpoints"][name])
+             for name in result["endpoints"] if name in baseline.get("endpoints", {})]
+    for name, now, then in rows:
+        if "rps" in now and then.get("rps") and now["rps"] < then["rps"] * (1 - tolerance):
+            problems.append(f"{name}: rps {then['rps']} -> {now['rps']}")
+        if then.get("p99_ms") and now["p99_ms"] > then["p99_ms"] * (1 + tolerance):
+            problems.append(f"{name}: p99 {then['p99_ms']}ms -> {now['p99_ms']}ms")
+    return problems
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", choices=["standin", "mysql"], default="standin")
+    parser.add_argument("--scale", type=int, default=10000, help="seeded bookings (10000 ... 1000000)")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.001, help="stand-in: simulated DB round trip in seconds")
+    parser.add_argument("--pool-size", type=int, default=20, help="stand-in: connections in the pool")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f"endpoint weights (default {DEFAULT_MIX})")
+    parser.add_argument("--seed", type=int, default=1, help="request generator seed")
+    parser.add_argument("--save", metavar="PATH", help="write the result as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="fail on a regression against this baseline")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed regression, as a fraction")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    if args.target == "mysql":
+        asyncio.run(main.setup_database())
+        result = asyncio.run(drive(args, main.db_pool))
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "suite.db")
+            standin.create_database(path)
+            pool = AsyncConnectionPool(
+                instrument_connection(lambda: standin.async_connect(path, args.latency), main.metrics),
+                pool_size=args.pool_size, max_overflow=args.concurrency,
+            )
+            result = asyncio.run(drive(args, pool))
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print_table(
+            f"{args.target}, scale={args.scale}, concurrency={args.concurrency}",
+            [dict(result["overall"], endpoint="overall"), *result["endpoints"].values()],
+            ["endpoint", "requests", "rps", "p50_ms", "p95_ms", "p99_ms",
+             "sql_statements_per_req", "round_trips_per_req", "statuses"],
+        )
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w") as f:
+            json.dump(result, f, indent=2)
+            f.write("\n")
+    if args.compare:
+        with open(args.compare) as f:
+            problems = compare(result, json.load(f), args.tolerance)
+        for line in problems:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if problems:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main_()
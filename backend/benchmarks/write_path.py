@@ -0,0 +1,196 @@
+"""
+Write benchmark: re-reading each written row vs building the response in memory.
+
+The "reselect" target is the write handlers as they were before (existence
+SELECTs, then the INSERT/UPDATE, commit, then SELECT * of the new row), with
+the same rollup and ledger upserts as app.main so that only the re-SELECT
+differs; the "direct" target is app.main, which builds the response from
+the validated input, lastrowid and the created_at it sent. Both run on the
+async pool against the SQLite stand-in with the same simulated round-trip
+latency. The request mix is POST /api/guests, POST /api/payments and
+PATCH /api/maintenance/{id}, in equal parts; every payment goes to the
+same month and method, so they all update one RevenueMonthly row.
+
+The stand-in runs with `row_locks` (see benchmarks.standin): SQLite's
+database-wide lock would otherwise serialize every write transaction for
+its remaining round trips, and a payment (INSERT plus two upserts) would
+stall all other writes where MySQL only locks the rows it writes. What
+MySQL does serialize is the payments of one month and method on their
+RevenueMonthly row: `revenue_lock_rt` is how many round trips a payment
+holds it (1 with the upsert last before the commit), which caps those
+payments at about 1 / (revenue_lock_rt x round trip) per second.
+
+Usage (from backend/):
+    python -m benchmarks.write_path --concurrency 50 --requests 3000 --latency 0.02
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+
+from fastapi import Depends, FastAPI, HTTPException
+
+import app.main as main
+from app.dues import add_booking_payments
+from app.metrics import Metrics, MetricsMiddleware
+from app.pool import AsyncConnectionPool
+from app.rollups import add_payments
+from benchmarks import standin
+from benchmarks.harness import ASGIClient, print_table, run_load
+
+
+def seed(path, rows):
+    conn = standin.connect(path)
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO Guests (full_name, phone_number) VALUES ('Seed', 'seed')")
+    cursor.executemany("INSERT INTO Rooms (room_number, room_type, monthly_rent) VALUES (%s, 'Single', 5000)",
+                       [(f"R{i}",) for i in range(rows)])
+    cursor.executemany("INSERT INTO Bookings (guest_id, room_id, check_in_date) VALUES (1, %s, '2024-01-01')",
+                       [(i + 1,) for i in range(rows)])
+    cursor.executemany(
+        "INSERT INTO MaintenanceRequests (room_id, issue_description, reported_date) VALUES (%s, 'Leak', '2024-01-02')",
+        [(i + 1,) for i in range(rows)],
+    )
+    conn.commit()
+    conn.close()
+
+
+def build_reselect_app(pool):
+    """The write handlers before the change: existence checks and a re-SELECT."""
+    async def get_db_connection():
+        async with pool.connection() as conn:
+            yield conn
+
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware, metrics=Metrics())  # same per-request overhead as app.main
+
+    @app.post("/api/guests", response_model=main.Guest, status_code=201)
+    async def create_guest(guest: main.GuestCreate, conn=Depends(get_db_connection)):
+        cursor = await conn.cursor(dictionary=True)
+        try:
+            await cursor.execute(
+                "INSERT INTO Guests (full_name, phone_number, email, id_proof_type, id_proof_number, address) "
+                "VALUES (%s, %s, %s, %s, %s, %s)",
+                (guest.full_name, guest.phone_number, guest.email,
+                 guest.id_proof_type, guest.id_proof_number, guest.address),
+            )
+            await conn.commit()
+            await cursor.execute("SELECT * FROM Guests WHERE guest_id = %s", (cursor.lastrowid,))
+            return await cursor.fetchone()
+        except main.mysql.connector.IntegrityError as e:
+            await conn.rollback()
+            raise HTTPException(status_code=400, detail=str(e))
+        finally:
+            await cursor.close()
+
+    @app.post("/api/payments", response_model=main.Payment, status_code=201)
+    async def create_payment(payment: main.PaymentCreate, conn=Depends(get_db_connection)):
+        cursor = await conn.cursor(dictionary=True)
+        try:
+            await cursor.execute("SELECT booking_id FROM Bookings WHERE booking_id = %s", (payment.booking_id,))
+            if not await cursor.fetchone():
+                raise HTTPException(status_code=404, detail="Booking not found.")
+            await cursor.execute(
+                "INSERT INTO Payments (booking_id, amount_paid, payment_date, payment_method, remarks) "
+                "VALUES (%s, %s, %s, %s, %s)",
+                (payment.booking_id, payment.amount_paid, payment.payment_date,
+                 payment.payment_method.value, payment.remarks),
+            )
+            amount_paid = main.money(payment.amount_paid)
+            await add_booking_payments(cursor, [(payment.booking_id, payment.payment_date, amount_paid)])
+            await add_payments(cursor, [(payment.payment_date, payment.payment_method.value, amount_paid)])
+            await conn.commit()
+            await cursor.execute("SELECT * FROM Payments WHERE payment_id = %s", (cursor.lastrowid,))
+            return await cursor.fetchone()
+        finally:
+            await cursor.close()
+
+    @app.patch("/api/maintenance/{request_id}", response_model=main.MaintenanceRequest)
+    async def update_maintenance_request(request_id: int, status: main.MaintenanceStatus,
+                                         conn=Depends(get_db_connection)):
+        cursor = await conn.cursor(dictionary=True)
+        try:
+            await cursor.execute("SELECT * FROM MaintenanceRequests WHERE request_id = %s", (request_id,))
+            if not await cursor.fetchone():
+                raise HTTPException(status_code=404, detail="Maintenance request not found.")
+            await cursor.execute("UPDATE MaintenanceRequests SET status = %s, resolved_date = %s "
+                                 "WHERE request_id = %s", (status.value, None, request_id))
+            await conn.commit()
+            await cursor.execute("SELECT * FROM MaintenanceRequests WHERE request_id = %s", (request_id,))
+            return await cursor.fetchone()
+        finally:
+            await cursor.close()
+
+    return app
+
+
+def build_direct_app(pool):
+    main.db_pool = pool
+    return main.app
+
+
+async def drive(app, label, args):
+    client = ASGIClient(app)
+    statuses = ("Pending", "In Progress", "Resolved")
+
+    async def one(i):
+        kind = i % 3
+        if kind == 0:
+            status, _, _ = await client.request("POST", "/api/guests", json_body={
+                "full_name": f"Guest {i}",
+                "phone_number": f"{label[:1]}{i:09d}",
+            })
+        elif kind == 1:
+            status, _, _ = await client.request("POST", "/api/payments", json_body={
+                "booking_id": i % args.rows + 1,
+                "amount_paid": "1500.00",
+                "payment_date": "2024-02-01",
+                "payment_method": "UPI",
+            })
+        else:
+            status, _, _ = await client.request("PATCH", f"/api/maintenance/{i % args.rows + 1}",
+                                                params={"status": statuses[i % 3]})
+        return status
+
+    standin.round_trips.reset()
+    standin.lock_holds.reset()
+    result = await run_load(one, args.concurrency, args.requests)
+    result["target"] = label
+    result["round_trips_per_req"] = round(standin.round_trips.count / args.requests, 2)
+    result["revenue_lock_rt"] = standin.lock_holds.per_transaction("RevenueMonthly")
+    return result
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--latency", type=float, default=0.02, help="simulated DB round trip in seconds")
+    parser.add_argument("--pool-size", type=int, default=20)
+    parser.add_argument("--rows", type=int, default=200, help="seeded bookings and maintenance requests")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, build in (("reselect", build_reselect_app), ("direct", build_direct_app)):
+            path = os.path.join(tmp, f"{label}.db")
+            standin.create_database(path)
+            seed(path, args.rows)
+            pool = AsyncConnectionPool(lambda: standin.async_connect(path, args.latency, row_locks=True),
+                                       pool_size=args.pool_size, max_overflow=args.concurrency)
+            results.append(asyncio.run(drive(build(pool), label, args)))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(
+            f"POST /api/guests + POST /api/payments + PATCH /api/maintenance, latency={args.latency}s",
+            results, ["target", "requests", "concurrency", "rps", "p50_ms", "p95_ms", "p99_ms",
+                      "round_trips_per_req", "revenue_lock_rt", "statuses"],
+        )
+
+
+if __name__ == "__main__":
+    main_()
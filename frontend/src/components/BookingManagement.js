@@ -1,5 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import './Management.css';
+import useChangeFeed, { upsertRow } from '../useChangeFeed';
 
 const API_BASE = process.env.REACT_APP_API_URL || 'http://localhost:8000';
 
@@ -22,6 +23,13 @@ function BookingManagement() {
     fetchData();
   }, []);
 
+  // Patch local state from the change feed instead of reloading every table
+  useChangeFeed({
+    bookings: ({ row }) => setBookings(current => upsertRow(current, row, 'booking_id')),
+    guests: ({ row }) => setGuests(current => upsertRow(current, row, 'guest_id')),
+    rooms: ({ row }) => setRooms(current => upsertRow(current, row, 'room_id'))
+  }, () => fetchData());
+
   const fetchData = async () => {
     setLoading(true);
     try {
@@ -72,7 +80,9 @@ function BookingManagement() {
         throw new Error(errorData.detail || 'Failed to create booking');
       }
       
-      await fetchData();
+      // The room's new status arrives through the change feed
+      const created = await response.json();
+      setBookings(current => upsertRow(current, created, 'booking_id'));
       setShowForm(false);
       setFormData({
         guest_id: '',
@@ -20,25 +20,16 @@ function Dashboard() {
 
   const fetchDashboardData = async () => {
     try {
-      const [guestsRes, roomsRes, bookingsRes] = await Promise.all([
-        fetch(`${API_BASE}/api/guests`),
-        fetch(`${API_BASE}/api/rooms`),
-        fetch(`${API_BASE}/api/bookings`)
-      ]);
-
-      const [guests, rooms, bookings] = await Promise.all([
-        guestsRes.json(),
-        roomsRes.json(),
-        bookingsRes.json()
-      ]);
+      const response = await fetch(`${API_BASE}/api/dashboard/summary`);
+      const summary = await response.json();
 
       setStats({
-        totalGuests: guests.length,
-        totalRooms: rooms.length,
-        availableRooms: rooms.filter(r => r.occupancy_status === 'Available').length,
-        occupiedRooms: rooms.filter(r => r.occupancy_status === 'Occupied').length,
-        activeBookings: bookings.filter(b => b.booking_status === 'Active').length,
-        totalBookings: bookings.length
+        totalGuests: summary.total_guests,
+        totalRooms: summary.total_rooms,
+        availableRooms: summary.rooms_by_status.Available,
+        occupiedRooms: summary.rooms_by_status.Occupied,
+        activeBookings: summary.active_bookings,
+        totalBookings: summary.total_bookings
       });
     } catch (err) {
       console.error('Error fetching dashboard data:', err);
@@ -1,5 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import './Management.css';
+import useChangeFeed, { upsertRow } from '../useChangeFeed';
 
 const API_BASE = process.env.REACT_APP_API_URL || 'http://localhost:8000';
 
@@ -10,6 +11,7 @@ function MaintenanceManagement() {
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   const [showForm, setShowForm] = useState(false);
+  const [selected, setSelected] = useState([]);
   const [formData, setFormData] = useState({
     room_id: '',
     guest_id: '',
@@ -22,6 +24,13 @@ function MaintenanceManagement() {
     fetchData();
   }, []);
 
+  // Patch local state from the change feed instead of reloading every table
+  useChangeFeed({
+    maintenance: ({ row }) => setRequests(current => upsertRow(current, row, 'request_id')),
+    guests: ({ row }) => setGuests(current => upsertRow(current, row, 'guest_id')),
+    rooms: ({ row }) => setRooms(current => upsertRow(current, row, 'room_id'))
+  }, () => fetchData());
+
   const fetchData = async () => {
     setLoading(true);
     try {
@@ -72,7 +81,8 @@ function MaintenanceManagement() {
         throw new Error(errorData.detail || 'Failed to create maintenance request');
       }
       
-      await fetchData();
+      const created = await response.json();
+      setRequests(current => upsertRow(current, created, 'request_id'));
       setShowForm(false);
       setFormData({
         room_id: '',
@@ -110,28 +120,50 @@ function MaintenanceManagement() {
     return guest ? guest.full_name : 'Unknown';
   };
 
-  const handleStatusUpdate = async (requestId, newStatus) => {
+  // Moves one or many requests in a single PATCH and merges back only the
+  // rows the server reports as changed, instead of refetching everything
+  const handleStatusUpdate = async (requestIds, newStatus) => {
     try {
       const resolvedDate = newStatus === 'Resolved' ? new Date().toISOString().split('T')[0] : null;
-      const response = await fetch(`${API_BASE}/api/maintenance/${requestId}?status=${newStatus}${resolvedDate ? `&resolved_date=${resolvedDate}` : ''}`, {
+      const response = await fetch(`${API_BASE}/api/maintenance`, {
         method: 'PATCH',
         headers: {
           'Content-Type': 'application/json',
-        }
+        },
+        body: JSON.stringify({
+          request_ids: requestIds,
+          status: newStatus,
+          resolved_date: resolvedDate
+        }),
       });
-      
+
       if (!response.ok) {
         const errorData = await response.json();
-        throw new Error(errorData.detail || 'Failed to update maintenance request');
+        throw new Error(errorData.detail || 'Failed to update maintenance requests');
       }
-      
-      await fetchData();
-      alert('Maintenance request status updated!');
+
+      const changed = await response.json();
+      const byId = new Map(changed.map(r => [r.request_id, r]));
+      setRequests(current => current.map(r => byId.get(r.request_id) || r));
+      setSelected([]);
+      alert(`${changed.length} maintenance request(s) updated!`);
     } catch (err) {
       alert(`Error: ${err.message}`);
     }
   };
 
+  const toggleSelected = (requestId) => {
+    setSelected(selected.includes(requestId)
+      ? selected.filter(id => id !== requestId)
+      : [...selected, requestId]);
+  };
+
+  const openRequestIds = requests.filter(r => r.status !== 'Resolved').map(r => r.request_id);
+
+  const toggleAll = () => {
+    setSelected(selected.length === openRequestIds.length ? [] : openRequestIds);
+  };
+
   if (loading) return <div className="loading">Loading maintenance requests...</div>;
   if (error) return <div className="error">Error: {error}</div>;
 
@@ -255,12 +287,35 @@ function MaintenanceManagement() {
 
       <div className="table-container">
         <h3>Maintenance Requests ({requests.length})</h3>
+        {selected.length > 0 && (
+          <div className="action-buttons">
+            <button
+              className="btn-small btn-warning"
+              onClick={() => handleStatusUpdate(selected, 'In Progress')}
+            >
+              Start {selected.length} selected
+            </button>
+            <button
+              className="btn-small btn-success"
+              onClick={() => handleStatusUpdate(selected, 'Resolved')}
+            >
+              Resolve {selected.length} selected
+            </button>
+          </div>
+        )}
         {requests.length === 0 ? (
           <p className="no-data">No maintenance requests found. Create your first request!</p>
         ) : (
           <table className="data-table">
             <thead>
               <tr>
+                <th>
+                  <input
+                    type="checkbox"
+                    checked={openRequestIds.length > 0 && selected.length === openRequestIds.length}
+                    onChange={toggleAll}
+                  />
+                </th>
                 <th>Request ID</th>
                 <th>Room</th>
                 <th>Guest</th>
@@ -274,6 +329,15 @@ function MaintenanceManagement() {
             <tbody>
               {requests.map((request) => (
                 <tr key={request.request_id}>
+                  <td>
+                    {request.status !== 'Resolved' && (
+                      <input
+                        type="checkbox"
+                        checked={selected.includes(request.request_id)}
+                        onChange={() => toggleSelected(request.request_id)}
+                      />
+                    )}
+                  </td>
                   <td>{request.request_id}</td>
                   <td><strong>{getRoomInfo(request.room_id)}</strong></td>
                   <td>{getGuestName(request.guest_id)}</td>
@@ -287,14 +351,14 @@ function MaintenanceManagement() {
                         {request.status === 'Pending' && (
                           <button 
                             className="btn-small btn-warning"
-                            onClick={() => handleStatusUpdate(request.request_id, 'In Progress')}
+                            onClick={() => handleStatusUpdate([request.request_id], 'In Progress')}
                           >
                             Start
                           </button>
                         )}
                         <button 
                           className="btn-small btn-success"
-                          onClick={() => handleStatusUpdate(request.request_id, 'Resolved')}
+                          onClick={() => handleStatusUpdate([request.request_id], 'Resolved')}
                         >
                           Resolve
                         </button>
@@ -1,5 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import './Management.css';
+import useChangeFeed, { upsertRow } from '../useChangeFeed';
 
 const API_BASE = process.env.REACT_APP_API_URL || 'http://localhost:8000';
 
@@ -8,6 +9,7 @@ function PaymentManagement() {
   const [bookings, setBookings] = useState([]);
   const [guests, setGuests] = useState([]);
   const [rooms, setRooms] = useState([]);
+  const [revenue, setRevenue] = useState({ payment_count: 0, total_amount: 0, months: [] });
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   const [showForm, setShowForm] = useState(false);
@@ -23,31 +25,55 @@ function PaymentManagement() {
     fetchData();
   }, []);
 
+  const fetchRevenue = async () => {
+    const response = await fetch(`${API_BASE}/api/reports/revenue?months=1`);
+    if (response.ok) setRevenue(await response.json());
+  };
+
+  // Payments are listed newest first; the totals are re-read from the rollup
+  const addPayment = (row) => {
+    setPayments(current => current.some(p => p.payment_id === row.payment_id)
+      ? current
+      : [row, ...current]);
+    fetchRevenue();
+  };
+
+  // Patch local state from the change feed instead of reloading every table
+  useChangeFeed({
+    payments: ({ row }) => addPayment(row),
+    bookings: ({ row }) => setBookings(current => upsertRow(current, row, 'booking_id')),
+    guests: ({ row }) => setGuests(current => upsertRow(current, row, 'guest_id')),
+    rooms: ({ row }) => setRooms(current => upsertRow(current, row, 'room_id'))
+  }, () => fetchData());
+
   const fetchData = async () => {
     setLoading(true);
     try {
-      const [paymentsRes, bookingsRes, guestsRes, roomsRes] = await Promise.all([
+      const [paymentsRes, bookingsRes, guestsRes, roomsRes, revenueRes] = await Promise.all([
         fetch(`${API_BASE}/api/payments`),
         fetch(`${API_BASE}/api/bookings`),
         fetch(`${API_BASE}/api/guests`),
-        fetch(`${API_BASE}/api/rooms`)
+        fetch(`${API_BASE}/api/rooms`),
+        fetch(`${API_BASE}/api/reports/revenue?months=1`)
       ]);
 
-      if (!paymentsRes.ok || !bookingsRes.ok || !guestsRes.ok || !roomsRes.ok) {
+      if (!paymentsRes.ok || !bookingsRes.ok || !guestsRes.ok || !roomsRes.ok || !revenueRes.ok) {
         throw new Error('Failed to fetch data');
       }
       
-      const [paymentsData, bookingsData, guestsData, roomsData] = await Promise.all([
+      const [paymentsData, bookingsData, guestsData, roomsData, revenueData] = await Promise.all([
         paymentsRes.json(),
         bookingsRes.json(),
         guestsRes.json(),
-        roomsRes.json()
+        roomsRes.json(),
+        revenueRes.json()
       ]);
 
       setPayments(paymentsData);
       setBookings(bookingsData);
       setGuests(guestsData);
       setRooms(roomsData);
+      setRevenue(revenueData);
       setError(null);
     } catch (err) {
       setError(err.message);
@@ -76,7 +102,7 @@ function PaymentManagement() {
         throw new Error(errorData.detail || 'Failed to create payment');
       }
       
-      await fetchData();
+      addPayment(await response.json());
       setShowForm(false);
       setFormData({
         booking_id: '',
@@ -108,14 +134,19 @@ function PaymentManagement() {
     return `${guest?.full_name || 'Unknown'} - Room ${room?.room_number || 'Unknown'}`;
   };
 
-  const calculateTotalPayments = () => {
-    return payments.reduce((sum, payment) => sum + parseFloat(payment.amount_paid || 0), 0);
+  // Totals come from the server-side revenue rollup instead of summing every payment
+  const paymentsThisMonth = () => {
+    const now = new Date();
+    const month = `${now.getFullYear()}-${String(now.getMonth() + 1).padStart(2, '0')}`;
+    return revenue.months
+      .filter(m => m.month === month)
+      .reduce((sum, m) => sum + m.payment_count, 0);
   };
 
   if (loading) return <div className="loading">Loading payments...</div>;
   if (error) return <div className="error">Error: {error}</div>;
 
-  const totalPayments = calculateTotalPayments();
+  const totalPayments = parseFloat(revenue.total_amount || 0);
 
   return (
     <div className="management-container">
@@ -132,7 +163,7 @@ function PaymentManagement() {
       <div className="stats-container">
         <div className="stat-card">
           <h4>Total Payments</h4>
-          <p className="stat-number">{payments.length}</p>
+          <p className="stat-number">{revenue.payment_count}</p>
         </div>
         <div className="stat-card">
           <h4>Total Amount</h4>
@@ -140,14 +171,7 @@ function PaymentManagement() {
         </div>
         <div className="stat-card">
           <h4>This Month</h4>
-          <p className="stat-number">
-            {payments.filter(p => {
-              const paymentDate = new Date(p.payment_date);
-              const now = new Date();
-              return paymentDate.getMonth() === now.getMonth() && 
-                     paymentDate.getFullYear() === now.getFullYear();
-            }).length}
-          </p>
+          <p className="stat-number">{paymentsThisMonth()}</p>
         </div>
       </div>
 
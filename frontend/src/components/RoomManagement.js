@@ -1,5 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import './Management.css';
+import useChangeFeed, { upsertRow } from '../useChangeFeed';
 
 const API_BASE = process.env.REACT_APP_API_URL || 'http://localhost:8000';
 
@@ -19,6 +20,11 @@ function RoomManagement() {
     fetchRooms();
   }, []);
 
+  // Patch rooms as other screens and tabs change them instead of polling
+  useChangeFeed({
+    rooms: ({ row }) => setRooms(current => upsertRow(current, row, 'room_id'))
+  }, () => fetchRooms());
+
   const fetchRooms = async () => {
     setLoading(true);
     try {
@@ -50,7 +56,8 @@ function RoomManagement() {
         throw new Error(errorData.detail || 'Failed to create room');
       }
       
-      await fetchRooms();
+      const created = await response.json();
+      setRooms(current => upsertRow(current, created, 'room_id'));
       setShowForm(false);
       setFormData({
         room_number: '',
@@ -0,0 +1,52 @@
+import { useEffect, useRef } from 'react';
+
+const API_BASE = process.env.REACT_APP_API_URL || 'http://localhost:8000';
+
+// Inserts `row` into `rows`, or merges it into the row with the same `key`
+export const upsertRow = (rows, row, key) => {
+  const index = rows.findIndex(r => r[key] === row[key]);
+  if (index === -1) return [...rows, row];
+  const next = [...rows];
+  next[index] = { ...next[index], ...row };
+  return next;
+};
+
+// Subscribes to the /api/events change feed. `handlers` maps a topic
+// (rooms, bookings, guests, payments, maintenance) to a function called
+// with {op, row}; `onReset` runs when events were missed, and should
+// reload everything. EventSource reconnects and resumes on its own.
+function useChangeFeed(handlers, onReset) {
+  const handlersRef = useRef(handlers);
+  const onResetRef = useRef(onReset);
+  handlersRef.current = handlers;
+  onResetRef.current = onReset;
+
+  const topics = Object.keys(handlers).sort().join(',');
+
+  useEffect(() => {
+    if (typeof EventSource === 'undefined') return undefined;
+    const source = new EventSource(`${API_BASE}/api/events?topics=${topics}`);
+    const listeners = topics.split(',').map(topic => {
+      const listener = (e) => {
+        const event = JSON.parse(e.data);
+        if (event.op === 'reload') {
+          onResetRef.current();
+        } else {
+          handlersRef.current[topic](event);
+        }
+      };
+      source.addEventListener(topic, listener);
+      return [topic, listener];
+    });
+    const reset = () => onResetRef.current();
+    source.addEventListener('reset', reset);
+
+    return () => {
+      listeners.forEach(([topic, listener]) => source.removeEventListener(topic, listener));
+      source.removeEventListener('reset', reset);
+      source.close();
+    };
+  }, [topics]);
+}
+
+export default useChangeFeed;